@@ -6,7 +6,7 @@ import pathlib
 
 from gopro_overlay.ffmpeg import FFMPEG
 from gopro_overlay.ffmpeg_gopro import GoproRecording, FFMPEGGoPro
-from gopro_overlay.gpmf.gpmf import GPMD
+from gopro_overlay.gpmf import Samples
 
 
 class DataDumpVisitor:
@@ -87,14 +87,14 @@ class DumpAggregateConverter:
             self.time = data
             self.queue = []
         else:
-            if isinstance(data, list):
+            if isinstance(data, (list, Samples)):
                 self.queue.extend(data)
             else:
                 self.queue.append(data)
 
 
 def dump(recording: GoproRecording, fourcc, output_file):
-    gpmd = GPMD.parse(recording.load_data())
+    gpmd = recording.load_gpmd(streams={fourcc, "GPSU"})
 
     with open(output_file, 'wt', encoding='utf-8') as file:
         converter = DumpAggregateConverter(file)
@@ -1,42 +1,55 @@
 #!/usr/bin/env python3
+import contextlib
 import datetime
 import sys
 from importlib import metadata
 from importlib.metadata import PackageNotFoundError
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Set
 
 from gopro_overlay import timeseries_process, gpmd_filters
 from gopro_overlay.arguments import gopro_dashboard_arguments
 from gopro_overlay.assertion import assert_file_exists
-from gopro_overlay.buffering import SingleBuffer, DoubleBuffer
+from gopro_overlay.buffering import InPlaceBuffer, RingBuffer, ThreadedBuffer
 from gopro_overlay.common import temp_file_name
 from gopro_overlay.config import Config
 from gopro_overlay.counter import ReasonCounter
 from gopro_overlay.date_overlap import DateRange
-from gopro_overlay.dimensions import dimension_from
+from gopro_overlay.dimensions import dimension_from, Dimension
 from gopro_overlay.execution import InProcessExecution
 from gopro_overlay.ffmpeg import FFMPEG
 from gopro_overlay.ffmpeg_gopro import FFMPEGGoPro
-from gopro_overlay.ffmpeg_overlay import FFMPEGNull, FFMPEGOverlay, FFMPEGOverlayVideo
+from gopro_overlay.ffmpeg_overlay import FFMPEGNull, FFMPEGOverlay, FFMPEGOverlayVideo, OverlayRegions, \
+    default_filter_complex
 from gopro_overlay.ffmpeg_profile import load_ffmpeg_profile
 from gopro_overlay.font import load_font
+from gopro_overlay.framemeta import FrameMeta, Stepper
+from gopro_overlay.framemeta_columnar import ColumnarFrameMeta
 from gopro_overlay.framemeta_gpx import merge_gpx_with_gopro, timeseries_to_framemeta
 from gopro_overlay.geo import MapRenderer, api_key_finder, MapStyler
+from gopro_overlay.geodesy import geodesy_for
 from gopro_overlay.gpmf import GPS_FIXED_VALUES, GPSFix
 from gopro_overlay.layout import Overlay, speed_awareness_layout
-from gopro_overlay.layout_xml import layout_from_xml, load_xml_layout, Converters
+from gopro_overlay.layout_xml import layout_from_xml, load_xml_layout, Converters, update_rate_in
+from gopro_overlay.layout_xml_fields import fields_from_xml
 from gopro_overlay.loading import load_external, GoproLoader
 from gopro_overlay.log import log, fatal
+from gopro_overlay.pipeline import Pipeline
 from gopro_overlay.point import Point
 from gopro_overlay.privacy import PrivacyZone, NoPrivacyZone
 from gopro_overlay.progresstrack import ProgressBarProgress
+from gopro_overlay.segmenting import SegmentedRender, segment_ranges, segment_path
+from gopro_overlay.sharding import ShardedRenderer
 from gopro_overlay.timeunits import timeunits, Timeunit
 from gopro_overlay.timing import PoorTimer, Timers
 from gopro_overlay.units import units
 from gopro_overlay.widgets.profile import WidgetProfiler
 
 
+# smoothing and deltas need some data either side of what is rendered
+processing_margin = timeunits(seconds=10)
+
+
 def accepter_from_args(include, exclude):
     if include and exclude:
         raise ValueError("Can't use both include and exclude at the same time")
@@ -50,7 +63,7 @@ def accepter_from_args(include, exclude):
 
 
 def create_desired_layout(dimensions, layout, layout_xml: Path, include, exclude, renderer, timeseries, font,
-                          privacy_zone, profiler, converters: Converters):
+                          privacy_zone, profiler, converters: Converters, timelapse: float = 1.0):
     accepter = accepter_from_args(include, exclude)
 
     if layout_xml:
@@ -61,7 +74,7 @@ def create_desired_layout(dimensions, layout, layout_xml: Path, include, exclude
         try:
             return layout_from_xml(
                 load_xml_layout(resource_name), renderer, timeseries, font, privacy_zone, include=accepter,
-                decorator=profiler, converters=converters
+                decorator=profiler, converters=converters, timelapse=timelapse
             )
         except FileNotFoundError:
             raise IOError(f"Unable to locate bundled layout resource: {resource_name}. "
@@ -72,12 +85,44 @@ def create_desired_layout(dimensions, layout, layout_xml: Path, include, exclude
     elif layout == "xml":
         return layout_from_xml(
             load_xml_layout(layout_xml), renderer, timeseries, font, privacy_zone, include=accepter,
-            decorator=profiler, converters=converters
+            decorator=profiler, converters=converters, timelapse=timelapse
         )
     else:
         raise ValueError(f"Unsupported layout {args.layout_creator}")
 
 
+def overlay_regions_for(dimensions: Dimension, overlay: Overlay, stepper: Stepper) -> Optional[OverlayRegions]:
+    regions = overlay.regions(stepper, dimensions)
+    if not regions:
+        log("Unable to crop overlay - can't tell where the layout draws, so using whole frames")
+        return None
+
+    area = sum((r.x1 - r.x0) * (r.y1 - r.y0) for r in regions)
+    log(f"Cropping overlay to {len(regions)} regions, {100 * area / (dimensions.x * dimensions.y):.1f}% of frame")
+    return OverlayRegions(dimensions, regions)
+
+
+def layout_xml_for(dimensions: Dimension, layout, layout_xml: Path) -> Optional[str]:
+    """The XML of the layout, or None if it isn't an XML layout"""
+    if layout_xml:
+        return load_xml_layout(layout_xml)
+    elif layout == "default":
+        try:
+            return load_xml_layout(Path(f"default-{dimensions.x}x{dimensions.y}"))
+        except FileNotFoundError:
+            return None
+    return None
+
+
+def layout_fields_for(dimensions: Dimension, layout, layout_xml: Path, include, exclude) -> Optional[Set[str]]:
+    """The fields the layout reads from each entry, or None if this can't be known"""
+    xml = layout_xml_for(dimensions, layout, layout_xml)
+    if xml is None:
+        return None
+
+    return fields_from_xml(xml, include=accepter_from_args(include, exclude))
+
+
 def fmtdt(dt: datetime.datetime):
     return dt.replace(microsecond=0).isoformat()
 
@@ -123,6 +168,8 @@ if __name__ == "__main__":
     inputpath: Optional[Path] = None
     generate = args.generate
 
+    framemeta_factory = ColumnarFrameMeta if args.columnar else FrameMeta
+
     config_dir = args.config_dir
     config_dir.mkdir(exist_ok=True)
 
@@ -192,7 +239,8 @@ if __name__ == "__main__":
                         fit_or_gpx_timeseries,
                         units,
                         start_date=start_date,
-                        duration=duration
+                        duration=duration,
+                        framemeta_factory=framemeta_factory
                     )
                     video_duration = frame_meta.duration()
                     packets_per_second = 10
@@ -210,7 +258,8 @@ if __name__ == "__main__":
                             speed_max=units.Quantity(args.gps_speed_max, args.gps_speed_max_units),
                             bbox=args.gps_bbox_lon_lat,
                             report=counter.because
-                        )
+                        ),
+                        framemeta_factory=framemeta_factory
                     )
 
                     gopro = loader.load(inputpath)
@@ -255,39 +304,94 @@ if __name__ == "__main__":
 
             log(f"Generating overlay at {dimensions}")
             log(f"Timeseries has {len(frame_meta)} data points")
+            if args.columnar:
+                log(f"Timeseries columns use {frame_meta.nbytes() / (1024 * 1024):.1f}MB")
+
+            # Draw an overlay frame every 0.1 seconds of video
+            timelapse_correction = frame_meta.duration() / video_duration
+            log(f"Timelapse Factor = {timelapse_correction:.3f}")
+
+            ranged = args.start is not None or args.end is not None
+            render_start = args.start if args.start is not None else timeunits(seconds=0)
+            render_end = min(args.end, video_duration) if args.end is not None else video_duration
+
+            if ranged:
+                if render_start >= video_duration:
+                    fatal(f"--start is after the end of the video, which is {video_duration.millis() / 1000:.1f}s long")
+                log(f"Rendering {render_start.millis() / 1000:.1f}s -> {render_end.millis() / 1000:.1f}s of the video")
+
             log("Processing....")
 
-            with timers.timer("processing"):
+            if ranged:
+                processing = frame_meta.processing_within(
+                    render_start * timelapse_correction - processing_margin,
+                    render_end * timelapse_correction + processing_margin
+                )
+            else:
+                processing = frame_meta.processing_within()
+
+            if args.render_workers > 1:
+                xml = layout_xml_for(dimensions, args.layout, args.layout_xml)
+                if xml is not None and update_rate_in(xml, include=accepter_from_args(args.include, args.exclude)):
+                    # each worker only sees some of the frames, so would each redraw at different times
+                    fatal("Layouts with an update-rate can't be drawn with --render-workers - use one or the other")
+
+            geodesy = geodesy_for(args.geodesy)
+            layout_fields = layout_fields_for(dimensions, args.layout, args.layout_xml, args.include, args.exclude)
+
+            with timers.timer("processing"), processing:
                 locked_2d = lambda e: e.gpsfix in GPS_FIXED_VALUES
                 locked_3d = lambda e: e.gpsfix == GPSFix.LOCK_3D.value
 
-                frame_meta.process(timeseries_process.process_ses("point", lambda i: i.point, alpha=0.45),
-                                   filter_fn=locked_2d)
-                frame_meta.process_deltas(timeseries_process.calculate_speeds(), skip=packets_per_second * 3,
-                                          filter_fn=locked_2d)
-                frame_meta.process(timeseries_process.calculate_odo(), filter_fn=locked_2d)
-                frame_meta.process_accel(timeseries_process.calculate_accel(), skip=18 * 3)
-                frame_meta.process_deltas(timeseries_process.calculate_gradient(), skip=packets_per_second * 3,
-                                          filter_fn=locked_3d)  # hack
-                frame_meta.process(timeseries_process.process_kalman("speed", lambda e: e.speed))
-                frame_meta.process(timeseries_process.filter_locked())
+                # all these stages are run together, in a single pass
+                pipeline = Pipeline()
+                pipeline.process_batch(
+                    timeseries_process.process_ses_batch("point", lambda i: i.point, alpha=0.45), filter_fn=locked_2d,
+                    produces={"point"}
+                )
+                pipeline.process_deltas_batch(timeseries_process.calculate_speeds_batch(geodesy),
+                                              skip=packets_per_second * 3, filter_fn=locked_2d,
+                                              produces={"cspeed", "cspeed.k", "cspeed.raw", "dist", "time", "azi",
+                                                        "cog"},
+                                              needs={"point"})
+                pipeline.process(timeseries_process.calculate_odo(), filter_fn=locked_2d,
+                                 produces={"codo"}, needs={"dist"})
+                pipeline.process_accel(timeseries_process.calculate_accel(), skip=18 * 3,
+                                       produces={"accel"}, needs={"speed"})
+                pipeline.process_deltas_batch(timeseries_process.calculate_gradient_batch(geodesy),
+                                              skip=packets_per_second * 3, filter_fn=locked_3d,  # hack
+                                              produces={"cgrad", "bad_grad", "grad_gain", "grad_dist",
+                                                        "grad_other_packet", "grad_other_packet_index"},
+                                              needs={"point", "alt"})
+                pipeline.process_batch(timeseries_process.process_kalman_batch("speed", lambda e: e.speed),
+                                       produces={"speed"}, needs={"speed"})
+                pipeline.process(timeseries_process.filter_locked())
+
+                # only work out what the layout will show
+                needed = pipeline.needed_for(layout_fields)
+                if len(needed.stages) < len(pipeline.stages):
+                    log(f"Layout only needs {len(needed.stages)} of {len(pipeline.stages)} processing stages")
+                frame_meta.process_pipeline(needed)
 
             # privacy zone applies everywhere, not just at start, so might not always be suitable...
             if args.privacy:
                 lat, lon, km = args.privacy.split(",")
                 privacy_zone = PrivacyZone(
                     Point(float(lat), float(lon)),
-                    units.Quantity(float(km), units.km)
+                    units.Quantity(float(km), units.km),
+                    geodesy=geodesy
                 )
             else:
                 privacy_zone = NoPrivacyZone()
 
-            with MapRenderer(
-                    cache_dir=cache_dir,
-                    styler=MapStyler(
-                        api_key_finder=api_key_finder(config_loader, args)
-                    )
-            ).open(args.map_style) as renderer:
+            map_renderer = MapRenderer(
+                cache_dir=cache_dir,
+                styler=MapStyler(
+                    api_key_finder=api_key_finder(config_loader, args)
+                )
+            )
+
+            with map_renderer.open(args.map_style) as renderer:
 
                 if args.profiler:
                     profiler = WidgetProfiler()
@@ -309,6 +413,39 @@ if __name__ == "__main__":
 
                 output: Path = args.output
 
+                stepper_step = timeunits(seconds=0.1 * timelapse_correction)
+                if ranged:
+                    stepper = frame_meta.stepper(stepper_step, start=render_start * timelapse_correction,
+                                                 end=render_end * timelapse_correction)
+                else:
+                    stepper = frame_meta.stepper(stepper_step)
+                progress = ProgressBarProgress("Render")
+
+                unit_converters = Converters(
+                    speed_unit=args.units_speed,
+                    distance_unit=args.units_distance,
+                    altitude_unit=args.units_altitude,
+                    temperature_unit=args.units_temperature,
+                )
+
+                def layout_creator_for(renderer):
+                    return create_desired_layout(
+                        layout=args.layout,
+                        layout_xml=args.layout_xml,
+                        dimensions=dimensions,
+                        include=args.include,
+                        exclude=args.exclude,
+                        renderer=renderer,
+                        timeseries=frame_meta,
+                        font=font,
+                        privacy_zone=privacy_zone,
+                        profiler=profiler,
+                        converters=unit_converters,
+                        timelapse=timelapse_correction
+                    )
+
+                segmented = args.segments > 1 and generate == "default"
+
                 if generate == "none":
                     ffmpeg = FFMPEGNull()
                 elif generate == "overlay":
@@ -319,72 +456,140 @@ if __name__ == "__main__":
                         options=ffmpeg_options,
                         overlay_size=dimensions,
                         execution=execution,
-                        creation_time=frame_meta.date_at(frame_meta.min)
+                        creation_time=frame_meta.date_at(frame_meta.min),
+                        skip_duplicates=args.skip_duplicate_frames
                     )
                 else:
-                    output.unlink(missing_ok=True)
-                    ffmpeg = FFMPEGOverlayVideo(
-                        ffmpeg=ffmpeg_exe,
-                        input=inputpath,
-                        output=output,
-                        options=ffmpeg_options,
-                        overlay_size=dimensions,
-                        execution=execution,
-                        creation_time=frame_meta.date_at(frame_meta.min)
-                    )
+                    regions = None
+                    if args.crop_overlay:
+                        if ffmpeg_options and ffmpeg_options.filter_complex != default_filter_complex:
+                            log("Unable to crop overlay - ffmpeg profile has its own filter")
+                        else:
+                            regions = overlay_regions_for(
+                                dimensions,
+                                Overlay(framemeta=frame_meta, create_widgets=layout_creator_for(renderer)),
+                                stepper
+                            )
 
-                draw_timer = PoorTimer("drawing frames")
+                    def overlay_video_for(output, execution, start=None, duration=None):
+                        return FFMPEGOverlayVideo(
+                            ffmpeg=ffmpeg_exe,
+                            input=inputpath,
+                            output=output,
+                            options=ffmpeg_options,
+                            overlay_size=dimensions,
+                            execution=execution,
+                            creation_time=frame_meta.date_at(frame_meta.min),
+                            regions=regions,
+                            skip_duplicates=args.skip_duplicate_frames,
+                            start=start,
+                            duration=duration
+                        )
 
-                # Draw an overlay frame every 0.1 seconds of video
-                timelapse_correction = frame_meta.duration() / video_duration
-                log(f"Timelapse Factor = {timelapse_correction:.3f}")
-                stepper = frame_meta.stepper(timeunits(seconds=0.1 * timelapse_correction))
-                progress = ProgressBarProgress("Render")
+                    output.unlink(missing_ok=True)
+                    # when segmented, each segment is written by its own ffmpeg, in render_segment
+                    if not segmented:
+                        if ranged:
+                            ffmpeg = overlay_video_for(output, execution, start=render_start,
+                                                       duration=render_end - render_start)
+                        else:
+                            ffmpeg = overlay_video_for(output, execution)
 
-                unit_converters = Converters(
-                    speed_unit=args.units_speed,
-                    distance_unit=args.units_distance,
-                    altitude_unit=args.units_altitude,
-                    temperature_unit=args.units_temperature,
-                )
+                draw_timer = PoorTimer("drawing frames")
+                frame_timers = [draw_timer]
+
+                # each render worker needs its own map renderer, as the tile cache can't be shared over fork
+                @contextlib.contextmanager
+                def worker_overlay():
+                    with map_renderer.open(args.map_style) as worker_renderer:
+                        yield Overlay(framemeta=frame_meta, create_widgets=layout_creator_for(worker_renderer),
+                                      damage_tracking=args.damage_tracking)
+
+                def buffer_for(writer):
+                    if args.double_buffer:
+                        log("*** NOTE: Double Buffer mode is experimental. It is believed to work fine on "
+                            "Linux. Please raise issues if you see it working or not-working. Thanks ***")
+                        return RingBuffer(dimensions, args.bg, writer, slots=args.buffer_slots)
+                    elif args.threaded_buffer:
+                        buffer = ThreadedBuffer(dimensions, args.bg, writer, slots=args.buffer_slots,
+                                                pipe_size=args.pipe_size)
+                        frame_timers.extend(buffer.timers())
+                        return buffer
+                    else:
+                        return InPlaceBuffer(dimensions, args.bg, writer, pipe_size=args.pipe_size)
+
+                # each segment is rendered in its own process, into its own file, from the keyframe it starts at
+                def render_segment(index, start, end):
+                    part = segment_path(output, index)
+                    part.unlink(missing_ok=True)
+                    part_redirect = None if args.show_ffmpeg else temp_file_name(suffix=".txt")
+                    part_ffmpeg = overlay_video_for(part, InProcessExecution(redirect=part_redirect),
+                                                    start=start, duration=end - start)
+                    part_stepper = frame_meta.stepper(
+                        stepper_step, start=start * timelapse_correction, end=end * timelapse_correction
+                    )
+                    log(f"Segment {index}: {start.millis() / 1000:.1f}s -> {end.millis() / 1000:.1f}s, "
+                        f"{len(part_stepper)} frames. FFMPEG Output is in {part_redirect}")
 
-                layout_creator = create_desired_layout(
-                    layout=args.layout,
-                    layout_xml=args.layout_xml,
-                    dimensions=dimensions,
-                    include=args.include,
-                    exclude=args.exclude,
-                    renderer=renderer,
-                    timeseries=frame_meta,
-                    font=font,
-                    privacy_zone=privacy_zone,
-                    profiler=profiler,
-                    converters=unit_converters
-                )
+                    with worker_overlay() as segment_overlay:
+                        with part_ffmpeg.generate() as writer:
+                            with buffer_for(writer) as buffer:
+                                for dt in part_stepper.steps():
+                                    draw_timer.time(lambda: buffer.draw(lambda frame: segment_overlay.draw(dt, frame)))
 
-                overlay = Overlay(framemeta=frame_meta, create_widgets=layout_creator)
+                    for t in frame_timers:
+                        log(f"Segment {index}: {t}")
 
                 try:
-                    progress.start(len(stepper))
-                    with ffmpeg.generate() as writer:
-
-                        if args.double_buffer:
-                            log("*** NOTE: Double Buffer mode is experimental. It is believed to work fine on Linux. "
-                                "Please raise issues if you see it working or not-working. Thanks ***")
-                            buffer = DoubleBuffer(dimensions, args.bg, writer)
-                        else:
-                            buffer = SingleBuffer(dimensions, args.bg, writer)
-
-                        with buffer:
-                            for index, dt in enumerate(stepper.steps()):
-                                progress.update(index)
-                                draw_timer.time(lambda: buffer.draw(lambda frame: overlay.draw(dt, frame)))
-
-                    log("Finished drawing frames. waiting for ffmpeg to catch up")
-                    progress.complete()
+                    if segmented:
+                        log(f"*** NOTE: Rendering in {args.segments} segments. This is experimental, and only "
+                            f"believed to work on Linux ***")
+                        if profiler:
+                            log("Widget profiling only covers the main process, not the segments")
+
+                        video_stream = ffmpeg_gopro.find_recording(inputpath).video.stream
+                        keyframes = ffmpeg_gopro.find_keyframes(inputpath, video_stream)
+                        ranges = [
+                            (render_start + start, render_start + end) for start, end in segment_ranges(
+                                render_end - render_start, [k - render_start for k in keyframes], args.segments
+                            )
+                        ]
+                        if len(ranges) < args.segments:
+                            log(f"Only enough keyframes for {len(ranges)} segments")
+
+                        parts = [segment_path(output, index) for index in range(len(ranges))]
+                        try:
+                            SegmentedRender(ranges, render_segment).run()
+                            log("Joining segments")
+                            ffmpeg_gopro.join_files(parts, output)
+                        finally:
+                            for part in parts:
+                                part.unlink(missing_ok=True)
+                    else:
+                        progress.start(len(stepper))
+                        with ffmpeg.generate() as writer:
+
+                            if args.render_workers > 1:
+                                log(f"*** NOTE: Using {args.render_workers} render workers. This is experimental, "
+                                    f"and only believed to work on Linux ***")
+                                if profiler:
+                                    log("Widget profiling only covers the main process, not the render workers")
+                                with ShardedRenderer(dimensions, args.bg, writer,
+                                                     workers=args.render_workers) as sharded:
+                                    draw_timer.time(lambda: sharded.render(stepper, worker_overlay, progress))
+                            else:
+                                overlay = Overlay(framemeta=frame_meta, create_widgets=layout_creator_for(renderer),
+                                                  damage_tracking=args.damage_tracking)
+                                with buffer_for(writer) as buffer:
+                                    for index, dt in enumerate(stepper.steps()):
+                                        progress.update(index)
+                                        draw_timer.time(lambda: buffer.draw(lambda frame: overlay.draw(dt, frame)))
+
+                        log("Finished drawing frames. waiting for ffmpeg to catch up")
+                        progress.complete()
 
                 finally:
-                    for t in [draw_timer]:
+                    for t in frame_timers:
                         log(t)
 
                     if profiler:
@@ -6,7 +6,6 @@ import pathlib
 from gopro_overlay.assertion import assert_file_exists
 from gopro_overlay.ffmpeg import FFMPEG
 from gopro_overlay.ffmpeg_gopro import FFMPEGGoPro
-from gopro_overlay.gpmf.gpmf import GPMD
 from gopro_overlay.gpmf.visitors.debug import DebuggingVisitor
 from gopro_overlay.log import log
 
@@ -26,4 +25,4 @@ if __name__ == "__main__":
 
     log(f"Stream Info: {recording}")
 
-    GPMD.parse(recording.load_data()).accept(DebuggingVisitor())
+    recording.load_gpmd(visitors=[DebuggingVisitor()])
@@ -9,7 +9,6 @@ from typing import List
 from gopro_overlay import functional, filenaming, geocode
 from gopro_overlay.ffmpeg import FFMPEG
 from gopro_overlay.ffmpeg_gopro import FFMPEGGoPro
-from gopro_overlay.gpmf.gpmf import GPMD
 from gopro_overlay.gpmf.visitors.gps import DetermineFirstLockedGPSUVisitor
 from gopro_overlay.log import log
 
@@ -59,7 +58,7 @@ if __name__ == "__main__":
 
     for file in file_list:
         recording = ffmpeg_gopro.find_recording(file)
-        gpmd = GPMD.parse(recording.load_data())
+        gpmd = recording.load_gpmd(streams={"GPS5", "GPS9"})
         found = gpmd.accept(DetermineFirstLockedGPSUVisitor())
         gps_datetime = found.packet_time
         if gps_datetime is None:
@@ -8,6 +8,7 @@ from gopro_overlay.framemeta_gpmd import LoadFlag
 from gopro_overlay.framemeta_gpx import MergeMode
 from gopro_overlay.log import fatal
 from gopro_overlay.point import Point, BoundingBox
+from gopro_overlay.timeunits import timeunits
 
 
 class SplitArgs(argparse.Action):
@@ -38,6 +39,17 @@ class ColourArgs(argparse.Action):
         setattr(namespace, self.dest, colour)
 
 
+class TimeArgs(argparse.Action):
+    def __call__(self, parser, namespace, values, option_string=None):
+        parts = values.split(":")
+        if len(parts) > 3:
+            raise ValueError("Time requires [[HH:]MM:]SS[.sss]")
+        seconds = 0.0
+        for part in parts:
+            seconds = seconds * 60 + float(part)
+        setattr(namespace, self.dest, timeunits(seconds=seconds))
+
+
 class EnumNameAction(argparse.Action):
     """
     Argparse action for handling Enums
@@ -91,6 +103,11 @@ def gopro_dashboard_arguments(args=None):
 
     parser.add_argument("--generate", choices=["default", "overlay", "none"], default="default",
                         help="Type of output to generate")
+    parser.add_argument("--start", action=TimeArgs,
+                        help="[[HH:]MM:]SS[.sss] Only render the video from this time. Data before this isn't processed, "
+                             "so cumulative values like odometer start from here")
+    parser.add_argument("--end", action=TimeArgs,
+                        help="[[HH:]MM:]SS[.sss] Only render the video up to this time")
     parser.add_argument("--overlay-size",
                         help="<XxY> e.g. 1920x1080 Force size of overlay. "
                              "Use if video differs from supported bundled overlay sizes (1920x1080, 3840x2160), Required if --use-gpx-only")
@@ -107,11 +124,29 @@ def gopro_dashboard_arguments(args=None):
                         help="Use ffmpeg options profile <name> from ~/gopro-graphics/ffmpeg-profiles.json")
     render.add_argument("--double-buffer", action="store_true",
                         help="Enable HIGHLY EXPERIMENTAL double buffering mode. May speed things up. May not work at all")
+    render.add_argument("--threaded-buffer", action="store_true",
+                        help="EXPERIMENTAL - Write frames to ffmpeg from a separate thread, while the next frame is drawn. Should work on any platform")
+    render.add_argument("--buffer-slots", type=int, default=4,
+                        help="Number of frames that can be waiting for ffmpeg when using --double-buffer or --threaded-buffer")
+    render.add_argument("--pipe-size", type=int,
+                        help="Try to set the size of the pipe to ffmpeg, in bytes. Linux only. Max is usually in /proc/sys/fs/pipe-max-size")
+    render.add_argument("--render-workers", type=int, default=1,
+                        help="EXPERIMENTAL - Number of processes used to draw frames. Frames are still sent to ffmpeg in order. Linux only")
+    render.add_argument("--segments", type=int, default=1,
+                        help="EXPERIMENTAL - Split the video into this many parts, at keyframes, render and encode each in its own process, then join them. Linux only")
+    render.add_argument("--damage-tracking", action="store_true",
+                        help="EXPERIMENTAL - Only redraw the parts of the frame where widgets have changed")
+    render.add_argument("--skip-duplicate-frames", action="store_true",
+                        help="EXPERIMENTAL - Only send frames to ffmpeg when they change, with timestamps, using the NUT container")
+    render.add_argument("--crop-overlay", action="store_true",
+                        help="EXPERIMENTAL - Only send the parts of the frame that the layout draws into to ffmpeg")
     render.add_argument("--ffmpeg-dir", type=pathlib.Path,
                         help="Directory where ffmpeg/ffprobe located, default=Look in PATH")
 
     loading = parser.add_argument_group("Loading", "Loading data from GoPro")
     loading.add_argument("--load", nargs="+", type=LoadFlag, action=EnumNameAction, default=set())
+    loading.add_argument("--columnar", action="store_true",
+                         help="EXPERIMENTAL - Store the loaded data as an array per metric, rather than an object per point. Uses much less memory for long videos")
 
     gpx = parser.add_argument_group("GPX", "Using GPX & Fit Files")
 
@@ -164,6 +199,8 @@ def gopro_dashboard_arguments(args=None):
     gps.add_argument("--gps-speed-max-units", default="kph", help="Units for --gps-speed-max")
     gps.add_argument("--gps-bbox-lon-lat", action=BBoxArgs,
                      help="Define GPS Bounding Box, anything outside will be considered 'Not Locked' - minlon,minlat,maxlon,maxlat")
+    gps.add_argument("--geodesy", choices=["ellipsoid", "haversine"], default="ellipsoid",
+                     help="How distances between points are worked out. haversine is quicker, but only within about 0.5%%")
 
     debugging = parser.add_argument_group("Debugging", "Controlling debugging outputs")
 
@@ -188,6 +225,36 @@ def gopro_dashboard_arguments(args=None):
     if args.use_gpx_only and not args.input and not args.overlay_size:
         quit("--overlay-size is required with --use-gpx-only (when no input video is given)")
 
+    if args.start is not None and args.end is not None and args.end <= args.start:
+        quit("--end needs to be after --start")
+
+    if args.buffer_slots < 1:
+        quit("--buffer-slots needs to be at least 1")
+
+    if args.render_workers < 1:
+        quit("--render-workers needs to be at least 1")
+
+    if args.render_workers > 1 and args.double_buffer:
+        quit("--render-workers cannot be combined with --double-buffer")
+
+    if args.render_workers > 1 and args.threaded_buffer:
+        quit("--render-workers cannot be combined with --threaded-buffer")
+
+    if args.segments < 1:
+        quit("--segments needs to be at least 1")
+
+    if args.segments > 1 and args.render_workers > 1:
+        quit("--segments cannot be combined with --render-workers")
+
+    if args.segments > 1 and args.double_buffer:
+        quit("--segments cannot be combined with --double-buffer")
+
+    if args.segments > 1 and args.generate != "default":
+        quit("--segments only applies when generating a video")
+
+    if args.double_buffer and args.threaded_buffer:
+        quit("--double-buffer cannot be combined with --threaded-buffer")
+
     if args.use_gpx_only and args.generate != "default":
         quit("--generate cannot be combined with --use-gpx-only")
 
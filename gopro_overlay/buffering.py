@@ -2,13 +2,17 @@ import ctypes
 import io
 import multiprocessing
 import os
+import queue
+import threading
 from io import BufferedWriter
 from multiprocessing.shared_memory import SharedMemory
-from typing import Callable, Any, Tuple
+from typing import Callable, Any, Tuple, Optional
 
 from PIL import Image, ImageDraw
 
 from gopro_overlay.dimensions import Dimension
+from gopro_overlay.log import log
+from gopro_overlay.timing import PoorTimer
 from gopro_overlay.widgets.widgets import SimpleFrameSupplier
 
 
@@ -34,19 +38,6 @@ class SingleBuffer(DrawBuffer):
         pass
 
 
-class SerialisedWriter(io.BufferedWriter):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.lock = multiprocessing.Lock()
-
-    def write(self, __buffer) -> int:
-        with self.lock:
-            try:
-                return super().write(__buffer)
-            finally:
-                super().flush()
-
-
 cond_timeout = 1.0
 
 
@@ -148,53 +139,272 @@ class Frame:
         return True
 
 
-def p_writer(frame: Frame, writer: io.BytesIO):
+class MemoryFrame:
+    """An image that draws directly into the given block of memory"""
+
+    def __init__(self, memory, size: Dimension, background: Tuple):
+        self.memory = memory
+        self.size = size
+        self.background = background
+        self.buffer_size = (size.x * size.y * 4)
+
+        self.image = raw_image(size, self.memory)
+        self.im_draw = ImageDraw.ImageDraw(self.image)
+        self.ctypes_buffer = ctypes.c_char.from_buffer(self.memory)
+
+    def clear(self):
+        ctypes.memset(ctypes.byref(self.ctypes_buffer), 0x00, self.buffer_size)
+        if self.background != (0, 0, 0, 0):
+            self.im_draw.rectangle((0, 0, self.size.x, self.size.y), self.background)
+
+    def close(self):
+        # all references into the memory must go before it can be closed
+        del self.ctypes_buffer
+        del self.im_draw
+        self.image.close()
+        del self.image
+        self.memory.release()
+        self.memory = None
+
+
+def p_ring_writer(shm: SharedMemory, buffer_size: int, slots: int,
+                  free: multiprocessing.Semaphore, drawn: multiprocessing.Semaphore,
+                  total: multiprocessing.RawValue, writer: io.BufferedWriter):
+    memories = [shm.buf[buffer_size * i:buffer_size * (i + 1)] for i in range(slots)]
+    written = 0
     try:
         while True:
-            if not frame.write(writer):
+            drawn.acquire()
+            if written == total.value:
                 break
+            writer.write(memories[written % slots])
+            written += 1
+            free.release()
+        writer.flush()
     except KeyboardInterrupt:
         pass
 
 
-class DoubleBuffer(DrawBuffer):
-    def __init__(self, size: Dimension, background: Tuple, writer: BufferedWriter):
-        shm_name = f"gopro.{os.getpid()}"
-        buffer_size = (size.x * size.y * 4)
-        shm_size = buffer_size * 2
-        self.shm = SharedMemory(create=True, name=shm_name, size=shm_size)
-        self.quit = multiprocessing.Value(ctypes.c_int)
+class RingBuffer(DrawBuffer):
+    """
+    A number of frames in a single shared memory block, drawn in turn, and written in order by a single writer process.
 
-        self.frame0 = Frame(self.shm, self.quit, size, background, 0)
-        self.frame1 = Frame(self.shm, self.quit, size, background, 1)
+    Slots are handed between the two sides with a pair of semaphores - one counting the free slots, one the drawn
+    ones - so each side blocks until there is something for it to do. The drawing side only waits when all the slots
+    are full, so short stalls in ffmpeg are absorbed.
+    """
 
-        writer = SerialisedWriter(writer)
+    def __init__(self, size: Dimension, background: Tuple, writer: BufferedWriter, slots: int = 4):
+        if slots < 1:
+            raise ValueError("Need at least one slot")
 
-        self.worker1 = multiprocessing.Process(target=p_writer, args=(self.frame0, writer))
-        self.worker1.start()
-        self.worker2 = multiprocessing.Process(target=p_writer, args=(self.frame1, writer))
-        self.worker2.start()
+        self.buffer_size = (size.x * size.y * 4)
+        self.slots = slots
+        self.shm = SharedMemory(create=True, name=f"gopro.ring.{os.getpid()}", size=self.buffer_size * slots)
+
+        self.ring = [
+            MemoryFrame(self.shm.buf[self.buffer_size * i:self.buffer_size * (i + 1)], size, background)
+            for i in range(slots)
+        ]
+
+        self.count = 0
+        self.free = multiprocessing.Semaphore(slots)
+        self.drawn = multiprocessing.Semaphore(0)
+        # how many frames there are, once drawing has finished
+        self.total = multiprocessing.RawValue(ctypes.c_longlong, -1)
+
+        self.worker = multiprocessing.Process(
+            target=p_ring_writer,
+            args=(self.shm, self.buffer_size, slots, self.free, self.drawn, self.total, writer)
+        )
+        self.worker.start()
+
+    def _wait_for_free_slot(self):
+        while not self.free.acquire(timeout=cond_timeout):
+            if not self.worker.is_alive():
+                raise IOError("Frame writer process has exited - ffmpeg failed?")
 
-        self.counter = 0
+    def draw(self, f: Callable[[Image.Image], Any]):
+        self._wait_for_free_slot()
+
+        slot = self.ring[self.count % self.slots]
+        slot.clear()
+        f(slot.image)
+
+        self.count += 1
+        self.drawn.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.total.value = self.count
+            self.drawn.release()
+            self.worker.join()
+        else:
+            self.worker.terminate()
+            self.worker.join(timeout=1.0)
+
+        for slot in self.ring:
+            slot.close()
+        self.ring = []
+
+        self.shm.close()
+        self.shm.unlink()
+
+
+def enlarge_pipe(writer, size: int) -> bool:
+    """Try to make the pipe to ffmpeg bigger, so it can hold more of a frame. Linux only"""
+    try:
+        import fcntl
+        fcntl.fcntl(writer.fileno(), fcntl.F_SETPIPE_SZ, size)
+        return True
+    except (ImportError, AttributeError, OSError, io.UnsupportedOperation) as e:
+        log(f"Unable to set pipe size to {size}: {e}")
+        return False
+
+
+class InPlaceBuffer(DrawBuffer):
+    """
+    Like SingleBuffer, but always draws into the same block of memory, which is written straight to the writer
+    then cleared, so no per-frame image allocations or copies.
+    """
+
+    def __init__(self, size: Dimension, background: Tuple, writer: BufferedWriter, pipe_size: Optional[int] = None):
+        self.writer = writer
+        self.frame = MemoryFrame(memoryview(bytearray(size.x * size.y * 4)), size, background)
+        self.frame.clear()
+
+        if pipe_size is not None:
+            enlarge_pipe(writer, pipe_size)
 
     def draw(self, f: Callable[[Image.Image], Any]):
-        current_frame = self.frame0 if self.counter % 2 == 0 else self.frame1
-        current_frame.draw(lambda image: f(image))
-        self.counter += 1
+        f(self.frame.image)
+        self.writer.write(self.frame.memory)
+        self.frame.clear()
 
     def __enter__(self):
         return self
 
-    def __exit__(self, *args):
-        self.quit.value = 1
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.frame.close()
 
-        self.frame0.__exit__(*args)
-        self.frame1.__exit__(*args)
 
-        self.worker1.join(timeout=1.0)
-        self.worker2.join(timeout=1.0)
+class QueueDepth:
+    """How many drawn frames were waiting to be written, each time another one was drawn"""
 
-        del self.frame0
-        del self.frame1
+    def __init__(self, name):
+        self.name = name
+        self.total = 0
+        self.count = 0
+        self.max = 0
 
-        self.shm.unlink()
+    def record(self, depth: int):
+        self.total += depth
+        self.count += 1
+        self.max = max(self.max, depth)
+
+    @property
+    def avg(self) -> float:
+        return self.total / self.count if self.count > 0 else 0
+
+    def __str__(self):
+        return f"QueueDepth({self.name} - Count: {self.count:,.0f}, Avg: {self.avg:.2f}, Max: {self.max})"
+
+
+class ThreadedBuffer(DrawBuffer):
+    """
+    Frames are drawn into a small pool of images, and handed to a writer thread through a bounded queue.
+
+    Pillow and the pipe write both release the GIL, so drawing and writing overlap, like RingBuffer, but without
+    needing fork or shared memory, so should work anywhere.
+
+    If 'waiting to draw' is high, then ffmpeg is the bottleneck, if 'waiting to write' is high, drawing is.
+    """
+
+    def __init__(self, size: Dimension, background: Tuple, writer: BufferedWriter, slots: int = 4,
+                 pipe_size: Optional[int] = None):
+        if slots < 1:
+            raise ValueError("Need at least one slot")
+
+        if pipe_size is not None:
+            enlarge_pipe(writer, pipe_size)
+
+        self.writer = writer
+        self.frames = [MemoryFrame(memoryview(bytearray(size.x * size.y * 4)), size, background) for _ in range(slots)]
+        for frame in self.frames:
+            frame.clear()
+
+        self.free = queue.Queue()
+        for frame in self.frames:
+            self.free.put(frame)
+        self.drawn = queue.Queue(maxsize=slots)
+
+        self.draw_blocked = PoorTimer("waiting to draw")
+        self.write_blocked = PoorTimer("waiting to write")
+        self.depth = QueueDepth("frames waiting to be written")
+
+        self.failure = None
+        self.thread = threading.Thread(target=self._write_frames, name="frame-writer", daemon=True)
+        self.thread.start()
+
+    def _write_frames(self):
+        try:
+            while True:
+                frame = self.write_blocked.time(self.drawn.get)
+                if frame is None:
+                    break
+                self.writer.write(frame.memory)
+                frame.clear()
+                self.free.put(frame)
+            self.writer.flush()
+        except Exception as e:
+            self.failure = e
+
+    def _check_writer(self):
+        if not self.thread.is_alive():
+            raise IOError(f"Frame writer thread has exited - ffmpeg failed? {self.failure}")
+
+    def _next_free(self) -> MemoryFrame:
+        while True:
+            try:
+                return self.free.get(timeout=cond_timeout)
+            except queue.Empty:
+                self._check_writer()
+
+    def draw(self, f: Callable[[Image.Image], Any]):
+        frame = self.draw_blocked.time(self._next_free)
+        self._check_writer()
+
+        f(frame.image)
+
+        self.depth.record(self.drawn.qsize())
+        self.drawn.put(frame)
+
+    def timers(self):
+        return [self.draw_blocked, self.write_blocked, self.depth]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.thread.is_alive():
+            if exc_type is None:
+                self.drawn.put(None)
+            else:
+                # discard anything not yet written, so the writer sees the end straight away
+                while True:
+                    try:
+                        self.drawn.get_nowait()
+                    except queue.Empty:
+                        break
+                self.drawn.put(None)
+            self.thread.join()
+
+        for frame in self.frames:
+            frame.close()
+        self.frames = []
+
+        if exc_type is None and self.failure is not None:
+            raise IOError("Frame writer thread failed") from self.failure
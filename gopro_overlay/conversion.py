@@ -0,0 +1,101 @@
+"""
+Unit conversions for widgets, which are called for every frame.
+
+Converting a pint Quantity with .to() is slow, as pint works out the conversion each time. Here the factor for each
+source unit is worked out once, on first use, and after that a conversion is a float multiplication. Units with an
+offset, like degC, aren't a simple multiplication, so still go through pint.
+"""
+from typing import Optional, Dict, Any
+
+import pint
+
+from gopro_overlay.units import units
+
+
+class Conversion:
+    """Converts a quantity to some unit. magnitude() gives just the float, avoiding pint in the render path"""
+
+    def magnitude(self, q: pint.Quantity) -> Optional[float]:
+        raise NotImplementedError()
+
+    def __call__(self, q: pint.Quantity) -> Optional[pint.Quantity]:
+        raise NotImplementedError()
+
+
+class NoConversion(Conversion):
+
+    def magnitude(self, q: pint.Quantity) -> Optional[float]:
+        return q.m
+
+    def __call__(self, q: pint.Quantity) -> Optional[pint.Quantity]:
+        return q
+
+
+class UnitConversion(Conversion):
+
+    def __init__(self, unit: str):
+        self.unit_name = unit
+        self._unit = None
+        self._factors: Dict[Any, Optional[float]] = {}
+
+    def unit(self):
+        if self._unit is None:
+            self._unit = units.Unit(self.unit_name)
+        return self._unit
+
+    def _factor(self, source) -> Optional[float]:
+        """The multiplier from source to this unit, or None if it isn't just a multiplication"""
+        try:
+            return self._factors[source]
+        except KeyError:
+            target = self.unit()
+            if source == target:
+                factor = 1
+            elif units.Quantity(0.0, source).to(target).m != 0.0:
+                factor = None
+            else:
+                factor = units.Quantity(1.0, source).to(target).m
+            self._factors[source] = factor
+            return factor
+
+    def magnitude(self, q: pint.Quantity) -> Optional[float]:
+        factor = self._factor(q.units)
+        if factor is None:
+            return q.to(self._unit).m
+        return q.m * factor
+
+    def __call__(self, q: pint.Quantity) -> Optional[pint.Quantity]:
+        factor = self._factor(q.units)
+        if factor is None:
+            return q.to(self._unit)
+        return units.Quantity(q.m * factor, self._unit)
+
+
+class PaceConversion(Conversion):
+    """Pace is time per distance, the reciprocal of speed. Stopped, or nearly, has no pace"""
+
+    def __init__(self, unit: str):
+        self.unit_name = unit
+        self._unit = None
+        self._factors: Dict[Any, float] = {}
+
+    def _factor(self, source) -> float:
+        try:
+            return self._factors[source]
+        except KeyError:
+            if self._unit is None:
+                self._unit = units.Unit(self.unit_name)
+            factor = (1 / units.Quantity(1.0, source)).to(self._unit).m
+            self._factors[source] = factor
+            return factor
+
+    def magnitude(self, q: pint.Quantity) -> Optional[float]:
+        if q is None or q.m < 0.0000001:
+            return None
+        return (1 / q.m) * self._factor(q.units)
+
+    def __call__(self, q: pint.Quantity) -> Optional[pint.Quantity]:
+        m = self.magnitude(q)
+        if m is None:
+            return None
+        return units.Quantity(m, self._unit)
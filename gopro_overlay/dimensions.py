@@ -1,3 +1,4 @@
+import math
 from dataclasses import dataclass
 
 
@@ -20,3 +21,33 @@ def dimension_from(s):
     if len(components) != 2:
         raise ValueError("dimension should be in format XxY")
     return Dimension(x=components[0], y=components[1])
+
+
+@dataclass(frozen=True)
+class Box:
+    """A rectangle of pixels, x0,y0 inclusive, x1,y1 exclusive - same as PIL boxes"""
+    x0: int
+    y0: int
+    x1: int
+    y1: int
+
+    def tuple(self):
+        return self.x0, self.y0, self.x1, self.y1
+
+    def empty(self) -> bool:
+        return self.x1 <= self.x0 or self.y1 <= self.y0
+
+    def translate(self, x, y) -> 'Box':
+        return Box(self.x0 + x, self.y0 + y, self.x1 + x, self.y1 + y)
+
+    def union(self, other: 'Box') -> 'Box':
+        return Box(min(self.x0, other.x0), min(self.y0, other.y0), max(self.x1, other.x1), max(self.y1, other.y1))
+
+    def intersects(self, other: 'Box') -> bool:
+        return self.x0 < other.x1 and other.x0 < self.x1 and self.y0 < other.y1 and other.y0 < self.y1
+
+    def clip(self, size: Dimension) -> 'Box':
+        return Box(
+            max(0, math.floor(self.x0)), max(0, math.floor(self.y0)),
+            min(size.x, math.ceil(self.x1)), min(size.y, math.ceil(self.y1))
+        )
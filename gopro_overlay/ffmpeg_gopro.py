@@ -5,15 +5,20 @@ import itertools
 import json
 import os
 import pathlib
+import struct
 import subprocess
 from array import array
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional, List, Sequence, Set
 
+from gopro_overlay import mp4
 from gopro_overlay.common import temporary_file
 from gopro_overlay.dimensions import Dimension
 from gopro_overlay.ffmpeg import FFMPEG
+from gopro_overlay.gpmf.gpmf import GPMD, GPMDStreamParser
+from gopro_overlay.log import log
+from gopro_overlay.mp4 import Mp4Track
 from gopro_overlay.progresstrack import ProgressBarProgress
 from gopro_overlay.timeunits import timeunits, Timeunit
 
@@ -66,6 +71,22 @@ class FFMPEGGoPro:
 
         return duration
 
+    def find_keyframes(self, filepath: Path, video_stream_number: int) -> List[Timeunit]:
+        ffprobe_output = str(self.exe.ffprobe().invoke(
+            ["-hide_banner",
+             "-print_format", "json",
+             "-select_streams", str(video_stream_number),
+             "-show_entries", "packet=pts_time,flags",
+             filepath]
+        ).stdout)
+
+        packets = json.loads(ffprobe_output)["packets"]
+
+        return sorted(
+            timeunits(seconds=float(packet["pts_time"]))
+            for packet in packets if "K" in packet.get("flags", "") and "pts_time" in packet
+        )
+
     def find_recording(self, filepath: Path, stat=os.stat) -> GoproRecording:
         ffprobe_output = str(self.exe.ffprobe().invoke(
             [
@@ -115,15 +136,30 @@ class FFMPEGGoPro:
 
         data = only_if_present("metadata stream", streams, data_selector)
 
+        data_track = None
         if data:
             data_stream_number = int(data["index"])
 
-            data_stream = DataStream(
-                stream=data_stream_number,
-                frame_count=int(data["nb_frames"]),
-                timebase=int(data["time_base"].split("/")[1]),
-                frame_duration=self.find_frame_duration(filepath, data_stream_number)
-            )
+            try:
+                data_track = mp4.find_track(filepath, "gpmd")
+            except (IOError, struct.error) as e:
+                log(f"Unable to read GoPro data track from {filepath} directly, will use ffmpeg: {e}")
+
+            if data_track is not None and len(data_track) > 0:
+                data_stream = DataStream(
+                    stream=data_stream_number,
+                    frame_count=len(data_track),
+                    timebase=data_track.timescale,
+                    frame_duration=data_track.durations[0]
+                )
+            else:
+                data_track = None
+                data_stream = DataStream(
+                    stream=data_stream_number,
+                    frame_count=int(data["nb_frames"]),
+                    timebase=int(data["time_base"].split("/")[1]),
+                    frame_duration=self.find_frame_duration(filepath, data_stream_number)
+                )
         else:
             data_stream = None
 
@@ -133,7 +169,8 @@ class FFMPEGGoPro:
             file=filestat(filepath, stat=stat),
             audio=audio_stream,
             video=video_stream,
-            data=data_stream
+            data=data_stream,
+            data_track=data_track
         )
 
     def load_frame(self, filepath: Path, at_time: Timeunit) -> Optional[bytes]:
@@ -201,35 +238,90 @@ class GoproRecording:
     audio: Optional[AudioStream]
     video: VideoStream
     data: Optional[DataStream]
+    # where the data track's samples are in the file, if it could be read, so they can be read without ffmpeg
+    data_track: Optional[Mp4Track] = None
+
+    def _read_data(self, update: Callable[[bytes], None]):
+        for sample in mp4.read_samples(self.location, self.data_track):
+            update(sample)
+
+    def _ffmpeg_data(self, update: Callable[[bytes], None]):
+        track = self.data.stream
+        cmd = [
+            "-hide_banner",
+            '-y',
+            '-i', self.location,
+            '-codec', 'copy',
+            '-map', '0:%d' % track,
+            '-f', 'rawvideo',
+            "-"
+        ]
+
+        result = self.ffmpeg.stream(cmd, cb=update, timeout=datetime.timedelta(seconds=45))
+        if result != 0:
+            raise IOError(f"ffmpeg failed code: {result}")
+
+    def _stream_data(self, cb: Callable[[bytes], None]):
+        progress = ProgressBarProgress("Loading GoPro Data Track", transfer=True, delta=True)
+        progress.start()
+        try:
+            delivered = 0
+
+            def update(b: bytes):
+                nonlocal delivered
+                delivered += len(b)
+                progress.update(len(b))
+                cb(b)
+
+            if self.data_track is not None:
+                try:
+                    self._read_data(update)
+                    return
+                except IOError as e:
+                    log(f"Unable to read data track from {self.location} ({e}), using ffmpeg instead")
+
+            # ffmpeg gives the same bytes from the start, so skip any that have been passed on already
+            skip = delivered
+
+            def update_after_skip(b: bytes):
+                nonlocal skip
+                if skip >= len(b):
+                    skip -= len(b)
+                    return
+                b, skip = b[skip:], 0
+                update(b)
+
+            self._ffmpeg_data(update_after_skip)
+        finally:
+            progress.complete()
 
     def load_data(self) -> bytes:
         track = self.data.stream
         if track:
-            cmd = [
-                "-hide_banner",
-                '-y',
-                '-i', self.location,
-                '-codec', 'copy',
-                '-map', '0:%d' % track,
-                '-f', 'rawvideo',
-                "-"
-            ]
-
-            progress = ProgressBarProgress("Loading GoPro Data Track", transfer=True, delta=True)
-            progress.start()
-            try:
-                arr = bytearray()
-
-                def update(b: bytes):
-                    progress.update(len(b))
-                    arr.extend(b)
-
-                result = self.ffmpeg.stream(cmd, cb=update, timeout=datetime.timedelta(seconds=45))
-                if result != 0:
-                    raise IOError(f"ffmpeg failed code: {result}")
-                return bytes(arr)
-            finally:
-                progress.complete()
+            arr = bytearray()
+            self._stream_data(arr.extend)
+            return bytes(arr)
+
+    def load_gpmd(self, visitors: Sequence = (), streams: Optional[Set[str]] = None) -> GPMD:
+        """
+        Parse the data track as it is read, straight from the file if its sample table was found, otherwise (or if
+        the file can't be read that way) from ffmpeg, rather than reading all of it first. Each visitor is shown
+        each top level item as soon as it has been parsed. If streams are given, only those are kept, as
+        GPMD.parse_lazy does.
+        """
+        parser = GPMDStreamParser(streams)
+        items = []
+
+        def parsed(new_items):
+            for item in new_items:
+                for visitor in visitors:
+                    item.accept(visitor)
+            items.extend(new_items)
+
+        if self.data.stream:
+            self._stream_data(lambda b: parsed(parser.feed(b)))
+        parsed(parser.close())
+        return GPMD(items)
 
 
 @dataclass(frozen=True)
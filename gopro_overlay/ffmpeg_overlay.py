@@ -3,11 +3,32 @@ from __future__ import annotations
 import contextlib
 import datetime
 from pathlib import Path
+from typing import List, Optional
 
-from gopro_overlay.dimensions import Dimension
+from gopro_overlay.dimensions import Dimension, Box
 from gopro_overlay.execution import InProcessExecution
 from gopro_overlay.ffmpeg import FFMPEG
 from gopro_overlay.functional import flatten
+from gopro_overlay.log import log
+from gopro_overlay.nut import NUTMuxer, DeduplicatingWriter
+from gopro_overlay.timeunits import Timeunit
+
+default_filter_complex = "[0:v][1:v]overlay"
+
+# overlay frames are drawn every 0.1s of video
+frame_duration_millis = 100
+
+
+def overlay_input(size: Dimension, skip_duplicates: bool):
+    if skip_duplicates:
+        return ["-f", "nut", "-i", "-"]
+    return [
+        "-f", "rawvideo",
+        "-framerate", "10.0",
+        "-s", f"{size.x}x{size.y}",
+        "-pix_fmt", "rgba",
+        "-i", "-",
+    ]
 
 
 class FFMPEGOptions:
@@ -15,7 +36,7 @@ class FFMPEGOptions:
     def __init__(self, input=None, output=None, filter_spec=None):
         self.input = input if input is not None else []
         self.output = output if output is not None else ["-vcodec", "libx264", "-preset", "veryfast"]
-        self.filter_complex = filter_spec if filter_spec is not None else "[0:v][1:v]overlay"
+        self.filter_complex = filter_spec if filter_spec is not None else default_filter_complex
         self.general = ["-hide_banner", "-loglevel", "info"]
 
     def set_input_options(self, options):
@@ -25,6 +46,102 @@ class FFMPEGOptions:
         self.output = options
 
 
+class OverlayRegions:
+    """
+    Only the parts of the overlay frame that widgets draw into, stacked one above another into a single, smaller,
+    frame. The overlay filter cuts them apart again and puts each one back where it came from.
+    """
+
+    def __init__(self, size: Dimension, regions: List[Box]):
+        if not regions:
+            raise ValueError("Need at least one region")
+        self.size = size
+        self.regions = regions
+        self.packed_size = Dimension(
+            max(r.x1 - r.x0 for r in regions),
+            sum(r.y1 - r.y0 for r in regions)
+        )
+
+        stride = size.x * 4
+        self.rows = []
+        for r in regions:
+            width = (r.x1 - r.x0) * 4
+            padding = bytes((self.packed_size.x - (r.x1 - r.x0)) * 4)
+            for y in range(r.y0, r.y1):
+                start = y * stride + r.x0 * 4
+                self.rows.append((start, start + width, padding))
+
+    def pack(self, frame) -> bytes:
+        memory = memoryview(frame)
+        try:
+            parts = []
+            for start, end, padding in self.rows:
+                parts.append(memory[start:end])
+                if padding:
+                    parts.append(padding)
+            return b"".join(parts)
+        finally:
+            memory.release()
+
+    def filter_spec(self) -> str:
+        filters = []
+
+        if len(self.regions) == 1:
+            sources = ["[1:v]"]
+        else:
+            sources = [f"[s{i}]" for i in range(len(self.regions))]
+            filters.append(f"[1:v]split={len(self.regions)}{''.join(sources)}")
+
+        y = 0
+        for i, (source, r) in enumerate(zip(sources, self.regions)):
+            filters.append(f"{source}crop={r.x1 - r.x0}:{r.y1 - r.y0}:0:{y}[r{i}]")
+            y += r.y1 - r.y0
+
+        under = "[0:v]"
+        for i, r in enumerate(self.regions):
+            result = f"[o{i}]" if i < len(self.regions) - 1 else ""
+            filters.append(f"{under}[r{i}]overlay=x={r.x0}:y={r.y0}{result}")
+            under = result
+
+        return ";".join(filters)
+
+
+class RegionWriter:
+    """Takes whole overlay frames, and writes only the packed regions"""
+
+    def __init__(self, writer, regions: OverlayRegions):
+        self.writer = writer
+        self.regions = regions
+
+    def write(self, frame):
+        self.writer.write(self.regions.pack(frame))
+
+    def flush(self):
+        self.writer.flush()
+
+    def fileno(self):
+        return self.writer.fileno()
+
+
+@contextlib.contextmanager
+def overlay_writer(exe: FFMPEG, execution, cmd, size: Dimension, skip_duplicates: bool,
+                   regions: Optional[OverlayRegions] = None):
+    if not skip_duplicates and not regions:
+        yield from exe.execute(execution, cmd)
+        return
+
+    with contextlib.contextmanager(exe.execute)(execution, cmd) as writer:
+        deduplicating = None
+        if skip_duplicates:
+            writer = deduplicating = DeduplicatingWriter(NUTMuxer(writer, size), frame_duration=frame_duration_millis)
+        if regions:
+            writer = RegionWriter(writer, regions)
+        yield writer
+        writer.flush()
+        if deduplicating and deduplicating.frames:
+            log(f"Skipped {deduplicating.skipped} duplicate frames of {deduplicating.frames}")
+
+
 class FFMPEGNull:
 
     def __init__(self):
@@ -44,11 +161,13 @@ class FFMPEGOverlay:
             overlay_size: Dimension,
             options: FFMPEGOptions = None,
             execution=None,
-            creation_time: datetime.datetime = None
+            creation_time: datetime.datetime = None,
+            skip_duplicates: bool = False
     ):
         self.exe = ffmpeg
         self.output = output
         self.overlay_size = overlay_size
+        self.skip_duplicates = skip_duplicates
         self.creation_time = creation_time if creation_time else datetime.datetime.now()
         self.execution = execution if execution else InProcessExecution()
         self.options = options if options else FFMPEGOptions()
@@ -59,18 +178,15 @@ class FFMPEGOverlay:
             "-hide_banner",
             "-y",
             self.options.general,
-            "-f", "rawvideo",
-            "-framerate", "10.0",
-            "-s", f"{self.overlay_size.x}x{self.overlay_size.y}",
-            "-pix_fmt", "rgba",
-            "-i", "-",
+            overlay_input(self.overlay_size, self.skip_duplicates),
             "-r", "30",
             self.options.output,
             "-metadata", f"creation_time={self.creation_time.isoformat()}",
             str(self.output)
         ])
 
-        yield from self.exe.execute(self.execution, cmd)
+        with overlay_writer(self.exe, self.execution, cmd, self.overlay_size, self.skip_duplicates) as writer:
+            yield writer
 
 
 class FFMPEGOverlayVideo:
@@ -83,11 +199,19 @@ class FFMPEGOverlayVideo:
             overlay_size: Dimension,
             options: FFMPEGOptions = None,
             execution=None,
-            creation_time: datetime.datetime = None
+            creation_time: datetime.datetime = None,
+            regions: Optional[OverlayRegions] = None,
+            skip_duplicates: bool = False,
+            start: Optional[Timeunit] = None,
+            duration: Optional[Timeunit] = None
     ):
         self.exe = ffmpeg
         self.output = output
         self.input = input
+        self.regions = regions
+        self.skip_duplicates = skip_duplicates
+        self.start = start
+        self.duration = duration
         self.options = options if options else FFMPEGOptions()
         self.overlay_size = overlay_size
         self.creation_time = creation_time if creation_time else datetime.datetime.now()
@@ -95,23 +219,26 @@ class FFMPEGOverlayVideo:
 
     @contextlib.contextmanager
     def generate(self):
+        if self.regions:
+            size = self.regions.packed_size
+            filter_complex = self.regions.filter_spec()
+        else:
+            size = self.overlay_size
+            filter_complex = self.options.filter_complex
+
         cmd = flatten([
             "-y",
             self.options.general,
             self.options.input,
+            ["-ss", str(self.start.millis() / 1000)] if self.start is not None else [],
+            ["-t", str(self.duration.millis() / 1000)] if self.duration is not None else [],
             "-i", str(self.input),
-            "-f", "rawvideo",
-            "-framerate", "10.0",
-            "-s", f"{self.overlay_size.x}x{self.overlay_size.y}",
-            "-pix_fmt", "rgba",
-            "-i", "-",
-            "-filter_complex", self.options.filter_complex,
+            overlay_input(size, self.skip_duplicates),
+            "-filter_complex", filter_complex,
             self.options.output,
             "-metadata", f"creation_time={self.creation_time.isoformat()}",
             str(self.output)
         ])
 
-        yield from self.exe.execute(
-            self.execution,
-            cmd
-        )
+        with overlay_writer(self.exe, self.execution, cmd, size, self.skip_duplicates, self.regions) as writer:
+            yield writer
@@ -1,7 +1,12 @@
 import bisect
+import collections.abc
+import contextlib
 import datetime
+import itertools
+import math
+from array import array
 from datetime import timedelta
-from typing import Callable, List, MutableMapping
+from typing import Any, Callable, Hashable, List, MutableMapping, Optional, Tuple, Sequence
 
 from gopro_overlay.entry import Entry
 from gopro_overlay.log import log
@@ -23,9 +28,135 @@ def find_best_alignment(duration: Timeunit, samples: int):
     return timeunits(millis=align)
 
 
+class ChartSeries:
+    """
+    The values of one metric at every multiple of step within the framemeta, filled in as charts ask for them, so each
+    is worked out once however many windows, or charts, look at it.
+    """
+
+    def __init__(self, ts, key: Callable[[Entry], Any], step: Timeunit):
+        self.ts = ts
+        self.key = key
+        self.step = step
+        self.first = None
+        self.last = None
+        self.values = None
+        self.filled = None
+        self.numeric = True
+        self.cursor = None
+
+    def _allocate(self):
+        step = self.step.us
+        self.first = -(-self.ts.min.us // step)
+        self.last = self.ts.max.us // step
+        size = max(0, self.last - self.first + 1)
+        self.values = array("d", bytes(8 * size))
+        self.filled = bytearray(size)
+        self.cursor = self.ts.cursor()
+
+    def _fill(self, indexes: range):
+        filled = self.filled
+        if filled[indexes.start:indexes.stop:indexes.step].count(0) == 0:
+            return
+
+        cursor = self.cursor
+        step = self.step.us
+        for index in indexes:
+            if filled[index]:
+                continue
+            value = self.key(cursor.get(Timeunit((index + self.first) * step)))
+            if self.numeric and not (value is None or type(value) in (int, float)):
+                # only plain numbers fit in the array - anything else is kept as it is
+                self.values = [None if math.isnan(v) else v for v in self.values]
+                self.numeric = False
+            if value is None:
+                value = math.nan if self.numeric else None
+            self.values[index] = value
+            filled[index] = 1
+
+    def window(self, start: Timeunit, tick: Timeunit, count: int, missing=None) -> 'SeriesView':
+        """count values, tick apart, from start - which must all be multiples of step"""
+        if self.values is None:
+            self._allocate()
+
+        stride = tick.us // self.step.us
+        first = start.us // self.step.us - self.first
+        # the values that are within the framemeta, others are missing
+        lo = min(count, -(first // stride)) if first < 0 else 0
+        hi = max(lo, min(count, (len(self.filled) - 1 - first) // stride + 1))
+        if lo < hi:
+            self._fill(range(first + lo * stride, first + hi * stride, stride))
+
+        return SeriesView(self, first, stride, count, lo, hi, missing)
+
+
+class SeriesView(collections.abc.Sequence):
+    """Values in a window of a ChartSeries, looked up in the series rather than copied out of it"""
+
+    def __init__(self, series: ChartSeries, first: int, stride: int, count: int, lo: int, hi: int, missing):
+        self.series = series
+        self.first = first
+        self.stride = stride
+        self.count = count
+        self.lo = lo
+        self.hi = hi
+        self.missing = missing
+
+    def __len__(self):
+        return self.count
+
+    def _present(self):
+        start = self.first + self.lo * self.stride
+        values = self.series.values
+        if self.series.numeric:
+            values = memoryview(values)
+        return values[start:start + (self.hi - self.lo) * self.stride:self.stride]
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self[i] for i in range(*item.indices(self.count))]
+        if item < 0:
+            item += self.count
+        if not 0 <= item < self.count:
+            raise IndexError("SeriesView index out of range")
+        if item < self.lo or item >= self.hi:
+            return self.missing
+        value = self.series.values[self.first + item * self.stride]
+        if value is None or (self.series.numeric and math.isnan(value)):
+            return self.missing
+        return value
+
+    def __iter__(self):
+        missing = self.missing
+        yield from itertools.repeat(missing, self.lo)
+        if self.series.numeric:
+            isnan = math.isnan
+            for value in self._present():
+                yield missing if isnan(value) else value
+        else:
+            for value in self._present():
+                yield missing if value is None else value
+        yield from itertools.repeat(missing, self.count - self.hi)
+
+
+class ChartData:
+    """Chart series for a framemeta, shared between charts showing the same metric at the same step"""
+
+    def __init__(self, ts):
+        self.ts = ts
+        self.series = {}
+
+    def series_for(self, name: Hashable, key: Callable[[Entry], Any], step: Timeunit) -> ChartSeries:
+        found = self.series.get((name, step.us))
+        if found is None:
+            found = self.series.setdefault((name, step.us), ChartSeries(self.ts, key, step))
+        return found
+
+
 class Window:
 
-    def __init__(self, ts, duration: Timeunit, samples, key=lambda e: 1, missing=None):
+    def __init__(self, ts, duration: Timeunit, samples, key=lambda e: 1, missing=None,
+                 chart_data: Optional[ChartData] = None, name: Optional[Hashable] = None):
         self.ts = ts
         self.duration = duration
         self.samples = samples
@@ -34,9 +165,20 @@ class Window:
         self.key = key
         self.missing = missing
 
+        # the window starts on a multiple of 100ms, less half the duration, so a step that divides all of those lands
+        # on every sample of every window
+        half = duration / 2
+        self.half = half
+        self.count = -(-(2 * half.us) // self.tick.us)
+        step = Timeunit(math.gcd(self.tick.us, timeunits(millis=100).us, half.us))
+
+        if chart_data is None or name is None:
+            self.series = ChartSeries(ts, key, step)
+        else:
+            self.series = chart_data.series_for(name, key, step)
+
         self.last_time = None
         self.last_view = None
-        self.cache = {}
         self.version = 0
 
     def view(self, at: Timeunit):
@@ -50,25 +192,7 @@ class Window:
 
         at = at.align(timeunits(millis=100))
 
-        start = at - self.duration / 2
-        end = at + self.duration / 2
-
-        current = start
-
-        data = []
-
-        while current < end:
-            if current < self.ts.min or current > self.ts.max:
-                data.append(self.missing)
-            else:
-                entry = self.cache[current] if current in self.cache else self.cache.setdefault(current,
-                                                                                                self.ts.get(current))
-                value = self.key(entry)
-                if value is not None:
-                    data.append(value)
-                else:
-                    data.append(self.missing)
-            current += self.tick
+        data = self.series.window(at - self.half, self.tick, self.count, self.missing)
 
         self.version += 1
         self.last_time = at
@@ -77,23 +201,82 @@ class Window:
         return self.last_view
 
 
+class Cursor:
+    """
+    Finds the entry for a time, like FrameMeta.get, for times that mostly go forwards, as when rendering.
+
+    Moving forward walks on from the last entry found, rather than searching from scratch, so is amortised O(1).
+    """
+
+    def __init__(self, framemeta, time_index: Callable[[], Sequence[int]]):
+        self._framemeta = framemeta
+        self._time_index = time_index
+        self._times = None
+        self._updates = None
+        self._index = -1
+        self._entry = None
+
+    def _refresh(self):
+        self._framemeta.check_modified()
+        self._updates = self._framemeta.updates
+        self._times = self._time_index()
+        self._index = -1
+        self._entry = None
+
+    def get(self, frame_time: Timeunit) -> Entry:
+        if self._framemeta.modified or self._updates != self._framemeta.updates:
+            self._refresh()
+
+        us = frame_time.us
+        times = self._times
+        index = self._index
+
+        if index < 0 or us < times[index]:
+            index = max(0, bisect.bisect_right(times, us) - 1)
+        else:
+            last = len(times) - 1
+            while index < last and times[index + 1] <= us:
+                index += 1
+
+        if index != self._index:
+            self._index = index
+            self._entry = self._framemeta[index]
+
+        return self._entry
+
+
 class Stepper:
+    """Steps through the framemeta from start, up to (but not including) end, or the last frame if no end given"""
 
-    def __init__(self, framemeta: 'FrameMeta', step: Timeunit):
+    def __init__(self, framemeta: 'FrameMeta', step: Timeunit, start: Timeunit = timeunits(millis=0),
+                 end: Optional[Timeunit] = None):
         self._framemeta = framemeta
         self._step = step
+        self._start = start
+        self._end = end
 
     def __len__(self):
-        max_ms = self._framemeta.framelist[-1]
-        steps = int(max_ms / self._step) + 1
+        max_ms = self._framemeta.max
+        if self._start > max_ms:
+            return 0
+        steps = int((max_ms - self._start) / self._step) + 1
+        if self._end is not None:
+            steps = min(steps, max(0, math.ceil((self._end - self._start) / self._step)))
         return steps
 
     def steps(self):
-        end = self._framemeta.framelist[-1]
-        running = timeunits(millis=0)
-        while running <= end:
-            yield running
-            running += self._step
+        for i in range(len(self)):
+            yield self._start + self._step * i
+
+    def shard(self, index: int, workers: int) -> 'Stepper':
+        """Every workers-th step, starting at step index, so workers shards between them cover every step once"""
+        return Stepper(self._framemeta, self._step * workers, self._start + self._step * index, self._end)
+
+    def with_entries(self):
+        """Each step, with the entry for it"""
+        cursor = self._framemeta.cursor()
+        for step in self.steps():
+            yield step, cursor.get(step)
 
 
 max_distance = timeunits(seconds=6)
@@ -105,6 +288,8 @@ class FrameMeta:
         self.pps = packets_per_second
         self.framelist: List[Timeunit] = []
         self.frames: MutableMapping[Timeunit, Entry] = {}
+        self.updates = 0
+        self.processing: Optional[Tuple[Timeunit, Timeunit]] = None
 
     def __len__(self):
         self.check_modified()
@@ -116,9 +301,12 @@ class FrameMeta:
     def packets_per_second(self):
         return self.pps
 
-    def stepper(self, step: Timeunit):
+    def stepper(self, step: Timeunit, start: Timeunit = timeunits(millis=0), end: Optional[Timeunit] = None):
         self.check_modified()
-        return Stepper(self, step)
+        return Stepper(self, step, start=start, end=end)
+
+    def cursor(self) -> Cursor:
+        return Cursor(self, lambda: [t.us for t in self.framelist])
 
     def add(self, at_time: Timeunit, entry):
         self.frames[at_time] = entry
@@ -149,6 +337,7 @@ class FrameMeta:
     def _update(self):
         self.framelist = sorted(list(self.frames.keys()))
         self.modified = False
+        self.updates += 1
 
     def check_modified(self):
         if self.modified:
@@ -199,9 +388,27 @@ class FrameMeta:
 
                 yield entry
 
-    def process_deltas(self, processor, skip=1, filter_fn: Callable[[Entry], bool] = lambda e: True):
+    @contextlib.contextmanager
+    def processing_within(self, start: Optional[Timeunit] = None, end: Optional[Timeunit] = None):
+        """While in this context, only process entries from start to end (inclusive) - others are left as they were"""
+        self.processing = (start, end)
+        try:
+            yield self
+        finally:
+            self.processing = None
+
+    def _processing_list(self) -> List[Timeunit]:
         self.check_modified()
-        diffs = list(zip(self.framelist, self.framelist[skip:]))
+        if self.processing is None:
+            return self.framelist
+        start, end = self.processing
+        lo = bisect.bisect_left(self.framelist, start) if start is not None else 0
+        hi = bisect.bisect_right(self.framelist, end) if end is not None else len(self.framelist)
+        return self.framelist[lo:hi]
+
+    def process_deltas(self, processor, skip=1, filter_fn: Callable[[Entry], bool] = lambda e: True):
+        framelist = self._processing_list()
+        diffs = list(zip(framelist, framelist[skip:]))
 
         for a, b in diffs:
             entry_a = self.frames[a]
@@ -211,9 +418,22 @@ class FrameMeta:
                 if updates:
                     entry_a.update(**updates)
 
+    def process_deltas_batch(self, processor, skip=1, filter_fn: Callable[[Entry], bool] = lambda e: True):
+        """As process_deltas, but processor is given all the (a, b) pairs at once, and returns the updates for each a"""
+        framelist = self._processing_list()
+        pairs = [
+            (entry_a, entry_b) for entry_a, entry_b in
+            ((self.frames[a], self.frames[b]) for a, b in zip(framelist, framelist[skip:]))
+            if filter_fn(entry_a) and filter_fn(entry_b)
+        ]
+
+        for (entry_a, _), updates in zip(pairs, processor(pairs, skip)):
+            if updates:
+                entry_a.update(**updates)
+
     def process_accel(self, processor, skip=1, filter_fn: Callable[[Entry], bool] = lambda e: True):
-        self.check_modified()
-        diffs = list(zip(self.framelist, self.framelist[skip:]))
+        framelist = self._processing_list()
+        diffs = list(zip(framelist, framelist[skip:]))
 
         for a, b in diffs:
             entry_a = self.frames[a]
@@ -224,14 +444,24 @@ class FrameMeta:
                     entry_b.update(**updates)
     
     def process(self, processor, filter_fn: Callable[[Entry], bool] = lambda e: True):
-        self.check_modified()
-        for pts in self.framelist:
+        for pts in self._processing_list():
             entry = self.frames[pts]
             if filter_fn(entry):
                 updates = processor(entry)
                 if updates:
                     entry.update(**updates)
 
+    def process_batch(self, processor, filter_fn: Callable[[Entry], bool] = lambda e: True):
+        """As process, but processor is given all the entries at once, and returns the updates for each"""
+        entries = [e for e in (self.frames[pts] for pts in self._processing_list()) if filter_fn(e)]
+
+        for entry, updates in zip(entries, processor(entries)):
+            if updates:
+                entry.update(**updates)
+
+    def process_pipeline(self, pipeline):
+        pipeline.run(self.frames[pts] for pts in self._processing_list())
+
     def duration(self):
         self.check_modified()
         return self.framelist[-1]
@@ -0,0 +1,511 @@
+"""
+A FrameMeta that stores each metric as a typed array (a "column"), rather than as a dict of objects per entry.
+
+An hour of GPS9 is hundreds of thousands of Entry, dict and Quantity objects. Here each metric is one or more
+array('d') sharing an int64 microsecond time index, with the unit of the metric held once per column. Widgets and
+processors still see Entry objects, which are lightweight views onto a row.
+"""
+import bisect
+import contextlib
+import datetime
+import math
+from array import array
+from itertools import repeat
+from typing import Dict, List, Optional, Callable, Any
+
+from pint import DimensionalityError
+
+from gopro_overlay.entry import Entry
+from gopro_overlay.framemeta import Stepper, Cursor
+from gopro_overlay.log import log
+from gopro_overlay.point import Point, PintPoint3
+from gopro_overlay.timeunits import Timeunit, timeunits
+
+MISSING = math.nan
+
+utc_epoch = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+naive_epoch = datetime.datetime(1970, 1, 1)
+one_us = datetime.timedelta(microseconds=1)
+
+
+class Column:
+    """A single metric, one value per row. None is stored as missing"""
+
+    unit = None
+
+    def get(self, row: int) -> Any:
+        raise NotImplementedError()
+
+    def set(self, row: int, value) -> bool:
+        """Set the value, returning False if this column can't hold it"""
+        raise NotImplementedError()
+
+    def extend(self, count: int):
+        """Add count missing rows"""
+        raise NotImplementedError()
+
+    def take(self, rows: List[Optional[int]]) -> 'Column':
+        """A new column, with the values from the given rows, or missing where the row is None"""
+        raise NotImplementedError()
+
+    def nbytes(self) -> int:
+        raise NotImplementedError()
+
+
+class ArrayColumn(Column):
+    """Values that are made up of a fixed number of floats, stored as one array per part"""
+
+    def __init__(self, parts: int, length: int = 0):
+        self.arrays = [array("d", repeat(MISSING, length)) for _ in range(parts)]
+
+    def _pack(self, value) -> Optional[tuple]:
+        raise NotImplementedError()
+
+    def _unpack(self, values: tuple):
+        raise NotImplementedError()
+
+    def _empty(self) -> 'ArrayColumn':
+        raise NotImplementedError()
+
+    def get(self, row: int) -> Any:
+        values = tuple(a[row] for a in self.arrays)
+        if math.isnan(values[0]):
+            return None
+        return self._unpack(values)
+
+    def set(self, row: int, value) -> bool:
+        if value is None:
+            for a in self.arrays:
+                a[row] = MISSING
+            return True
+        values = self._pack(value)
+        if values is None:
+            return False
+        for a, v in zip(self.arrays, values):
+            a[row] = v
+        return True
+
+    def extend(self, count: int):
+        for a in self.arrays:
+            a.extend(repeat(MISSING, count))
+
+    def take(self, rows: List[Optional[int]]) -> 'Column':
+        column = self._empty()
+        column.arrays = [array("d", (a[r] if r is not None else MISSING for r in rows)) for a in self.arrays]
+        return column
+
+    def nbytes(self) -> int:
+        return sum(a.itemsize * len(a) for a in self.arrays)
+
+
+class NumberColumn(ArrayColumn):
+
+    def __init__(self, kind: type, length: int = 0):
+        super().__init__(1, length)
+        self.kind = kind
+
+    def _pack(self, value) -> Optional[tuple]:
+        if type(value) != self.kind:
+            return None
+        return float(value),
+
+    def _unpack(self, values: tuple):
+        return self.kind(values[0])
+
+    def _empty(self) -> 'ArrayColumn':
+        return NumberColumn(self.kind)
+
+
+class QuantityColumn(ArrayColumn):
+
+    def __init__(self, quantity_type: type, unit, length: int = 0):
+        super().__init__(1, length)
+        self.quantity_type = quantity_type
+        self.unit = unit
+
+    def _pack(self, value) -> Optional[tuple]:
+        if type(value) != self.quantity_type:
+            return None
+        try:
+            return float(value.m_as(self.unit)),
+        except DimensionalityError:
+            return None
+
+    def _unpack(self, values: tuple):
+        return self.quantity_type(values[0], self.unit)
+
+    def _empty(self) -> 'ArrayColumn':
+        return QuantityColumn(self.quantity_type, self.unit)
+
+
+class PointColumn(ArrayColumn):
+
+    def __init__(self, length: int = 0):
+        super().__init__(2, length)
+
+    def _pack(self, value) -> Optional[tuple]:
+        if type(value) != Point:
+            return None
+        return float(value.lat), float(value.lon)
+
+    def _unpack(self, values: tuple):
+        return Point(lat=values[0], lon=values[1])
+
+    def _empty(self) -> 'ArrayColumn':
+        return PointColumn()
+
+
+class PintPoint3Column(ArrayColumn):
+
+    def __init__(self, quantity_type: type, unit, length: int = 0):
+        super().__init__(3, length)
+        self.quantity_type = quantity_type
+        self.unit = unit
+
+    def _pack(self, value) -> Optional[tuple]:
+        if type(value) != PintPoint3 or type(value.x) != self.quantity_type:
+            return None
+        try:
+            return tuple(float(c.m_as(self.unit)) for c in (value.x, value.y, value.z))
+        except DimensionalityError:
+            return None
+
+    def _unpack(self, values: tuple):
+        return PintPoint3(*(self.quantity_type(v, self.unit) for v in values))
+
+    def _empty(self) -> 'ArrayColumn':
+        return PintPoint3Column(self.quantity_type, self.unit)
+
+
+class ObjectColumn(Column):
+    """Anything that doesn't fit in an array, like quaternions, is kept as-is"""
+
+    def __init__(self, values: List):
+        self.values = values
+
+    def get(self, row: int) -> Any:
+        return self.values[row]
+
+    def set(self, row: int, value) -> bool:
+        self.values[row] = value
+        return True
+
+    def extend(self, count: int):
+        self.values.extend(repeat(None, count))
+
+    def take(self, rows: List[Optional[int]]) -> 'Column':
+        return ObjectColumn([self.values[r] if r is not None else None for r in rows])
+
+    def nbytes(self) -> int:
+        return 8 * len(self.values)
+
+
+def _is_quantity(value) -> bool:
+    return hasattr(value, "magnitude") and hasattr(value, "units") and hasattr(value, "m_as")
+
+
+def column_for(value, length: int) -> Column:
+    """An empty column, with length missing rows, that can hold this value"""
+    if type(value) in (int, float):
+        return NumberColumn(type(value), length)
+    if type(value) == Point:
+        return PointColumn(length)
+    if type(value) == PintPoint3 and _is_quantity(value.x):
+        return PintPoint3Column(type(value.x), value.x.units, length)
+    if _is_quantity(value) and isinstance(value.magnitude, (int, float)):
+        return QuantityColumn(type(value), value.units, length)
+    return ObjectColumn([None] * length)
+
+
+class EntryView(Entry):
+    """An Entry that reads and writes a row of a ColumnarFrameMeta. Only valid until more entries are added"""
+
+    def __init__(self, framemeta: 'ColumnarFrameMeta', row: int):
+        self._framemeta = framemeta
+        self._row = row
+
+    @property
+    def dt(self) -> datetime.datetime:
+        return self._framemeta.datetime_of(self._row)
+
+    @property
+    def items(self) -> Dict[str, Any]:
+        return self._framemeta.row(self._row)
+
+    def update(self, **kwargs):
+        for k, v in kwargs.items():
+            self._framemeta.set(self._row, k, v)
+
+    def __getattr__(self, item):
+        if item.startswith("_"):
+            raise AttributeError(item)
+        return self._framemeta.value(self._row, item)
+
+
+class ColumnarFrameMeta:
+    """Drop in replacement for FrameMeta, storing a column per metric"""
+
+    def __init__(self, packets_per_second=18):
+        self.modified = False
+        self.pps = packets_per_second
+        self.processing = None
+
+        self.times = array("q")
+        self.dts = array("q")
+        self.epoch = None
+        self.tz = None
+        self.columns: Dict[str, Column] = {}
+        self.pending: Dict[int, Entry] = {}
+        self.updates = 0
+
+    def __len__(self):
+        self.check_modified()
+        return len(self.times)
+
+    def __getitem__(self, item):
+        self.check_modified()
+        return EntryView(self, range(len(self.times))[item])
+
+    def packets_per_second(self):
+        return self.pps
+
+    def stepper(self, step: Timeunit, start: Timeunit = timeunits(millis=0), end: Optional[Timeunit] = None):
+        self.check_modified()
+        return Stepper(self, step, start=start, end=end)
+
+    def cursor(self) -> Cursor:
+        return Cursor(self, lambda: self.times)
+
+    def add(self, at_time: Timeunit, entry):
+        self.pending[at_time.us] = entry
+        self.modified = True
+
+    def clone(self) -> 'ColumnarFrameMeta':
+        self.check_modified()
+        fm = ColumnarFrameMeta()
+        rows = list(range(len(self.times)))
+        fm.times = array("q", self.times)
+        fm.dts = array("q", self.dts)
+        fm.epoch = self.epoch
+        fm.tz = self.tz
+        fm.columns = {k: c.take(rows) for k, c in self.columns.items()}
+        return fm
+
+    def date_at(self, t: Timeunit) -> datetime.datetime:
+        return self.get(t).dt
+
+    @property
+    def min(self) -> Timeunit:
+        self.check_modified()
+        return Timeunit(self.times[0])
+
+    @property
+    def max(self) -> Timeunit:
+        self.check_modified()
+        return Timeunit(self.times[-1])
+
+    @property
+    def mid(self):
+        return self.min + ((self.max - self.min) / 2)
+
+    def units_of(self, name: str):
+        """The unit tag of a metric's column, or None if it doesn't have one"""
+        self.check_modified()
+        return self.columns[name].unit
+
+    def nbytes(self) -> int:
+        self.check_modified()
+        return self.times.itemsize * len(self.times) + self.dts.itemsize * len(self.dts) + sum(
+            c.nbytes() for c in self.columns.values()
+        )
+
+    # row access, used by EntryView
+
+    def datetime_of(self, row: int) -> datetime.datetime:
+        dt = self.epoch + self.dts[row] * one_us
+        return dt.astimezone(self.tz) if self.tz not in (None, datetime.timezone.utc) else dt
+
+    def value(self, row: int, name: str):
+        column = self.columns.get(name)
+        return column.get(row) if column is not None else None
+
+    def row(self, row: int) -> Dict[str, Any]:
+        values = ((k, c.get(row)) for k, c in self.columns.items())
+        return {k: v for k, v in values if v is not None}
+
+    def set(self, row: int, name: str, value):
+        column = self.columns.get(name)
+        if column is None:
+            if value is None:
+                return
+            column = self.columns[name] = column_for(value, len(self.times))
+        if not column.set(row, value):
+            column = self.columns[name] = ObjectColumn([column.get(r) for r in range(len(self.times))])
+            column.set(row, value)
+
+    # building the columns from added entries
+
+    def _us_of(self, dt: datetime.datetime) -> int:
+        if self.epoch is None:
+            self.epoch = naive_epoch if dt.tzinfo is None else utc_epoch
+            self.tz = dt.tzinfo
+        return (dt - self.epoch) // one_us
+
+    def _write(self, row: int, us: int, entry: Entry):
+        self.times[row] = us
+        self.dts[row] = self._us_of(entry.dt)
+        for k, v in entry.items.items():
+            self.set(row, k, v)
+
+    def _update(self):
+        pending = sorted(self.pending.items())
+        self.pending = {}
+        self.modified = False
+        self.updates += 1
+
+        if not pending:
+            return
+
+        if not self.times or pending[0][0] > self.times[-1]:
+            # the usual case - entries are added in time order
+            start = len(self.times)
+            self.times.extend(repeat(0, len(pending)))
+            self.dts.extend(repeat(0, len(pending)))
+            for column in self.columns.values():
+                column.extend(len(pending))
+            for offset, (us, entry) in enumerate(pending):
+                self._write(start + offset, us, entry)
+            return
+
+        existing = {us: row for row, us in enumerate(self.times)}
+        added = dict(pending)
+        merged = sorted(set(existing) | set(added))
+
+        # replaced entries lose all their old values, as in FrameMeta
+        rows = [None if us in added else existing[us] for us in merged]
+        self.times = array("q", merged)
+        self.dts = array("q", (self.dts[r] if r is not None else 0 for r in rows))
+        self.columns = {k: c.take(rows) for k, c in self.columns.items()}
+
+        for row, us in enumerate(merged):
+            if us in added:
+                self._write(row, us, added[us])
+
+    def check_modified(self):
+        if self.modified:
+            self._update()
+
+    def get(self, frame_time: Timeunit) -> Entry:
+        self.check_modified()
+
+        row = bisect.bisect_left(self.times, frame_time.us)
+        if row < len(self.times) and self.times[row] == frame_time.us:
+            return EntryView(self, row)
+
+        return self._get_closest(frame_time, row)
+
+    def _get_closest(self, frame_time: Timeunit, later_row: int) -> Entry:
+
+        if frame_time < self.min:
+            log(f"Request for data at time {frame_time}, before start of metadata, returning first item")
+            return EntryView(self, 0)
+
+        if frame_time > self.max:
+            log(f"Request for data at time {frame_time}, after end of metadata, returning last item")
+            return EntryView(self, len(self.times) - 1)
+
+        earlier_row = later_row - 1
+
+        delta = frame_time - Timeunit(self.times[earlier_row])
+
+        if delta > timeunits(seconds=6):
+            log(f"Closest item to wanted time {frame_time} is {delta} away")
+
+        return EntryView(self, earlier_row)
+
+    def items(self, step: datetime.timedelta = datetime.timedelta(seconds=0)):
+        self.check_modified()
+
+        last_dt = datetime.datetime(year=1900, month=1, day=1, tzinfo=datetime.timezone.utc)
+
+        for row in range(len(self.times)):
+            entry = EntryView(self, row)
+            entry_dt = entry.dt
+
+            if entry_dt >= last_dt + step:
+                last_dt = entry_dt
+
+                yield entry
+
+    @contextlib.contextmanager
+    def processing_within(self, start: Optional[Timeunit] = None, end: Optional[Timeunit] = None):
+        """While in this context, only process entries from start to end (inclusive) - others are left as they were"""
+        self.processing = (start, end)
+        try:
+            yield self
+        finally:
+            self.processing = None
+
+    def _processing_rows(self) -> range:
+        self.check_modified()
+        if self.processing is None:
+            return range(len(self.times))
+        start, end = self.processing
+        lo = bisect.bisect_left(self.times, start.us) if start is not None else 0
+        hi = bisect.bisect_right(self.times, end.us) if end is not None else len(self.times)
+        return range(lo, hi)
+
+    def process_deltas(self, processor, skip=1, filter_fn: Callable[[Entry], bool] = lambda e: True):
+        rows = self._processing_rows()
+
+        for a, b in zip(rows, rows[skip:]):
+            entry_a = EntryView(self, a)
+            entry_b = EntryView(self, b)
+            if filter_fn(entry_a) and filter_fn(entry_b):
+                updates = processor(entry_a, entry_b, skip)
+                if updates:
+                    entry_a.update(**updates)
+
+    def process_deltas_batch(self, processor, skip=1, filter_fn: Callable[[Entry], bool] = lambda e: True):
+        rows = self._processing_rows()
+        pairs = [
+            (entry_a, entry_b) for entry_a, entry_b in
+            ((EntryView(self, a), EntryView(self, b)) for a, b in zip(rows, rows[skip:]))
+            if filter_fn(entry_a) and filter_fn(entry_b)
+        ]
+
+        for (entry_a, _), updates in zip(pairs, processor(pairs, skip)):
+            if updates:
+                entry_a.update(**updates)
+
+    def process_accel(self, processor, skip=1, filter_fn: Callable[[Entry], bool] = lambda e: True):
+        rows = self._processing_rows()
+
+        for a, b in zip(rows, rows[skip:]):
+            entry_a = EntryView(self, a)
+            entry_b = EntryView(self, b)
+            if filter_fn(entry_a) and filter_fn(entry_b):
+                updates = processor(entry_a, entry_b, skip)
+                if updates:
+                    entry_b.update(**updates)
+
+    def process(self, processor, filter_fn: Callable[[Entry], bool] = lambda e: True):
+        for row in self._processing_rows():
+            entry = EntryView(self, row)
+            if filter_fn(entry):
+                updates = processor(entry)
+                if updates:
+                    entry.update(**updates)
+
+    def process_batch(self, processor, filter_fn: Callable[[Entry], bool] = lambda e: True):
+        entries = [e for e in (EntryView(self, row) for row in self._processing_rows()) if filter_fn(e)]
+
+        for entry, updates in zip(entries, processor(entries)):
+            if updates:
+                entry.update(**updates)
+
+    def process_pipeline(self, pipeline):
+        pipeline.run(EntryView(self, row) for row in self._processing_rows())
+
+    def duration(self):
+        return self.max
@@ -1,12 +1,12 @@
 from enum import Enum
-from typing import Optional, Callable, Set
+from typing import Optional, Callable, Set, Union
 
 from gopro_overlay import timeseries_process
 from gopro_overlay.ffmpeg_gopro import DataStream
 from gopro_overlay.framemeta import FrameMeta
 from gopro_overlay.gpmf.calc import timestamp_calculator_for_packet_type
 from gopro_overlay.gpmd_filters import GPSLockFilter, NullGPSLockFilter
-from gopro_overlay.gpmf.visitors.find import StreamFindingVisitor
+from gopro_overlay.gpmf.visitors.index import GPMDStreamIndex
 from gopro_overlay.gpmf.visitors.cori import CORIComponentConverter, CORIVisitor
 from gopro_overlay.gpmf.visitors.gps import GPS5EntryConverter, GPS5Visitor, GPS9EntryConverter, GPS9Visitor
 from gopro_overlay.gpmf.visitors.grav import GRAVComponentConverter, GRAVisitor
@@ -17,35 +17,39 @@ from gopro_overlay.timeunits import timeunits
 from gopro_overlay.timing import PoorTimer
 
 
-def gps_framemeta(gpmd: GPMD,
+def gps_framemeta(gpmd: Union[GPMD, GPMDStreamIndex],
                   units,
                   datastream: Optional[DataStream] = None,
-                  gps_lock_filter: GPSLockFilter = NullGPSLockFilter()) -> FrameMeta:
-    frame_meta = FrameMeta()
+                  gps_lock_filter: GPSLockFilter = NullGPSLockFilter(),
+                  framemeta_factory: Callable[[], FrameMeta] = FrameMeta) -> FrameMeta:
+    frame_meta = framemeta_factory()
+    index = GPMDStreamIndex.of(gpmd)
 
-    if gpmd.accept(StreamFindingVisitor("GPS9")).found():
+    if index.found("GPS9"):
         log(">> Found GPS9 ")
-        gpmd.accept(
+        index.accept(
             GPS9Visitor(
                 converter=GPS9EntryConverter(
                     units,
-                    calculator=timestamp_calculator_for_packet_type(gpmd, datastream, "GPS9"),
+                    calculator=timestamp_calculator_for_packet_type(index, datastream, "GPS9"),
                     on_item=lambda c, e: frame_meta.add(c, e),
                     gps_lock_filter=gps_lock_filter
                 ).convert
-            )
+            ),
+            "GPS9"
         )
-    elif gpmd.accept(StreamFindingVisitor("GPS5")).found():
+    elif index.found("GPS5"):
         log(">> Found GPS5 ")
-        gpmd.accept(
+        index.accept(
             GPS5Visitor(
                 converter=GPS5EntryConverter(
                     units,
-                    calculator=timestamp_calculator_for_packet_type(gpmd, datastream, "GPS5"),
+                    calculator=timestamp_calculator_for_packet_type(index, datastream, "GPS5"),
                     on_item=lambda c, e: frame_meta.add(c, e),
                     gps_lock_filter=gps_lock_filter
                 ).convert
-            )
+            ),
+            "GPS5"
         )
     else:
         log(">> Can't find any GPS information")
@@ -53,53 +57,59 @@ def gps_framemeta(gpmd: GPMD,
     return frame_meta
 
 
-def accl_framemeta(gpmd: GPMD, units, datastream: Optional[DataStream] = None):
+def accl_framemeta(gpmd: Union[GPMD, GPMDStreamIndex], units, datastream: Optional[DataStream] = None):
     framemeta = FrameMeta()
+    index = GPMDStreamIndex.of(gpmd)
 
-    gpmd.accept(
+    index.accept(
         XYZVisitor(
             "ACCL",
             on_item=XYZComponentConverter(
-                frame_calculator=timestamp_calculator_for_packet_type(gpmd, datastream, "ACCL"),
+                frame_calculator=timestamp_calculator_for_packet_type(index, datastream, "ACCL"),
                 units=units,
                 on_item=lambda t, x: framemeta.add(t, x)
             ).convert
-        )
+        ),
+        "ACCL"
     )
 
-    kalman = timeseries_process.process_kalman_pp3("accl", lambda i: i.accl)
-    framemeta.process(kalman)
+    kalman = timeseries_process.process_kalman_pp3_batch("accl", lambda i: i.accl)
+    framemeta.process_batch(kalman)
 
     return framemeta
 
 
-def grav_framemeta(gpmd: GPMD, units, datastream: Optional[DataStream] = None):
+def grav_framemeta(gpmd: Union[GPMD, GPMDStreamIndex], units, datastream: Optional[DataStream] = None):
     framemeta = FrameMeta()
+    index = GPMDStreamIndex.of(gpmd)
 
-    gpmd.accept(
+    index.accept(
         GRAVisitor(
             on_item=GRAVComponentConverter(
-                frame_calculator=timestamp_calculator_for_packet_type(gpmd, datastream, "GRAV"),
+                frame_calculator=timestamp_calculator_for_packet_type(index, datastream, "GRAV"),
                 units=units,
                 on_item=lambda t, x: framemeta.add(t, x)
             ).convert
-        )
+        ),
+        "GRAV"
     )
 
     return framemeta
 
 
-def cori_framemeta(gpmd: GPMD, units, datastream: Optional[DataStream] = None):
+def cori_framemeta(gpmd: Union[GPMD, GPMDStreamIndex], units, datastream: Optional[DataStream] = None):
     framemeta = FrameMeta()
+    index = GPMDStreamIndex.of(gpmd)
 
-    gpmd.accept(
+    index.accept(
         CORIVisitor(
             on_item=CORIComponentConverter(
-                frame_calculator=timestamp_calculator_for_packet_type(gpmd, datastream, "CORI"),
+                frame_calculator=timestamp_calculator_for_packet_type(index, datastream, "CORI"),
                 units=units,
                 on_item=lambda t, x: framemeta.add(t, x)
             ).convert
-        )
+        ),
+        "CORI"
     )
 
     return framemeta
@@ -119,23 +129,38 @@ class LoadFlag(Enum):
     CORI = 3
 
 
-def parse_gopro(gopro_data:bytes, units, datastream: DataStream, flags: Set[LoadFlag] = None,
-                gps_lock_filter: GPSLockFilter = NullGPSLockFilter()) -> FrameMeta:
+def streams_for(flags: Set[LoadFlag]) -> Set[str]:
+    """The GPMD streams that parse_gopro looks at, for these flags - SHUT is only used for its timestamps"""
+    streams = {"GPS5", "GPS9", "SHUT"}
+    streams.update(flag.name for flag in flags)
+    return streams
+
+
+def parse_gopro(gopro_data: Union[bytes, GPMD], units, datastream: DataStream, flags: Set[LoadFlag] = None,
+                gps_lock_filter: GPSLockFilter = NullGPSLockFilter(),
+                framemeta_factory: Callable[[], FrameMeta] = FrameMeta) -> FrameMeta:
     if flags is None:
         flags = set(list(LoadFlag))
 
     with PoorTimer("parsing").timing():
-        with PoorTimer("GPMD", indent=1).timing():
-            gpmd = GPMD.parse(gopro_data)
+        if isinstance(gopro_data, GPMD):
+            gpmd = gopro_data
+        else:
+            with PoorTimer("GPMD", indent=1).timing():
+                gpmd = GPMD.parse_lazy(gopro_data, streams=streams_for(flags))
+
+        with PoorTimer("index", indent=1).timing():
+            index = GPMDStreamIndex.of(gpmd)
 
         with PoorTimer("extract GPS", indent=1).timing():
-            gps_frame_meta = gps_framemeta(gpmd, units, datastream=datastream, gps_lock_filter=gps_lock_filter)
+            gps_frame_meta = gps_framemeta(index, units, datastream=datastream, gps_lock_filter=gps_lock_filter,
+                                           framemeta_factory=framemeta_factory)
 
         if LoadFlag.ACCL in flags:
             with PoorTimer("extract ACCL", indent=1).timing():
                 merge_frame_meta(
                     gps_frame_meta,
-                    accl_framemeta(gpmd, units, datastream=datastream),
+                    accl_framemeta(index, units, datastream=datastream),
                     lambda a: {"accl": a.accl}
                 )
 
@@ -143,7 +168,7 @@ def parse_gopro(gopro_data:bytes, units, datastream: DataStream, flags: Set[Load
             with PoorTimer("extract GRAV", indent=1).timing():
                 merge_frame_meta(
                     gps_frame_meta,
-                    grav_framemeta(gpmd, units, datastream=datastream),
+                    grav_framemeta(index, units, datastream=datastream),
                     lambda a: {"grav": a.grav}
                 )
 
@@ -151,7 +176,7 @@ def parse_gopro(gopro_data:bytes, units, datastream: DataStream, flags: Set[Load
             with PoorTimer("extract CORI", indent=1).timing():
                 merge_frame_meta(
                     gps_frame_meta,
-                    cori_framemeta(gpmd, units, datastream=datastream),
+                    cori_framemeta(index, units, datastream=datastream),
                     lambda a: {"cori": a.cori, "ori": a.ori}
                 )
 
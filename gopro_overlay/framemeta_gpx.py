@@ -1,11 +1,13 @@
 import datetime
 from datetime import timedelta
 from enum import Enum
+from typing import Callable, List
 
 import gpxpy
 
 from gopro_overlay.entry import Entry
 from gopro_overlay.framemeta import FrameMeta
+from gopro_overlay.resample import Resampler
 from gopro_overlay.timeseries import Timeseries
 from gopro_overlay.timeunits import Timeunit, timeunits
 
@@ -51,17 +53,21 @@ def merge_gpx_with_gopro(gpx_timeseries: Timeseries, gopro_framemeta: FrameMeta,
     if gpx_timeseries.max < gopro_framemeta.get(gopro_framemeta.min).dt:
         raise ValueError("GPX file seems to finish before the start of the video")
 
-    def processor(gopro_entry: Entry):
-        try:
-            gpx_entry = gpx_timeseries.get(gopro_entry.dt)
+    resampler = Resampler(gpx_timeseries)
+
+    def processor(gopro_entries: List[Entry]):
+        all_updates = []
+        for gopro_entry in gopro_entries:
+            gpx_items = resampler.items_at(gopro_entry.dt)
+            if gpx_items is None:
+                all_updates.append(None)
+                continue
 
             updates = {
                 "speed": None,
                 "dop": None,
             }
 
-            gpx_items = gpx_entry.items
-
             if mode == MergeMode.EXTEND:
                 for k in gopro_entry.items.keys():
                     gpx_items.pop(k, None)
@@ -71,16 +77,16 @@ def merge_gpx_with_gopro(gpx_timeseries: Timeseries, gopro_framemeta: FrameMeta,
 
             updates.update(gpx_items)
 
-            return updates
-        except ValueError:
-            pass
+            all_updates.append(updates)
+        return all_updates
 
-    gopro_framemeta.process(processor)
+    gopro_framemeta.process_batch(processor)
 
 
 def timeseries_to_framemeta(gpx_timeseries: Timeseries, units, start_date: datetime.datetime = None,
-                            duration: Timeunit = None) -> FrameMeta:
-    fake_frame_meta = FrameMeta()
+                            duration: Timeunit = None,
+                            framemeta_factory: Callable[[], FrameMeta] = FrameMeta) -> FrameMeta:
+    fake_frame_meta = framemeta_factory()
 
     if start_date is None:
         start_date = gpx_timeseries.min
@@ -90,18 +96,10 @@ def timeseries_to_framemeta(gpx_timeseries: Timeseries, units, start_date: datet
     else:
         end_date = start_date + duration.timedelta()
 
-    stepper = gpx_timeseries.stepper(step=timeunits(seconds=0.1))
-
-    for pts in stepper.steps():
-
-        entry = gpx_timeseries.get(pts)
-
-        point_datetime = entry.dt
+    resampler = Resampler(gpx_timeseries)
+    number = units.number
 
-        if point_datetime < start_date:
-            continue
-        if point_datetime > end_date:
-            break
+    for point_datetime, items in resampler.grid(timeunits(seconds=0.1).timedelta(), start=start_date, end=end_date):
 
         offset = Timeunit.from_timedelta(point_datetime - start_date)
 
@@ -109,8 +107,8 @@ def timeseries_to_framemeta(gpx_timeseries: Timeseries, units, start_date: datet
             offset,
             Entry(
                 dt=point_datetime,
-                timestamp=units.Quantity(offset.millis(), units.number),
-                **{'dop': units.Quantity(10, units.number), **entry.items}
+                timestamp=units.Quantity(offset.millis(), number),
+                **{'dop': units.Quantity(10, number), **items}
             )
         )
 
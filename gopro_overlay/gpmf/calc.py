@@ -1,10 +1,10 @@
 import collections
-from typing import Callable, Tuple, Optional
+from typing import Callable, Tuple, Optional, Union
 
 from gopro_overlay.exceptions import Defect
 from gopro_overlay.ffmpeg_gopro import DataStream
 from gopro_overlay.gpmf import GPMD
-from gopro_overlay.gpmf.visitors.find import DetermineTimestampOfFirstSHUTVisitor
+from gopro_overlay.gpmf.visitors.index import GPMDStreamIndex
 from gopro_overlay.log import log
 from gopro_overlay.timeunits import Timeunit, timeunits
 
@@ -72,15 +72,17 @@ class UnknownPacketTimeCalculator(PacketTimeCalculator):
         raise Defect("can't calculate timings for {self._packet_type} as none were seen.")
 
 
-def timestamp_calculator_for_packet_type(meta: GPMD, datastream: Optional[DataStream],
+def timestamp_calculator_for_packet_type(meta: Union[GPMD, GPMDStreamIndex], datastream: Optional[DataStream],
                                          packet_type: str) -> PacketTimeCalculator:
-    cori_timestamp = meta.accept(DetermineTimestampOfFirstSHUTVisitor()).timestamp
+    index = GPMDStreamIndex.of(meta)
+    cori_timestamp = index.first_shut_timestamp
     if cori_timestamp is not None:
         return CoriTimestampPacketTimeCalculator(cori_timestamp)
     else:
         assert datastream is not None
         visitor = CalculateCorrectionFactorsVisitor(packet_type, datastream)
-        meta.accept(visitor)
+        for repeat in index.repeats(packet_type):
+            visitor.add_packet(repeat)
 
         if visitor.found():
             return CorrectionFactorsPacketTimeCalculator(visitor.factors())
@@ -126,7 +128,10 @@ class CalculateCorrectionFactorsVisitor:
             return self
 
     def _handle_item(self, item):
-        self.samples += item.repeat
+        self.add_packet(item.repeat)
+
+    def add_packet(self, repeat: int):
+        self.samples += repeat
         self.meanY += self.samples
         self.meanX += self._payload_maths.time_of_out_packet(self.count)
         self.repeatarray.append(self.samples)
@@ -1,9 +1,12 @@
+import collections.abc
 import dataclasses
 import datetime
 import itertools
+import operator
 import struct
+from array import array
 from enum import Enum
-from typing import List, TypeVar, Optional
+from typing import Iterable, List, TypeVar, Optional, Set
 
 from gopro_overlay.log import log
 from gopro_overlay.timeunits import timeunits
@@ -31,8 +34,26 @@ class GPMD:
     def parse(data: bytes) -> 'GPMD':
         return GPMD(list(GPMDParser(data).items()))
 
+    @staticmethod
+    def parse_lazy(data: bytes, streams: Optional[Set[str]] = None) -> 'GPMD':
+        """
+        Only the headers are read up front - payloads are read when the items are visited. If streams are given, STRM
+        containers that don't contain any of them are left out
+        """
+        return GPMD(GPMDIndex(data, streams).items())
+
+    @staticmethod
+    def parse_chunks(chunks: Iterable[bytes], streams: Optional[Set[str]] = None) -> 'GPMD':
+        parser = GPMDStreamParser(streams)
+        items = []
+        for chunk in chunks:
+            items.extend(parser.feed(chunk))
+        items.extend(parser.close())
+        return GPMD(items)
+
 
 GPMDStruct = struct.Struct('>4sBBH')
+GPMDHeaderStruct = struct.Struct('>IBBH')
 
 
 @dataclasses.dataclass(frozen=True)
@@ -106,7 +127,7 @@ def _interpret_string(item, **kwargs):
 
 
 def _interpret_gps_timestamp(item, **kwargs) -> Optional[datetime.datetime]:
-    date_string = item.rawdata.decode('utf-8', errors='replace')
+    date_string = bytes(item.rawdata).decode('utf-8', errors='replace')
     try:
         return datetime.datetime.strptime(
             date_string,
@@ -137,7 +158,7 @@ def _interpret_list(item, **kwargs):
     return _struct_mapping_for(item).unpack_from(item.rawdata)
 
 
-def _interpret_element(item, scale, types=None):
+def _interpret_element(item, scale, types=None) -> List[List[float]]:
     if types is None:
         single = _struct_mapping_for(item, repeat=1)
         mapping = _struct_mapping_for(item, repeat=item.size // single.size)
@@ -149,19 +170,57 @@ def _interpret_element(item, scale, types=None):
     if repeat > 1 and len(scale) == 1:
         scale = list(itertools.repeat(scale[0], item.size))
 
-    def unpack_single(r):
-        unscaled = mapping.unpack_from(item.rawdata[r * item.size: (r + 1) * item.size])
-        return [float(x) / float(y) for x, y in zip(unscaled, scale)]
+    # x / y, for a float y, is the same as float(x) / y
+    scale = [float(y) for y in scale]
+
+    if mapping.size == item.size:
+        samples = mapping.iter_unpack(item.rawdata[:repeat * item.size])
+    else:
+        samples = (mapping.unpack_from(item.rawdata[r * item.size: (r + 1) * item.size]) for r in range(repeat))
+
+    return [list(map(operator.truediv, unscaled, scale)) for unscaled in samples]
+
+
+class Samples(collections.abc.Sequence):
+    """
+    Decoded samples, as rows of floats that can be used as they are. Each is only made into its type, like XYZ,
+    when looked at - sensors like ACCL have hundreds of samples a second, and often most are never used.
+    """
+
+    def __init__(self, cls, rows: List[List[float]]):
+        self.cls = cls
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self.cls(*row) for row in self.rows[item]]
+        return self.cls(*self.rows[item])
+
+    def __eq__(self, other):
+        if isinstance(other, Samples):
+            return self.cls == other.cls and self.rows == other.rows
+        return list(self) == other
 
-    return [unpack_single(r) for r in range(repeat)]
+    def __repr__(self):
+        return f"Samples({self.cls.__name__}, {len(self)})"
 
 
-def _interpret_gps5(item, **kwargs) -> List[GPS5]:
-    return [GPS5(*it) for it in _interpret_element(item, **kwargs)]
+def rows_of(samples) -> List[List[float]]:
+    """The values of each sample, in the order of its type's fields, without making each into its type"""
+    if isinstance(samples, Samples):
+        return samples.rows
+    return [list(dataclasses.astuple(sample)) for sample in samples]
 
 
-def _interpret_gps9(item, **kwargs) -> List[GPS9]:
-    return [GPS9(*it) for it in _interpret_element(item, **kwargs)]
+def _interpret_gps5(item, **kwargs) -> Samples:
+    return Samples(GPS5, _interpret_element(item, **kwargs))
+
+
+def _interpret_gps9(item, **kwargs) -> Samples:
+    return Samples(GPS9, _interpret_element(item, **kwargs))
 
 
 def _interpret_gps_precision(item, **kwargs) -> float:
@@ -172,16 +231,16 @@ def _interpret_type(item, **kwargs) -> List[str]:
     return list(_interpret_string(item, **kwargs))
 
 
-def _interpret_xyz(item, **kwargs) -> List[XYZ]:
-    return [XYZ(*it) for it in _interpret_element(item, **kwargs)]
+def _interpret_xyz(item, **kwargs) -> Samples:
+    return Samples(XYZ, _interpret_element(item, **kwargs))
 
 
-def _interpret_vector(item, **kwargs) -> List[VECTOR]:
-    return [VECTOR(*it) for it in _interpret_element(item, **kwargs)]
+def _interpret_vector(item, **kwargs) -> Samples:
+    return Samples(VECTOR, _interpret_element(item, **kwargs))
 
 
-def _interpret_quaternion(item, **kwargs) -> List[QUATERNION]:
-    return [QUATERNION(*it) for it in _interpret_element(item, **kwargs)]
+def _interpret_quaternion(item, **kwargs) -> Samples:
+    return Samples(QUATERNION, _interpret_element(item, **kwargs))
 
 
 def _interpret_gps_lock(item, **kwargs) -> GPSFix:
@@ -323,7 +382,7 @@ class GPMDItem:
             rawdatas = "null"
         else:
             rawdata = ' '.join(format(x, '02x') for x in self.rawdata)
-            rawdatas = self.rawdata[0:50]
+            rawdatas = bytes(self.rawdata[0:50])
 
         return f"GPMDItem: {self.fourcc}" \
                f", Type={self.type_char}" \
@@ -377,3 +436,166 @@ class GPMDParser:
         while i % base != 0:
             i += 1
         return i
+
+
+def _fourcc_code(fourcc: str) -> int:
+    return int.from_bytes(fourcc.encode(), "big")
+
+
+class GPMDIndex:
+    """
+    Where each KLV in some GPMD is, and what it is, found from the 8 byte headers alone, and kept in a few arrays
+    rather than an object for each. Items are made from the index as they are visited, with their payloads as views
+    onto the data, rather than copies of it.
+    """
+
+    STRM = _fourcc_code("STRM")
+
+    def __init__(self, data: bytes, streams: Optional[Set[str]] = None):
+        self.data = memoryview(data).cast("B")
+        self.streams = None if streams is None else {_fourcc_code(s) for s in streams}
+
+        self.fourccs = array("I")
+        self.types = array("B")
+        self.sizes = array("H")
+        self.repeats = array("H")
+        self.offsets = array("Q")
+        # the row after the last one inside this one - the next row for items
+        self.ends = array("I")
+        self._names = {}
+
+        self._top = self._scan(0, len(self.data))
+
+    def __len__(self):
+        return len(self.fourccs)
+
+    def _truncate(self, row: int):
+        for a in [self.fourccs, self.types, self.sizes, self.repeats, self.offsets, self.ends]:
+            del a[row:]
+
+    def _scan(self, offset: int, end: int) -> List[int]:
+        rows = []
+        data = self.data
+        unpack_from = GPMDHeaderStruct.unpack_from
+        header_size = GPMDHeaderStruct.size
+
+        while offset < end:
+            fourcc, type_char_code, size, repeat = unpack_from(data, offset)
+            padded_length = GPMDParser.extend(size * repeat)
+
+            row = len(self.fourccs)
+            self.fourccs.append(fourcc)
+            self.types.append(type_char_code)
+            self.sizes.append(size)
+            self.repeats.append(repeat)
+            self.offsets.append(offset + header_size)
+            self.ends.append(row + 1)
+
+            if type_char_code == 0:
+                children = self._scan(offset + header_size, min(offset + header_size + padded_length, end))
+                if fourcc == self.STRM and self.streams is not None \
+                        and not any(self.fourccs[c] in self.streams for c in children):
+                    self._truncate(row)
+                    offset += header_size + padded_length
+                    continue
+                self.ends[row] = len(self.fourccs)
+
+            rows.append(row)
+            offset += header_size + padded_length
+
+        return rows
+
+    def name(self, row: int) -> str:
+        fourcc = self.fourccs[row]
+        name = self._names.get(fourcc)
+        if name is None:
+            name = self._names.setdefault(fourcc, fourcc.to_bytes(4, "big").decode())
+        return name
+
+    def children(self, row: int) -> List[int]:
+        rows = []
+        child = row + 1
+        ends = self.ends
+        end = ends[row]
+        while child < end:
+            rows.append(child)
+            child = ends[child]
+        return rows
+
+    def item(self, row: int):
+        size = self.sizes[row]
+        repeat = self.repeats[row]
+        padded_length = GPMDParser.extend(size * repeat)
+        if self.types[row] == 0:
+            return LazyGPMDContainer(self, row, size, repeat, padded_length)
+        offset = self.offsets[row]
+        return GPMDItem(self.name(row), self.types[row], size, repeat, padded_length,
+                        self.data[offset:offset + padded_length])
+
+    def items(self) -> List:
+        return [self.item(row) for row in self._top]
+
+
+class LazyGPMDContainer(GPMDContainer):
+    """A container whose items are made from the index each time they are asked for"""
+
+    def __init__(self, index: GPMDIndex, row: int, size, repeat, padded_length):
+        self._index = index
+        self._row = row
+        self.fourcc = index.name(row)
+        self._size = size
+        self._repeat = repeat
+        self._padded_length = padded_length
+
+    @property
+    def items(self):
+        return [self._index.item(row) for row in self._index.children(self._row)]
+
+    def __len__(self):
+        return len(self._index.children(self._row))
+
+    @property
+    def itemset(self):
+        return set([self._index.name(row) for row in self._index.children(self._row)])
+
+
+class GPMDStreamParser:
+    """
+    Parses GPMD as it arrives, in chunks of any size, giving each top level item (a DEVC) as soon as all of it has
+    arrived, so only the item that is still arriving is held as bytes.
+
+    If streams are given, each item is indexed as GPMD.parse_lazy does, rather than parsed.
+    """
+
+    def __init__(self, streams: Optional[Set[str]] = None):
+        self._buffer = bytearray()
+        self._parser = GPMDParser(b"")
+        self._streams = streams
+
+    def feed(self, chunk: bytes) -> List[GPMDContainer]:
+        buffer = self._buffer
+        buffer.extend(chunk)
+
+        items = []
+        offset = 0
+        while len(buffer) - offset >= GPMDStruct.size:
+            fourcc, type_char_code, size, repeat = GPMDStruct.unpack_from(buffer, offset=offset)
+            length = GPMDStruct.size + GPMDParser.extend(size * repeat)
+            if len(buffer) - offset < length:
+                break
+            if self._streams is None:
+                items.append(self._parser.from_bytes(buffer, offset))
+            else:
+                items.extend(GPMDIndex(bytes(buffer[offset:offset + length]), self._streams).items())
+            offset += length
+
+        del buffer[:offset]
+        return items
+
+    def close(self) -> List[GPMDContainer]:
+        """Whatever is left, parsed as GPMD.parse would if it was at the end of the data"""
+        remaining = bytes(self._buffer)
+        self._buffer.clear()
+        if self._streams is None:
+            return list(GPMDParser(remaining).items())
+        return GPMDIndex(remaining, self._streams).items()
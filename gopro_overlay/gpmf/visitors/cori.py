@@ -7,7 +7,7 @@ from pint import Quantity
 from gopro_overlay.entry import Entry
 from gopro_overlay.gpmf.calc import PacketTimeCalculator
 
-from gopro_overlay.gpmf import QUATERNION
+from gopro_overlay.gpmf import QUATERNION, rows_of
 from gopro_overlay.point import EulerRadians, Quaternion, Point3
 from gopro_overlay.timeunits import Timeunit
 
@@ -54,15 +54,16 @@ class CORIComponentConverter:
             len(components.orientations)
         )
 
-        for index, cori in enumerate(components.orientations):
+        # in the order of QUATERNION's fields
+        for index, (w, x, z, y) in enumerate(rows_of(components.orientations)):
             sample_frame_timestamp, _ = sample_time_calculator(index)
 
             point_datetime = datetime.datetime.fromtimestamp(sample_frame_timestamp.millis() / 1000,
                                                              tz=datetime.timezone.utc)
 
             quat = Quaternion(
-                w=cori.w,
-                v=Point3(x=cori.x, y=cori.y, z=cori.z)
+                w=w,
+                v=Point3(x=x, y=y, z=z)
             )
 
             self._on_item(
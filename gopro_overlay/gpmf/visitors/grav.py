@@ -3,7 +3,7 @@ import datetime
 from typing import List
 
 from gopro_overlay.entry import Entry
-from gopro_overlay.gpmf import VECTOR
+from gopro_overlay.gpmf import VECTOR, rows_of
 from gopro_overlay.point import PintPoint3
 
 
@@ -35,14 +35,14 @@ class GRAVComponentConverter:
 
         unit = self._units.number
 
-        for index, vector in enumerate(components.vectors):
+        for index, (a, b, c) in enumerate(rows_of(components.vectors)):
             sample_frame_timestamp, _ = sample_time_calculator(index)
 
             point_datetime = datetime.datetime.fromtimestamp(sample_frame_timestamp.millis() / 1000,
                                                              datetime.timezone.utc)
 
-            grav_vector = PintPoint3(x=self._units.Quantity(vector.a, unit), y=self._units.Quantity(-vector.c, unit),
-                                     z=self._units.Quantity(-vector.b, unit))
+            grav_vector = PintPoint3(x=self._units.Quantity(a, unit), y=self._units.Quantity(-c, unit),
+                                     z=self._units.Quantity(-b, unit))
 
             self._on_item(
                 sample_frame_timestamp,
@@ -0,0 +1,67 @@
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+from gopro_overlay.gpmf import GPMD, GPMDContainer
+from gopro_overlay.timeunits import Timeunit
+
+
+class GPMDStreamIndex:
+    """
+    The streams in each DEVC, by the fourccs they contain, and the timestamp of the first SHUT stream, found in one
+    pass over the GPMD. Extractors visit just the streams they want from here, rather than each going over all of it.
+    """
+
+    def __init__(self):
+        self.devcs: List[Tuple[GPMDContainer, Set[str], Dict[str, List[GPMDContainer]]]] = []
+        self.fourccs: Set[str] = set()
+        self.first_shut_timestamp: Optional[Timeunit] = None
+
+    @staticmethod
+    def of(gpmd: Union[GPMD, 'GPMDStreamIndex']) -> 'GPMDStreamIndex':
+        if isinstance(gpmd, GPMDStreamIndex):
+            return gpmd
+        return gpmd.accept(StreamIndexingVisitor()).index
+
+    def found(self, fourcc: str) -> bool:
+        return fourcc in self.fourccs
+
+    def streams(self, fourcc: str) -> List[GPMDContainer]:
+        return [stream for _, _, streams in self.devcs for stream in streams.get(fourcc, [])]
+
+    def repeats(self, fourcc: str) -> List[int]:
+        """The number of samples in each item of this type, in order - what the correction factors are worked out from"""
+        return [item.repeat for stream in self.streams(fourcc) for item in stream.with_type(fourcc)]
+
+    def accept(self, visitor, fourcc: str):
+        """Visit each DEVC, as GPMD.accept does, but only the streams in it that contain fourcc"""
+        for devc, contents, streams in self.devcs:
+            if hasattr(visitor, "vic_DEVC"):
+                container_visitor = visitor.vic_DEVC(devc, contents)
+                if container_visitor is not None:
+                    for stream in streams.get(fourcc, []):
+                        stream.accept(container_visitor)
+                    container_visitor.v_end()
+        return visitor
+
+
+class StreamIndexingVisitor:
+
+    def __init__(self):
+        self.index = GPMDStreamIndex()
+        self._streams = None
+
+    def vic_DEVC(self, item, contents):
+        self._streams = {}
+        self.index.devcs.append((item, contents, self._streams))
+        return self
+
+    def vic_STRM(self, item, contents):
+        for fourcc in contents:
+            self._streams.setdefault(fourcc, []).append(item)
+        self.index.fourccs.update(contents)
+
+        if "SHUT" in contents and self.index.first_shut_timestamp is None:
+            for stmp in item.with_type("STMP"):
+                self.index.first_shut_timestamp = stmp.interpret()
+
+    def v_end(self):
+        pass
@@ -115,9 +115,9 @@ class XYZComponentConverter:
         else:
             raise IOError(f"Unsupported units {components.siun}")
 
-        for index, point in enumerate(components.points):
-            if index % 10 != 0:
-                continue
+        points = components.points
+        for index in range(0, len(points), 10):
+            point = points[index]
             sample_frame_timestamp, _ = sample_time_calculator(index)
 
             point_datetime = datetime.datetime.fromtimestamp(sample_frame_timestamp.millis() / 1000,
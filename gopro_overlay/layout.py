@@ -1,12 +1,15 @@
-from typing import Callable
+from typing import Callable, List, Optional
 
 from PIL import ImageFont, Image, ImageDraw
 
 from gopro_overlay.widgets.info import ComparativeEnergy
-from .framemeta import FrameMeta
+from .dimensions import Box, Dimension
+from .framemeta import FrameMeta, Stepper
 from .layout_components import moving_map
 from .point import Coordinate
 from .units import units
+from .widgets.damage import DamageTrackingScene
+from .widgets.regions import measure_regions
 from .widgets.text import CachingText, Text
 from .widgets.widgets import Scene, Translate, Composite, Widget
 
@@ -48,6 +51,12 @@ class BigMetric(Widget):
     def draw(self, image: Image, draw: ImageDraw):
         self.widget.draw(image, draw)
 
+    def changed(self):
+        return self.widget.changed()
+
+    def extent(self):
+        return self.widget.extent()
+
 
 def big_mph(at, entry, font_title, font_metric=None):
     if font_metric is None:
@@ -65,7 +74,7 @@ def big_mph(at, entry, font_title, font_metric=None):
 
 
 def speed_awareness_layout(renderer, font: ImageFont):
-    def create(entry):
+    def create(entry, pts=None):
         font_title = font.font_variant(size=16)
         font_metric = font.font_variant(size=32)
 
@@ -92,14 +101,32 @@ def speed_awareness_layout(renderer, font: ImageFont):
 
 class Overlay:
 
-    def __init__(self, framemeta: FrameMeta, create_widgets: Callable):
-        self.scene = Scene(create_widgets(self.entry))
+    def __init__(self, framemeta: FrameMeta, create_widgets: Callable, damage_tracking: bool = False):
+        widgets = create_widgets(self.entry, pts=self.pts)
+        self.widgets = widgets
+        self.scene = DamageTrackingScene(widgets) if damage_tracking else Scene(widgets)
         self.framemeta = framemeta
+        self.cursor = framemeta.cursor()
         self._entry = None
+        self._pts = None
 
     def entry(self):
         return self._entry
 
+    def pts(self):
+        return self._pts
+
+    def _set_time(self, pts, entry):
+        self._pts, self._entry = pts, entry
+
+    def regions(self, stepper: Stepper, size: Dimension) -> Optional[List[Box]]:
+        """The areas of the frame this overlay draws into at any step, or None if they can't be known"""
+        try:
+            return measure_regions(self.widgets, size, stepper.with_entries(), self._set_time)
+        finally:
+            self._set_time(None, None)
+
     def draw(self, pts, image: Image.Image) -> Image.Image:
-        self._entry = self.framemeta.get(pts)
+        self._pts = pts
+        self._entry = self.cursor.get(pts)
         return self.scene.draw(image)
@@ -2,6 +2,7 @@ from typing import Callable, TypeVar, Optional
 
 from pint import Quantity
 
+from .conversion import Conversion, NoConversion
 from .entry import Entry
 from .widgets.map import MovingMap, JourneyMap
 from .widgets.text import CachingText, Text
@@ -46,6 +47,25 @@ def metric_value(
     return value
 
 
+def magnitude_value(
+        entry: Callable[[], Optional[Entry]],
+        accessor: Callable[[Entry], Optional[Quantity]],
+        conversion: Conversion,
+        formatter: Callable[[float], T],
+        default: T = "-"
+) -> Callable[[], T]:
+    """Like metric_value, but only the float magnitude of the converted value is formatted, so pint isn't needed"""
+    def value() -> T:
+        e = accessor(entry())
+        if e is not None:
+            v = conversion.magnitude(e)
+            if v is not None:
+                return formatter(v)
+        return default
+
+    return value
+
+
 def text(cache=True, **kwargs) -> Widget:
     if cache:
         return CachingText(**kwargs)
@@ -55,3 +75,7 @@ def text(cache=True, **kwargs) -> Widget:
 
 def metric(entry, accessor, formatter, converter=lambda x: x, cache=True, **kwargs):
     return text(cache, value=metric_value(entry, accessor, converter, formatter), **kwargs)
+
+
+def compiled_metric(entry, accessor, formatter, conversion: Conversion = NoConversion(), cache=True, **kwargs):
+    return text(cache, value=magnitude_value(entry, accessor, conversion, formatter), **kwargs)
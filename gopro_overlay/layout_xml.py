@@ -9,12 +9,13 @@ import pint
 from pint.formatting import format_unit
 
 from gopro_overlay import layouts
+from gopro_overlay.conversion import Conversion, NoConversion, UnitConversion, PaceConversion
 from gopro_overlay.dimensions import Dimension
-from gopro_overlay.framemeta import Window
-from gopro_overlay.layout_components import moving_map, journey_map, text, metric, metric_value
+from gopro_overlay.framemeta import ChartData, Window
+from gopro_overlay.layout_components import moving_map, journey_map, text, metric, metric_value, compiled_metric
 from gopro_overlay.point import Coordinate
 from gopro_overlay.timeseries import Entry
-from gopro_overlay.timeunits import timeunits
+from gopro_overlay.timeunits import timeunits, Timeunit
 from gopro_overlay.units import units
 from .exceptions import Defect
 from .layout_xml_attribute import allow_attributes
@@ -29,6 +30,7 @@ from .widgets.gps import GPSLock
 from .widgets.gradient_bar import GradientBar
 from .widgets.map import MovingJourneyMap, Circuit
 from .widgets.profile import WidgetProfiler
+from .widgets.schedule import Scheduled
 from .widgets.widgets import simple_icon, Translate, Composite, Frame, Widget
 
 
@@ -42,12 +44,6 @@ def load_xml_layout(filepath: Path):
             return f.read()
 
 
-def zero_safe(n, f):
-    if n is None or n.m < 0.0000001:
-        return None
-    return f(n)
-
-
 class Converters:
 
     def __init__(self, speed_unit="mph", distance_unit="mile", altitude_unit="m", temperature_unit="degC"):
@@ -56,42 +52,42 @@ class Converters:
 
         self.converters = {
             # speed
-            "none": lambda u: u,
+            "none": NoConversion(),
 
-            "mph": lambda u: u.to("MPH"),
-            "kph": lambda u: u.to("KPH"),
-            "knots": lambda u: u.to("knot"),
+            "mph": UnitConversion("MPH"),
+            "kph": UnitConversion("KPH"),
+            "knots": UnitConversion("knot"),
 
-            "pace": lambda u: zero_safe(u, lambda nz: (1 / nz).to(pace_unit)),
-            "pace_mile": lambda u: zero_safe(u, lambda nz: (1 / nz).to("pace_mile")),
-            "pace_km": lambda u: zero_safe(u, lambda nz: (1 / nz).to("pace_km")),
-            "pace_kt": lambda u: zero_safe(u, lambda nz: (1 / nz).to("pace_kt")),
+            "pace": PaceConversion(pace_unit),
+            "pace_mile": PaceConversion("pace_mile"),
+            "pace_km": PaceConversion("pace_km"),
+            "pace_kt": PaceConversion("pace_kt"),
 
-            "spm": lambda u: u.to("spm"),
+            "spm": UnitConversion("spm"),
 
             # User selectable
-            "speed": lambda u: u.to(speed_unit),
-            "distance": lambda u: u.to(distance_unit),
+            "speed": UnitConversion(speed_unit),
+            "distance": UnitConversion(distance_unit),
 
-            "altitude": lambda u: u.to(altitude_unit),
-            "alt": lambda u: u.to(altitude_unit),
+            "altitude": UnitConversion(altitude_unit),
+            "alt": UnitConversion(altitude_unit),
 
-            "temp": lambda u: u.to(temperature_unit),
-            "temperature": lambda u: u.to(temperature_unit),
+            "temp": UnitConversion(temperature_unit),
+            "temperature": UnitConversion(temperature_unit),
 
             # accel
-            "G": lambda u: u.to("gravity"),
+            "G": UnitConversion("gravity"),
 
             # alt / dist
-            "feet": lambda u: u.to("international_feet"),
-            "miles": lambda u: u.to("mile"),
-            "metres": lambda u: u.to("m"),
-            "nautical_miles": lambda u: u.to("nautical_mile"),
+            "feet": UnitConversion("international_feet"),
+            "miles": UnitConversion("mile"),
+            "metres": UnitConversion("m"),
+            "nautical_miles": UnitConversion("nautical_mile"),
         }
 
-    def converter(self, name: str) -> Callable[[pint.Quantity], Optional[pint.Quantity]]:
+    def converter(self, name: str) -> Conversion:
         if name is None:
-            return lambda x: x
+            return NoConversion()
         if name in self.converters:
             return self.converters[name]
 
@@ -99,13 +95,20 @@ class Converters:
         # unit, but actual metric might be different... if unconvertible it will blow up later...
         try:
             units.Quantity(1, units=name)
-            return lambda u: u.to(name)
+            return UnitConversion(name)
         except Exception:
             raise IOError(f"The conversion '{name}' is not supported.")
 
 
 def layout_from_xml(xml, renderer, framemeta, font, privacy, include=lambda name: True,
-                    decorator: Optional[WidgetProfiler] = None, converters: Converters = Converters()):
+                    decorator: Optional[WidgetProfiler] = None, converters: Converters = Converters(),
+                    timelapse: float = 1.0):
+    """
+    timelapse is how many seconds of data go by for each second of video, so update rates are per video second.
+
+    The layout is created with the entry for the frame, and the frame's time, pts, which is the clock for widgets
+    that have an update-rate.
+    """
     root = ET.fromstring(xml)
 
     fonts = {}
@@ -143,7 +146,7 @@ def layout_from_xml(xml, renderer, framemeta, font, privacy, include=lambda name
         else:
             return widget
 
-    def create(entry):
+    def create(entry, pts: Optional[Callable[[], Timeunit]] = None):
         def create_component(child, level):
             component_type = component_type_of(child)
 
@@ -203,7 +206,14 @@ def layout_from_xml(xml, renderer, framemeta, font, privacy, include=lambda name
             if element.tag not in elements:
                 raise IOError(f"Tag {element.tag} is not recognised. Should be one of '{list(elements.keys())}'")
 
-            return elements[element.tag](element, level)
+            widget = elements[element.tag](element, level)
+
+            hz = fattrib(element, "update-rate", d=None)
+            if hz is not None:
+                if pts is None:
+                    raise ValueError("update-rate needs the time of each frame, so can only be used in an Overlay")
+                return Scheduled(widget, hz, clock=lambda: Timeunit(pts().us / timelapse))
+            return widget
 
         try:
             return [decorate(
@@ -219,6 +229,18 @@ def layout_from_xml(xml, renderer, framemeta, font, privacy, include=lambda name
     return create
 
 
+def update_rate_in(xml, include: Callable[[str], bool] = lambda name: True) -> bool:
+    """Whether any included part of the layout has an update-rate, so is only redrawn some of the time"""
+
+    def visit(element) -> bool:
+        name = attrib(element, "name", d=None)
+        if name is not None and not include(name):
+            return False
+        return "update-rate" in element.attrib or any(visit(child) for child in element)
+
+    return any(visit(child) for child in ET.fromstring(xml))
+
+
 def component_type_of(element):
     return element.attrib["type"].replace("-", "_")
 
@@ -312,7 +334,7 @@ def metric_accessor_from(name: str) -> Callable[[Entry], Optional[pint.Quantity]
     raise IOError(f"The metric '{name}' is not supported. Use one of: {list(accessors.keys())}")
 
 
-def quantity_formatter_for(format_string: Optional[str], dp: Optional[int]) -> Callable[[pint.Quantity], str]:
+def magnitude_formatter_for(format_string: Optional[str], dp: Optional[int]) -> Callable[[float], str]:
     if format_string and dp:
         raise IOError("Cannot supply both 'format' and 'dp', just use one")
 
@@ -322,18 +344,31 @@ def quantity_formatter_for(format_string: Optional[str], dp: Optional[int]) -> C
     if format_string is not None:
         if format_string == "pace":
             # pace is in minutes, and we want minutes / seconds
-            return lambda q: '{:d}:{:02d}'.format(*divmod(math.ceil(60.0 * q.m), 60))
+            return lambda m: '{:d}:{:02d}'.format(*divmod(math.ceil(60.0 * m), 60))
         else:
             try:
-                return lambda q: format(q.m, format_string)
+                return lambda m: format(m, format_string)
             except ValueError:
                 raise ValueError(f"Unable to format value with format string {format_string}")
     elif dp is not None:
-        return lambda q: format(q.m, f".{dp}f")
+        dp_format = f".{dp}f"
+        return lambda m: format(m, dp_format)
     else:
         raise Defect("Problem deciding how to format")
 
 
+def quantity_formatter_for(format_string: Optional[str], dp: Optional[int]) -> Callable[[pint.Quantity], str]:
+    formatter = magnitude_formatter_for(format_string, dp)
+    return lambda q: formatter(q.m)
+
+
+def magnitude_formatter_from(element) -> Callable[[float], str]:
+    return magnitude_formatter_for(
+        attrib(element, "format", d=None),
+        iattrib(element, "dp", d=None)
+    )
+
+
 def quantity_formatter_from(element) -> Callable[[pint.Quantity], str]:
     return quantity_formatter_for(
         attrib(element, "format", d=None),
@@ -396,6 +431,7 @@ class Widgets:
         self.privacy = privacy
         self.font = font
         self.converters = converters
+        self.chart_data = ChartData(framemeta)
 
     def _font(self, element, name, d):
         return self.font(iattrib(element, name, d=d, r=range(1, 2000)))
@@ -403,13 +439,13 @@ class Widgets:
     @allow_attributes(
         {"x", "y", "metric", "size", "format", "dp", "units", "align", "cache", "rgb", "outline", "outline_width"})
     def create_metric(self, element, entry, **kwargs) -> Widget:
-        return metric(
+        return compiled_metric(
             at=at(element),
             entry=entry,
             accessor=metric_accessor_from(attrib(element, "metric")),
-            formatter=quantity_formatter_from(element),
+            formatter=magnitude_formatter_from(element),
             font=self._font(element, "size", d=16),
-            converter=self.converters.converter(attrib(element, "units", d=None)),
+            conversion=self.converters.converter(attrib(element, "units", d=None)),
             align=attrib(element, "align", d="left"),
             cache=battrib(element, "cache", d=True),
             fill=rgbattr(element, "rgb", d=(255, 255, 255)),
@@ -533,8 +569,10 @@ class Widgets:
                        "samples", "values", "textsize", "filled",
                        "height", "bg", "fill", "line", "text"})
     def create_chart(self, element: ET.Element, entry, **kwargs) -> Widget:
-        accessor = metric_accessor_from(attrib(element, "metric", d="alt"))
-        converter = self.converters.converter(attrib(element, "units", d="metres"))
+        metric_name = attrib(element, "metric", d="alt")
+        units_name = attrib(element, "units", d="metres")
+        accessor = metric_accessor_from(metric_name)
+        converter = self.converters.converter(units_name)
 
         def value(e):
             v = accessor(e)
@@ -547,7 +585,9 @@ class Widgets:
             self.framemeta,
             duration=timeunits(seconds=iattrib(element, "seconds", d=5 * 60)),
             samples=iattrib(element, "samples", d=256),
-            key=value
+            key=value,
+            chart_data=self.chart_data,
+            name=(metric_name, units_name),
         )
 
         title = self._font(element, "textsize", d=16)
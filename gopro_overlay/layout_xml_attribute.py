@@ -4,7 +4,7 @@ from typing import Set
 
 from .exceptions import Defect
 
-common_attributes = {"name", "type"}
+common_attributes = {"name", "type", "update-rate"}
 
 
 # can wrap a method of class Widget(self, element, ...) or a plain function x(element,...)
@@ -0,0 +1,98 @@
+import xml.etree.ElementTree as ET
+from typing import Callable, Optional, Set
+
+from .layout_xml import attrib, component_type_of, metric_accessor_from
+
+# what components read from each entry, other than through their metric attributes
+component_fields = {
+    "text": set(),
+    "icon": set(),
+    "metric": set(),
+    "metric_unit": set(),
+    "datetime": {"dt"},
+    "gps_lock_icon": {"gpsfix"},
+    "moving_map": {"point", "azi"},
+    "journey_map": {"point"},
+    "moving_journey_map": {"point"},
+    "circuit_map": {"point"},
+    "cairo_circuit_map": {"point"},
+    "compass": {"cog"},
+    "compass_arrow": {"cog"},
+    "chart": {"timestamp"},
+    "gradient_chart": {"timestamp"},
+    "bar": set(),
+    "zone_bar": set(),
+    "asi": set(),
+    "msi": set(),
+    "msi2": set(),
+    "cairo_gauge_marker": set(),
+    "cairo_gauge_round_annotated": set(),
+    "cairo_gauge_arc_annotated": set(),
+    "cairo_gauge_donut": set(),
+}
+
+metric_attributes = ["metric", "arc-metric-upper", "arc-metric-lower"]
+
+default_metrics = {
+    "chart": "alt",
+    "gradient_chart": "alt",
+    "asi": "speed",
+    "msi": "speed",
+    "msi2": "speed",
+}
+
+
+class _FieldRecorder:
+    def __init__(self):
+        self.fields = set()
+
+    def __getattr__(self, item):
+        self.fields.add(item)
+        return None
+
+
+def fields_read_by(accessor: Callable) -> Set[str]:
+    """The entry fields a metric accessor looks at"""
+    recorder = _FieldRecorder()
+    try:
+        accessor(recorder)
+    except (AttributeError, TypeError, ValueError):
+        # accessors that look inside a field fail here, but the field has been recorded by then
+        pass
+    return recorder.fields
+
+
+def fields_from_xml(xml, include: Callable[[str], bool] = lambda name: True) -> Optional[Set[str]]:
+    """
+    Work out which entry fields a layout reads, without creating any widgets.
+
+    Returns None if the layout contains components that aren't known here, in which case any field could be needed.
+    """
+    root = ET.fromstring(xml)
+    fields = set()
+
+    def wanted(element):
+        name = attrib(element, "name", d=None)
+        return name is None or include(name)
+
+    def visit(element) -> bool:
+        if not wanted(element):
+            return True
+
+        if element.tag in ["composite", "translate", "frame"]:
+            return all(visit(child) for child in element)
+        if element.tag == "component":
+            component_type = component_type_of(element)
+            if component_type not in component_fields:
+                return False
+            fields.update(component_fields[component_type])
+            for name in metric_attributes:
+                metric = element.attrib.get(name, default_metrics.get(component_type) if name == "metric" else None)
+                if metric is not None:
+                    fields.update(fields_read_by(metric_accessor_from(metric)))
+            return True
+        return False
+
+    if not all(visit(child) for child in root):
+        return None
+    return fields
@@ -2,12 +2,12 @@ import dataclasses
 import traceback
 from pathlib import Path
 from subprocess import TimeoutExpired
-from typing import Set, Optional
+from typing import Set, Optional, Callable
 
 from gopro_overlay import gpx, fit
 from gopro_overlay.ffmpeg_gopro import FFMPEGGoPro, GoproRecording
 from gopro_overlay.framemeta import FrameMeta
-from gopro_overlay.framemeta_gpmd import LoadFlag, parse_gopro
+from gopro_overlay.framemeta_gpmd import LoadFlag, parse_gopro, streams_for
 from gopro_overlay.gpmd_filters import GPSLockFilter, NullGPSLockFilter
 from gopro_overlay.log import fatal
 from gopro_overlay.timeseries import Timeseries
@@ -35,8 +35,10 @@ class GoproLoader:
                  ffmpeg_gopro: FFMPEGGoPro,
                  units,
                  flags: Optional[Set[LoadFlag]] = None,
-                 gps_lock_filter: GPSLockFilter = NullGPSLockFilter()):
+                 gps_lock_filter: GPSLockFilter = NullGPSLockFilter(),
+                 framemeta_factory: Callable[[], FrameMeta] = FrameMeta):
         self.ffmpeg_gopro = ffmpeg_gopro
+        self.framemeta_factory = framemeta_factory
         self.units = units
         self.filter = gps_lock_filter
         self.flags = flags if flags is not None else None
@@ -49,11 +51,12 @@ class GoproLoader:
 
         try:
             frame_meta = parse_gopro(
-                recording.load_data(),
+                recording.load_gpmd(streams=streams_for(self.flags if self.flags is not None else set(LoadFlag))),
                 self.units,
                 recording.data,
                 flags=self.flags,
-                gps_lock_filter=self.filter
+                gps_lock_filter=self.filter,
+                framemeta_factory=self.framemeta_factory
             )
 
             return GoPro(recording=recording, framemeta=frame_meta)
@@ -0,0 +1,270 @@
+"""
+Just enough MP4 (ISO BMFF) to find a track's samples - where each one is in the file, how big it is, and when it is.
+
+GoPro files keep their GPMD metadata in a track whose samples have the format 'gpmd', so it can be read straight from the
+file, rather than running ffmpeg to copy it out.
+"""
+import os
+import struct
+import sys
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+_box_header = struct.Struct(">I4s")
+_u32 = struct.Struct(">I")
+_u64 = struct.Struct(">Q")
+
+# 'I' is 4 bytes almost everywhere, but is only promised to be at least 2
+_u32_typecode = "I" if array("I").itemsize == 4 else "L"
+
+
+def _pread(f: BinaryIO, size: int, offset: int) -> bytes:
+    if hasattr(os, "pread"):
+        return os.pread(f.fileno(), size, offset)
+    f.seek(offset)
+    return f.read(size)
+
+
+def _boxes(data, start: int, end: int) -> Iterator[Tuple[str, int, int]]:
+    """The type of each box from start to end, with where its contents start, and where it ends"""
+    offset = start
+    while offset + _box_header.size <= end:
+        size, kind = _box_header.unpack_from(data, offset)
+        header = _box_header.size
+        if size == 1:
+            size, = _u64.unpack_from(data, offset + header)
+            header += _u64.size
+        elif size == 0:
+            size = end - offset
+        if size < header or offset + size > end:
+            raise IOError(f"Malformed MP4 box '{kind.decode('latin-1')}' at {offset}")
+        yield kind.decode("latin-1"), offset + header, offset + size
+        offset += size
+
+
+def _child(data, start: int, end: int, *path: str) -> Optional[Tuple[int, int]]:
+    """The contents of the first box at the given path of box types, within start to end"""
+    for kind in path:
+        for found, contents, box_end in _boxes(data, start, end):
+            if found == kind:
+                start, end = contents, box_end
+                break
+        else:
+            return None
+    return start, end
+
+
+def _table(data, offset: int, count: int, typecode: str) -> array:
+    """count big-endian numbers from offset"""
+    table = array(typecode)
+    table.frombytes(data[offset:offset + count * table.itemsize])
+    if len(table) != count:
+        raise IOError(f"MP4 sample table is truncated - expected {count} entries, got {len(table)}")
+    if sys.byteorder == "little":
+        table.byteswap()
+    return table
+
+
+def _u32_table(data, offset: int, count: int) -> array:
+    return _table(data, offset, count, _u32_typecode)
+
+
+@dataclass(frozen=True)
+class Mp4Track:
+    index: int
+    handler: str
+    format: str
+    timescale: int
+    duration: int
+    offsets: array
+    sizes: array
+    durations: array
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def timestamps(self) -> List[int]:
+        """When each sample starts, in timescale units from the start of the track"""
+        times = []
+        time = 0
+        for duration in self.durations:
+            times.append(time)
+            time += duration
+        return times
+
+
+def _sample_durations(data, stts: Tuple[int, int]) -> array:
+    start, _ = stts
+    count, = _u32.unpack_from(data, start + 4)
+    entries = _u32_table(data, start + 8, count * 2)
+    durations = array(entries.typecode)
+    for sample_count, delta in zip(entries[0::2], entries[1::2]):
+        durations.extend(array(entries.typecode, [delta]) * sample_count)
+    return durations
+
+
+def _sample_sizes(data, stsz: Tuple[int, int]) -> array:
+    start, _ = stsz
+    size, count = struct.unpack_from(">II", data, start + 4)
+    if size != 0:
+        return array(_u32_typecode, [size]) * count
+    return _u32_table(data, start + 12, count)
+
+
+def _chunk_offsets(data, stbl: Tuple[int, int]) -> array:
+    stco = _child(data, *stbl, "stco")
+    if stco is not None:
+        count, = _u32.unpack_from(data, stco[0] + 4)
+        return array("Q", _u32_table(data, stco[0] + 8, count))
+    co64 = _child(data, *stbl, "co64")
+    if co64 is not None:
+        count, = _u32.unpack_from(data, co64[0] + 4)
+        return _table(data, co64[0] + 8, count, "Q")
+    raise IOError("MP4 track has no chunk offsets (stco/co64)")
+
+
+def _sample_offsets(data, stbl: Tuple[int, int], sizes: array) -> array:
+    chunk_offsets = _chunk_offsets(data, stbl)
+
+    stsc = _child(data, *stbl, "stsc")
+    if stsc is None:
+        raise IOError("MP4 track has no sample to chunk table (stsc)")
+    count, = _u32.unpack_from(data, stsc[0] + 4)
+    entries = _u32_table(data, stsc[0] + 8, count * 3)
+    first_chunks = entries[0::3]
+    samples_per_chunk = entries[1::3]
+
+    offsets = array("Q")
+    sample = 0
+    for run, (first_chunk, per_chunk) in enumerate(zip(first_chunks, samples_per_chunk)):
+        # chunks are numbered from 1, and each run lasts until the next one starts
+        last_chunk = first_chunks[run + 1] - 1 if run + 1 < len(first_chunks) else len(chunk_offsets)
+        for chunk in range(first_chunk - 1, last_chunk):
+            offset = chunk_offsets[chunk]
+            for _ in range(per_chunk):
+                if sample >= len(sizes):
+                    return offsets
+                offsets.append(offset)
+                offset += sizes[sample]
+                sample += 1
+
+    if len(offsets) != len(sizes):
+        raise IOError(f"MP4 chunks only hold {len(offsets)} of {len(sizes)} samples")
+    return offsets
+
+
+def _track(data, trak: Tuple[int, int]) -> Optional[Tuple[str, str, Tuple[int, int]]]:
+    mdia = _child(data, *trak, "mdia")
+    if mdia is None:
+        return None
+    hdlr = _child(data, *mdia, "hdlr")
+    stbl = _child(data, *mdia, "minf", "stbl")
+    if hdlr is None or stbl is None:
+        return None
+    stsd = _child(data, *stbl, "stsd")
+    if stsd is None:
+        return None
+
+    handler = bytes(data[hdlr[0] + 8:hdlr[0] + 12]).decode("latin-1")
+    entry = next(_boxes(data, stsd[0] + 8, stsd[1]), None)
+    sample_format = entry[0] if entry is not None else None
+    return handler, sample_format, stbl
+
+
+def _read_track(data, index: int, trak: Tuple[int, int], handler: str, sample_format: str,
+                stbl: Tuple[int, int]) -> Mp4Track:
+    mdhd = _child(data, *trak, "mdia", "mdhd")
+    if mdhd is None:
+        raise IOError("MP4 track has no media header (mdhd)")
+    version = data[mdhd[0]]
+    if version == 1:
+        timescale, duration = struct.unpack_from(">IQ", data, mdhd[0] + 20)
+    else:
+        timescale, duration = struct.unpack_from(">II", data, mdhd[0] + 12)
+
+    stts = _child(data, *stbl, "stts")
+    stsz = _child(data, *stbl, "stsz")
+    if stts is None or stsz is None:
+        raise IOError("MP4 track has no sample times (stts) or sizes (stsz)")
+
+    sizes = _sample_sizes(data, stsz)
+    durations = _sample_durations(data, stts)
+    if len(durations) != len(sizes):
+        raise IOError(f"MP4 track has times for {len(durations)} samples, but sizes for {len(sizes)}")
+
+    return Mp4Track(
+        index=index,
+        handler=handler,
+        format=sample_format,
+        timescale=timescale,
+        duration=duration,
+        offsets=_sample_offsets(data, stbl, sizes),
+        sizes=sizes,
+        durations=durations,
+    )
+
+
+def _read_moov(f: BinaryIO) -> bytes:
+    offset = 0
+    while True:
+        header = _pread(f, 16, offset)
+        if len(header) < _box_header.size:
+            raise IOError("Not an MP4 file - no 'moov' box found")
+        size, kind = _box_header.unpack_from(header)
+        contents = _box_header.size
+        if size == 1:
+            if len(header) < 16:
+                raise IOError("Truncated MP4 box header")
+            size, = _u64.unpack_from(header, _box_header.size)
+            contents += _u64.size
+        elif size == 0:
+            size = os.fstat(f.fileno()).st_size - offset
+        if size < contents:
+            raise IOError(f"Malformed MP4 box '{kind.decode('latin-1')}' at {offset}")
+        if kind == b"moov":
+            return _pread(f, size - contents, offset + contents)
+        offset += size
+
+
+def find_track(filepath: Path, sample_format: str) -> Optional[Mp4Track]:
+    """The first track with samples of the given format (e.g. 'gpmd'), or None if there isn't one"""
+    with open(filepath, "rb") as f:
+        moov = memoryview(_read_moov(f))
+
+    index = 0
+    for kind, start, end in _boxes(moov, 0, len(moov)):
+        if kind != "trak":
+            continue
+        found = _track(moov, (start, end))
+        if found is not None and found[1] == sample_format:
+            return _read_track(moov, index, (start, end), *found)
+        index += 1
+    return None
+
+
+def _read_exactly(f: BinaryIO, size: int, offset: int) -> bytes:
+    data = _pread(f, size, offset)
+    if len(data) != size:
+        raise IOError(f"MP4 file is truncated - wanted {size} bytes at {offset}, but got {len(data)}")
+    return data
+
+
+def read_samples(filepath: Path, track: Mp4Track, chunk: int = 1024 * 1024) -> Iterator[bytes]:
+    """
+    The track's samples, one after another, read straight from the file. Samples that are next to each other in the
+    file are read together, up to about chunk bytes at a time.
+    """
+    with open(filepath, "rb") as f:
+        start = None
+        end = None
+        for offset, size in zip(track.offsets, track.sizes):
+            if start is not None and offset == end and end - start < chunk:
+                end += size
+                continue
+            if start is not None:
+                yield _read_exactly(f, end - start, start)
+            start, end = offset, offset + size
+        if start is not None:
+            yield _read_exactly(f, end - start, start)
@@ -0,0 +1,176 @@
+"""
+Just enough of the NUT container (https://ffmpeg.org/~michael/nut.txt) to send timestamped rgba frames to ffmpeg.
+
+Headerless rawvideo has no timestamps, so every frame must be sent, even if it is the same as the last one. In NUT
+each frame has its own pts, so runs of identical frames can be sent once.
+"""
+import struct
+
+from gopro_overlay.dimensions import Dimension
+
+ID_STRING = b"nut/multimedia container\x00"
+
+MAIN_STARTCODE = 0x4E4D7A561F5F04AD
+STREAM_STARTCODE = 0x4E5311405BF2F9DB
+SYNCPOINT_STARTCODE = 0x4E4BE4ADEECA4569
+
+FLAG_KEY = 1
+FLAG_CODED_PTS = 8
+FLAG_SIZE_MSB = 32
+FLAG_CHECKSUM = 64
+FLAG_CODED = 4096
+
+VERSION = 3
+MAX_DISTANCE = 32768
+MSB_PTS_SHIFT = 7
+
+
+def _crc_table():
+    table = []
+    for i in range(256):
+        crc = i << 24
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x04C11DB7) if crc & 0x80000000 else (crc << 1)
+        table.append(crc & 0xFFFFFFFF)
+    return table
+
+
+crc_table = _crc_table()
+
+
+def crc32(data: bytes, crc: int = 0) -> int:
+    """CRC as used by NUT - polynomial 0x04C11DB7, not reflected, starting at 0"""
+    for b in data:
+        crc = ((crc << 8) & 0xFFFFFFFF) ^ crc_table[(crc >> 24) ^ b]
+    return crc
+
+
+def v(n: int) -> bytes:
+    if n < 0:
+        raise ValueError("Can't encode negative number as unsigned")
+    out = [n & 0x7F]
+    n >>= 7
+    while n:
+        out.append(0x80 | (n & 0x7F))
+        n >>= 7
+    return bytes(reversed(out))
+
+
+def s(n: int) -> bytes:
+    return v(2 * n - 1 if n > 0 else -2 * n)
+
+
+def vb(b: bytes) -> bytes:
+    return v(len(b)) + b
+
+
+def packet(startcode: int, data: bytes) -> bytes:
+    forward_ptr = len(data) + 4
+    header = struct.pack(">Q", startcode) + v(forward_ptr)
+    if forward_ptr > 4096:
+        header += struct.pack(">I", crc32(header))
+    return header + data + struct.pack(">I", crc32(data))
+
+
+class NUTMuxer:
+    """Writes a single stream of rgba rawvideo frames, with timestamps in the given time base (1/time_base seconds)"""
+
+    def __init__(self, writer, size: Dimension, time_base: int = 1000):
+        self.writer = writer
+        self.size = size
+        self.time_base = time_base
+        self.position = 0
+        self.last_syncpoint = None
+
+    def _write(self, data: bytes):
+        self.writer.write(data)
+        self.position += len(data)
+
+    def _main_header(self) -> bytes:
+        return b"".join([
+            v(VERSION),
+            v(1),  # stream count
+            v(MAX_DISTANCE),
+            v(1), v(1), v(self.time_base),  # a single time base
+            # a single frame code definition - flags are always coded in the frame header
+            v(FLAG_CODED), v(6), s(0), v(1), v(0), v(0), v(0), v(255),
+        ])
+
+    def _stream_header(self) -> bytes:
+        return b"".join([
+            v(0),  # stream id
+            v(0),  # class = video
+            vb(b"RGBA"),
+            v(0),  # time base id
+            v(MSB_PTS_SHIFT),
+            v(1 << 30),  # max pts distance
+            v(0),  # decode delay
+            v(0),  # flags
+            vb(b""),  # codec specific data
+            v(self.size.x), v(self.size.y),
+            v(0), v(0),  # unknown sample aspect ratio
+            v(0),  # colourspace
+        ])
+
+    def _syncpoint(self, pts: int) -> bytes:
+        previous = self.last_syncpoint if self.last_syncpoint is not None else self.position
+        self.last_syncpoint = self.position
+        return packet(SYNCPOINT_STARTCODE, v(pts) + v((self.position - previous) // 16))
+
+    def write_header(self):
+        self._write(ID_STRING)
+        self._write(packet(MAIN_STARTCODE, self._main_header()))
+        self._write(packet(STREAM_STARTCODE, self._stream_header()))
+
+    def write_frame(self, pts: int, data):
+        if self.position == 0:
+            self.write_header()
+
+        # frames are much bigger than max_distance, so each needs its own syncpoint, and a checksum
+        self._write(self._syncpoint(pts))
+
+        flags = FLAG_KEY | FLAG_CODED_PTS | FLAG_SIZE_MSB | FLAG_CHECKSUM
+        header = bytes([0]) + v(flags ^ FLAG_CODED) + v(pts + (1 << MSB_PTS_SHIFT)) + v(len(data))
+        self._write(header + struct.pack(">I", crc32(header)))
+        self._write(data)
+
+
+class DeduplicatingWriter:
+    """
+    Takes overlay frames, one per frame_duration, and only sends them on when they differ from the previous one.
+
+    The last frame is always sent on flush, so the stream lasts as long as it should.
+    """
+
+    def __init__(self, muxer: NUTMuxer, frame_duration: int):
+        self.muxer = muxer
+        self.frame_duration = frame_duration
+        self.frames = 0
+        self.skipped = 0
+        self.previous = None
+        self.pending = False
+
+    def write(self, frame):
+        pts = self.frames * self.frame_duration
+        self.frames += 1
+
+        # frames are the same size every time, so keep one copy of the last one, and compare against it in place
+        if self.previous is None:
+            self.previous = bytearray(len(frame))
+        elif self.previous == frame:
+            self.skipped += 1
+            self.pending = True
+            return
+
+        self.previous[:] = frame
+        self.pending = False
+        self.muxer.write_frame(pts, frame)
+
+    def flush(self):
+        if self.pending:
+            self.pending = False
+            self.muxer.write_frame((self.frames - 1) * self.frame_duration, self.previous)
+        self.muxer.writer.flush()
+
+    def fileno(self):
+        return self.muxer.writer.fileno()
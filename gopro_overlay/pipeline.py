@@ -0,0 +1,145 @@
+import itertools
+from typing import Callable, Iterable, List, Optional, Set
+
+from .entry import Entry
+
+
+def _batched(processor):
+    return lambda items: [processor(item) for item in items]
+
+
+def _batched_deltas(processor):
+    return lambda pairs, skip: [processor(a, b, skip) for a, b in pairs]
+
+
+class Stage:
+
+    def __init__(self, processor, skip: int, filter_fn: Callable[[Entry], bool], target: Optional[int],
+                 produces: Optional[Set[str]] = None, needs: Optional[Set[str]] = None):
+        self.processor = processor
+        self.skip = skip
+        self.filter_fn = filter_fn
+        # None: the processor is given single entries. 0/1: given pairs, and updates the first/second of the pair
+        self.target = target
+        # the fields this stage writes, or None if it always needs to run, and the fields it reads
+        self.produces = produces
+        self.needs = needs or set()
+
+    def run(self, window: List[Entry], base: int, lo: int, hi: int):
+        """Process the entries (or pairs ending at the entries) with index lo to hi, where window[0] is index base"""
+        filter_fn = self.filter_fn
+        if self.target is not None:
+            lo = max(lo, self.skip)
+        if lo >= hi:
+            return
+
+        if self.target is None:
+            items = [e for e in window[lo - base:hi - base] if filter_fn(e)]
+            if items:
+                for entry, updates in zip(items, self.processor(items)):
+                    if updates:
+                        entry.update(**updates)
+        else:
+            pairs = [
+                (a, b) for a, b in zip(window[lo - self.skip - base:hi - self.skip - base], window[lo - base:hi - base])
+                if filter_fn(a) and filter_fn(b)
+            ]
+            if pairs:
+                for pair, updates in zip(pairs, self.processor(pairs, self.skip)):
+                    if updates:
+                        pair[self.target].update(**updates)
+
+
+class Pipeline:
+    """
+    Runs processing stages, declared in the same way as FrameMeta.process*, in a single pass over the entries rather
+    than one pass each.
+
+    Each stage runs a fixed number of entries behind the newest, far enough that all earlier stages have finished with
+    every entry it looks at, and no later stage has started on them, so the output is the same as running the stages
+    one after another. Only enough entries for the longest lookback are kept.
+    """
+
+    def __init__(self):
+        self.stages: List[Stage] = []
+
+    def process(self, processor, filter_fn: Callable[[Entry], bool] = lambda e: True, **kwargs) -> 'Pipeline':
+        return self.process_batch(_batched(processor), filter_fn=filter_fn, **kwargs)
+
+    def process_batch(self, processor, filter_fn: Callable[[Entry], bool] = lambda e: True,
+                      **kwargs) -> 'Pipeline':
+        self.stages.append(Stage(processor, 0, filter_fn, target=None, **kwargs))
+        return self
+
+    def process_deltas(self, processor, skip=1, filter_fn: Callable[[Entry], bool] = lambda e: True,
+                       **kwargs) -> 'Pipeline':
+        return self.process_deltas_batch(_batched_deltas(processor), skip=skip, filter_fn=filter_fn, **kwargs)
+
+    def process_deltas_batch(self, processor, skip=1, filter_fn: Callable[[Entry], bool] = lambda e: True,
+                             **kwargs) -> 'Pipeline':
+        self.stages.append(Stage(processor, skip, filter_fn, target=0, **kwargs))
+        return self
+
+    def process_accel(self, processor, skip=1, filter_fn: Callable[[Entry], bool] = lambda e: True,
+                      **kwargs) -> 'Pipeline':
+        self.stages.append(Stage(_batched_deltas(processor), skip, filter_fn, target=1, **kwargs))
+        return self
+
+    def needed_for(self, fields: Optional[Set[str]]) -> 'Pipeline':
+        """
+        Just the stages that produce the given fields, the stages they need in turn, and the stages that always
+        run - or all of them if fields is None. Stages are declared in order, so a stage can only need earlier ones.
+        """
+        if fields is None:
+            return self
+
+        wanted = set(fields)
+        needed = []
+        for stage in reversed(self.stages):
+            if stage.produces is None or stage.produces & wanted:
+                needed.append(stage)
+                wanted |= stage.needs
+
+        pipeline = Pipeline()
+        pipeline.stages = list(reversed(needed))
+        return pipeline
+
+    def delays(self) -> List[int]:
+        """How many entries behind the newest each stage runs"""
+        delays = []
+        delay = 0
+        for stage in self.stages:
+            delays.append(delay)
+            delay += stage.skip
+        return delays
+
+    def lag(self) -> int:
+        return max((delay + stage.skip for stage, delay in zip(self.stages, self.delays())), default=0)
+
+    def run(self, entries: Iterable[Entry], chunk: int = 1024):
+        scheduled = list(zip(self.stages, self.delays()))
+        lag = self.lag()
+
+        source = iter(entries)
+        window: List[Entry] = []
+        base = 0
+        count = 0
+        head = 0
+
+        while True:
+            new = list(itertools.islice(source, chunk))
+            count += len(new)
+            window.extend(new)
+            finished = len(new) < chunk
+
+            next_head = count + lag if finished else count
+            for stage, delay in scheduled:
+                stage.run(window, base, max(head - delay, 0), min(next_head - delay, count))
+            head = next_head
+
+            if finished:
+                return
+
+            drop = max(0, len(window) - lag)
+            del window[:drop]
+            base += drop
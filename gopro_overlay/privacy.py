@@ -1,20 +1,21 @@
-from geographiclib.geodesic import Geodesic
-
+from .geodesy import Geodesy, ellipsoidal, haversine
 from .units import units
 
 
 class PrivacyZone:
 
-    def __init__(self, point, dist):
+    def __init__(self, point, dist, geodesy: Geodesy = ellipsoidal):
         self.point = point
         self.dist = dist
+        self.geodesy = geodesy
+        self.metres = dist.m_as(units.m)
 
     def encloses(self, point):
-        actual = units.Quantity(
-            abs(Geodesic.WGS84.Inverse(self.point.lat, self.point.lon, point.lat, point.lon)['s12']),
-            units.m
-        )
-        return actual <= self.dist
+        # a sphere is within 0.5% of the ellipsoid, so only points near the edge need the exact distance
+        rough = haversine.distance(self.point.lat, self.point.lon, point.lat, point.lon)
+        if self.geodesy is haversine or abs(rough - self.metres) > self.metres * 0.01 + 1.0:
+            return rough <= self.metres
+        return abs(self.geodesy.distance(self.point.lat, self.point.lon, point.lat, point.lon)) <= self.metres
 
     def __str__(self):
         return f"PrivacyZone: {self.dist} around {self.point}"
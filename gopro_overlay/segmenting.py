@@ -0,0 +1,76 @@
+import multiprocessing
+import sys
+import traceback
+from pathlib import Path
+from typing import List, Tuple, Callable
+
+from gopro_overlay.log import log
+from gopro_overlay.timeunits import Timeunit, timeunits
+
+
+def segment_ranges(duration: Timeunit, keyframes: List[Timeunit], segments: int) -> List[Tuple[Timeunit, Timeunit]]:
+    """
+    Split the video into (at most) the given number of time ranges, each starting on a keyframe, so each range can be
+    decoded on its own without wasted work. Fewer ranges are returned if there aren't enough keyframes.
+    """
+    if segments < 1:
+        raise ValueError("Need at least one segment")
+
+    candidates = sorted(k for k in keyframes if timeunits(millis=0) < k < duration)
+
+    cuts = []
+    for i in range(1, segments):
+        ideal = duration * (i / segments)
+        later = [k for k in candidates if not cuts or k > cuts[-1]]
+        if not later:
+            break
+        cuts.append(min(later, key=lambda k: abs(k - ideal)))
+
+    points = [timeunits(millis=0)] + sorted(set(cuts)) + [duration]
+    return list(zip(points, points[1:]))
+
+
+def segment_path(output: Path, index: int) -> Path:
+    return output.with_name(f"{output.stem}.part{index:03d}{output.suffix}")
+
+
+def p_segment(index: int, start: Timeunit, end: Timeunit, render: Callable[[int, Timeunit, Timeunit], None]):
+    try:
+        render(index, start, end)
+    except KeyboardInterrupt:
+        sys.exit(1)
+    except Exception:
+        log(f"Segment {index} failed: {traceback.format_exc()}")
+        sys.exit(1)
+
+
+class SegmentedRender:
+    """
+    Render each time range in its own process, each with its own ffmpeg, so both drawing and encoding use more cores.
+
+    Like RingBuffer this relies on 'fork', so won't work on Windows
+    """
+
+    def __init__(self, ranges: List[Tuple[Timeunit, Timeunit]], render: Callable[[int, Timeunit, Timeunit], None]):
+        self.ranges = ranges
+        self.render = render
+        self.context = multiprocessing.get_context("fork")
+
+    def run(self):
+        processes = [
+            self.context.Process(target=p_segment, args=(index, start, end, self.render))
+            for index, (start, end) in enumerate(self.ranges)
+        ]
+
+        try:
+            [p.start() for p in processes]
+            [p.join() for p in processes]
+        finally:
+            for p in processes:
+                if p.is_alive():
+                    p.terminate()
+                    p.join(timeout=1.0)
+
+        failed = [index for index, p in enumerate(processes) if p.exitcode != 0]
+        if failed:
+            raise IOError(f"Segments {failed} failed to render")
@@ -0,0 +1,169 @@
+import ctypes
+import multiprocessing
+import os
+import queue
+import traceback
+from io import BufferedWriter
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, ContextManager, Tuple
+
+from PIL import ImageDraw
+
+from gopro_overlay.buffering import raw_image
+from gopro_overlay.dimensions import Dimension
+from gopro_overlay.framemeta import Stepper
+from gopro_overlay.layout import Overlay
+from gopro_overlay.log import log
+from gopro_overlay.progresstrack import ProgressTracker
+
+worker_poll_timeout = 1.0
+
+
+class ShardSlots:
+    """A set of frame-sized slots in a shared memory block, belonging to a single worker"""
+
+    def __init__(self, context, shm: SharedMemory, size: Dimension, background: Tuple, worker: int, slots: int):
+        self.shm = shm
+        self.size = size
+        self.background = background
+        self.slots = slots
+        self.buffer_size = size.x * size.y * 4
+        self.first = worker * slots
+
+        self.free = context.Semaphore(slots)
+        self.ready = context.Queue()
+
+        self._images = None
+
+    def memory(self, slot: int):
+        offset = self.buffer_size * (self.first + slot)
+        return self.shm.buf[offset:offset + self.buffer_size]
+
+    def _slot_images(self):
+        if self._images is None:
+            self._images = []
+            for slot in range(self.slots):
+                memory = self.memory(slot)
+                image = raw_image(self.size, memory)
+                self._images.append((image, ImageDraw.ImageDraw(image), ctypes.c_char.from_buffer(memory)))
+        return self._images
+
+    def draw(self, slot: int, f: Callable):
+        image, draw, ctypes_buffer = self._slot_images()[slot]
+        ctypes.memset(ctypes.byref(ctypes_buffer), 0x00, self.buffer_size)
+        if self.background != (0, 0, 0, 0):
+            draw.rectangle((0, 0, self.size.x, self.size.y), self.background)
+        f(image)
+
+
+def p_shard(index: int, workers: int, slots: ShardSlots, stepper: Stepper,
+            create_overlay: Callable[[], ContextManager[Overlay]]):
+    try:
+        shard = stepper.shard(index, workers)
+        with create_overlay() as overlay:
+            for count, dt in enumerate(shard.steps()):
+                frame_number = index + count * workers
+                slots.free.acquire()
+                slots.draw(
+                    count % slots.slots,
+                    lambda image: overlay.draw(dt, image)
+                )
+                slots.ready.put((frame_number, None))
+    except KeyboardInterrupt:
+        pass
+    except Exception:
+        slots.ready.put((-1, traceback.format_exc()))
+
+
+class ShardedRenderer:
+    """
+    Render frames using a number of worker processes, each with its own Overlay.
+
+    Frames are dealt out to the workers round-robin, so frame n is always drawn by worker n % workers, and
+    the frames are written to the writer in strict timestamp order.
+
+    Like RingBuffer this relies on 'fork', so won't work on Windows
+    """
+
+    def __init__(self, size: Dimension, background: Tuple, writer: BufferedWriter, workers: int, slots: int = 2):
+        if workers < 1:
+            raise ValueError("Need at least one worker")
+        if slots < 1:
+            raise ValueError("Need at least one slot per worker")
+
+        self.size = size
+        self.background = background
+        self.writer = writer
+        self.workers = workers
+        self.slots = slots
+
+        self.context = multiprocessing.get_context("fork")
+
+        self.shm = None
+        self.shards = []
+        self.processes = []
+
+    def __enter__(self):
+        buffer_size = self.size.x * self.size.y * 4
+        self.shm = SharedMemory(create=True, name=f"gopro.shard.{os.getpid()}",
+                                size=buffer_size * self.slots * self.workers)
+        self.shards = [
+            ShardSlots(self.context, self.shm, self.size, self.background, worker, self.slots)
+            for worker in range(self.workers)
+        ]
+        return self
+
+    def __exit__(self, *args):
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+            process.join(timeout=1.0)
+        self.processes = []
+        self.shards = []
+        self.shm.close()
+        self.shm.unlink()
+
+    def _next_ready(self, worker: int, frame_number: int):
+        shard = self.shards[worker]
+        process = self.processes[worker]
+        while True:
+            try:
+                number, error = shard.ready.get(timeout=worker_poll_timeout)
+                break
+            except queue.Empty:
+                if not process.is_alive():
+                    raise IOError(f"Render worker {worker} exited unexpectedly (code {process.exitcode})") from None
+
+        if error is not None:
+            log(error)
+            raise IOError(f"Render worker {worker} failed")
+        if number != frame_number:
+            raise IOError(f"Render worker {worker} produced frame {number}, expecting {frame_number}")
+
+    def render(self, stepper: Stepper, create_overlay: Callable[[], ContextManager[Overlay]],
+               progress: ProgressTracker = ProgressTracker()):
+
+        self.processes = [
+            self.context.Process(
+                target=p_shard,
+                args=(worker, self.workers, self.shards[worker], stepper, create_overlay),
+                daemon=True
+            ) for worker in range(self.workers)
+        ]
+        [p.start() for p in self.processes]
+
+        for frame_number in range(len(stepper)):
+            worker = frame_number % self.workers
+            shard = self.shards[worker]
+
+            self._next_ready(worker, frame_number)
+
+            memory = shard.memory((frame_number // self.workers) % self.slots)
+            try:
+                self.writer.write(memory)
+            finally:
+                memory.release()
+
+            shard.free.release()
+            progress.update(frame_number)
+
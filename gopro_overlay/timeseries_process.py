@@ -1,5 +1,6 @@
 from geographiclib.geodesic import Geodesic
 
+from .geodesy import Geodesy, ellipsoidal
 from .gpmf import GPS_FIXED_VALUES
 from .point import PintPoint3, Point
 from .smoothing import Kalman, SimpleExponential
@@ -43,6 +44,62 @@ def process_ses(new, key, alpha=0.4):
     return process
 
 
+def _magnitudes(values):
+    """Plain numbers for the values, and the units they were in, if they were quantities"""
+    unit = next((v.units for v in values if isinstance(v, units.Quantity)), None)
+    if unit is None:
+        return values, lambda m: m
+    return [v.m_as(unit) if v is not None else None for v in values], lambda m: units.Quantity(m, unit)
+
+
+def process_kalman_pp3_batch(new, key):
+    """process_kalman_pp3, for process_batch, smoothing each of x, y and z in one go"""
+    kx = Kalman()
+    ky = Kalman()
+    kz = Kalman()
+
+    def process(items):
+        xyzs = [key(item) for item in items]
+        xs, x_quantity = _magnitudes([xyz.x for xyz in xyzs])
+        ys, y_quantity = _magnitudes([xyz.y for xyz in xyzs])
+        zs, z_quantity = _magnitudes([xyz.z for xyz in xyzs])
+
+        return [
+            {new: PintPoint3(x=x_quantity(x), y=y_quantity(y), z=z_quantity(z))}
+            for x, y, z in zip(kx.update_all(xs), ky.update_all(ys), kz.update_all(zs))
+        ]
+
+    return process
+
+
+def process_kalman_batch(new, key):
+    """process_kalman, for process_batch, smoothing all the values in one go"""
+    k = Kalman()
+
+    def process(items):
+        values = [key(item) for item in items]
+        present = [v for v in values if v is not None]
+        magnitudes, quantity = _magnitudes(present)
+        smoothed = iter(k.update_all(magnitudes))
+        return [{new: quantity(next(smoothed))} if v is not None else None for v in values]
+
+    return process
+
+
+def process_ses_batch(new, key, alpha=0.4):
+    """process_ses, for process_batch, smoothing all the values in one go"""
+    ses = SimpleExponential(alpha=alpha)
+
+    def process(items):
+        values = [key(item) for item in items]
+        if all(isinstance(v, units.Quantity) for v in values):
+            magnitudes, quantity = _magnitudes(values)
+            return [{new: quantity(v)} for v in ses.update_all(magnitudes)]
+        return [{new: v} for v in ses.update_all(values)]
+
+    return process
+
+
 def distance_azi_between(a: Point, b: Point):
     inverse = Geodesic.WGS84.Inverse(a.lat, a.lon, b.lat, b.lon)
     dist = units.Quantity(inverse['s12'], units.m)
@@ -79,6 +136,46 @@ def calculate_speeds():
     return accept
 
 
+def _inverse_of_pairs(geodesy: Geodesy, pairs):
+    return geodesy.inverse(
+        [a.point.lat for a, _ in pairs], [a.point.lon for a, _ in pairs],
+        [b.point.lat for _, b in pairs], [b.point.lon for _, b in pairs],
+    )
+
+
+def calculate_speeds_batch(geodesy: Geodesy = ellipsoidal):
+    """calculate_speeds, for process_deltas_batch, working out all the distances in one go"""
+    k = Kalman()
+
+    def accept(pairs, skip):
+        dists, azis = _inverse_of_pairs(geodesy, pairs)
+
+        # looking up units by name is slow, so only do it once
+        metres, seconds_unit, degrees = units.m, units.seconds, units.degree
+        mps = (units.Quantity(1.0, metres) / units.Quantity(1.0, seconds_unit)).units
+        quantity = units.Quantity
+
+        updates = []
+        for (a, b), dist, raw_azi in zip(pairs, dists, azis):
+            seconds = (b.dt - a.dt).total_seconds()
+            speed = dist / seconds if seconds > 0 else 0.0
+            smoothed = quantity(k.update(speed), mps)
+            raw_cog = 0 + raw_azi if raw_azi >= 0 else 360 + raw_azi
+
+            updates.append({
+                "cspeed": smoothed,
+                "cspeed.k": smoothed,
+                "cspeed.raw": quantity(speed, mps),
+                "dist": quantity(dist / skip, metres),
+                "time": quantity(seconds, seconds_unit),
+                "azi": quantity(raw_azi, degrees),
+                "cog": quantity(raw_cog, degrees),
+            })
+        return updates
+
+    return accept
+
+
 def calculate_accel():
     def accept(a, b, c):
         time = units.Quantity((b.dt - a.dt).total_seconds(), units.seconds)
@@ -138,3 +235,29 @@ def calculate_gradient():
                 }
 
     return accept
+
+
+def calculate_gradient_batch(geodesy: Geodesy = ellipsoidal):
+    """calculate_gradient, for process_deltas_batch, working out all the distances in one go"""
+    def accept(pairs, skip):
+        updates = [None] * len(pairs)
+        with_alt = [i for i, (a, b) in enumerate(pairs) if a.alt and b.alt]
+        dists, _ = _inverse_of_pairs(geodesy, [pairs[i] for i in with_alt])
+
+        for i, dist in zip(with_alt, dists):
+            if dist > 1.0:
+                a, b = pairs[i]
+                gain = b.alt - a.alt
+                grad = (gain / units.Quantity(dist, units.m)) * 100.0
+                field = "cgrad" if abs(grad.magnitude) < 45 else "bad_grad"
+
+                updates[i] = {
+                    field: grad,
+                    "grad_gain": gain,
+                    "grad_dist": units.Quantity(dist, units.m),
+                    "grad_other_packet": b.packet,
+                    "grad_other_packet_index": b.packet_index,
+                }
+        return updates
+
+    return accept
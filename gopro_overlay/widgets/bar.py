@@ -1,5 +1,6 @@
 from PIL import ImageDraw, Image
 
+from gopro_overlay.dimensions import Box
 from .widgets import Widget
 
 
@@ -34,6 +35,9 @@ class Bar(Widget):
         shifted = value - self.min_value
         return shifted * scale
 
+    def extent(self):
+        return Box(0, 0, self.size.x, self.size.y)
+
     def draw(self, image: Image, draw: ImageDraw):
         current = self.reading()
         draw.rounded_rectangle(
@@ -1,5 +1,6 @@
 from PIL import Image, ImageDraw
 
+from gopro_overlay.dimensions import Box
 from .map import draw_marker
 from .widgets import Widget
 
@@ -30,6 +31,10 @@ class SimpleChart(Widget):
         self.view = None
         self.image = None
 
+    def extent(self):
+        # one pixel wide for each sample in the window
+        return Box(0, 0, len(self.value().data), self.height)
+
     def draw(self, image: Image, draw: ImageDraw):
         view = self.value()
 
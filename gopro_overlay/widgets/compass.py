@@ -3,6 +3,7 @@ import math
 
 from PIL import Image, ImageDraw
 
+from gopro_overlay.dimensions import Box
 from .widgets import Widget
 
 
@@ -112,6 +113,9 @@ class Compass(Widget):
 
         return actual
 
+    def extent(self):
+        return Box(0, 0, self.size, self.size)
+
     def draw(self, image: Image, draw: ImageDraw):
         reading = - int(self.reading())
 
@@ -2,6 +2,7 @@ import functools
 
 from PIL import Image, ImageDraw
 
+from gopro_overlay.dimensions import Box
 from .compass import Compass
 from .widgets import Widget
 
@@ -66,6 +67,9 @@ class CompassArrow(Widget):
 
         return image
 
+    def extent(self):
+        return Box(0, 0, self.size, self.size)
+
     def draw(self, image: Image, draw: ImageDraw):
         reading = - int(self.reading())
 
@@ -0,0 +1,98 @@
+from typing import List, Optional
+
+from PIL import Image, ImageDraw
+
+from gopro_overlay.dimensions import Box, Dimension
+from gopro_overlay.point import Coordinate
+from gopro_overlay.widgets.widgets import Widget, Composite, Translate, ImageTranslate, DrawTranslate
+
+
+def leaves_of(widgets, at: Coordinate = Coordinate(0, 0)):
+    """Flatten Composites & Translates, so each leaf widget can be considered on its own"""
+    for w in widgets:
+        if isinstance(w, Composite):
+            yield from leaves_of(w.widgets, at)
+        elif isinstance(w, Translate):
+            yield from leaves_of([w.widget], at + w.at)
+        else:
+            yield at, w
+
+
+class DamageTrackingScene:
+    """
+    A Scene that keeps the previous frame, and only redraws the areas of it covered by widgets that have changed.
+
+    Each widget is asked if it has changed, and where it draws. If any widget doesn't know where it draws, the
+    whole frame is drawn as normal, the same as Scene.
+
+    Otherwise, the damaged areas are cleared back to the background, every widget touching them is redrawn into a
+    scratch image, and only the damaged areas are copied into the kept frame - so overlapping, partially transparent
+    widgets end up exactly as they would be when drawing the whole frame.
+    """
+
+    def __init__(self, widgets: List[Widget]):
+        self._widgets = widgets
+        self._leaves = list(leaves_of(widgets))
+        self._extents = None
+        self._blank = None
+        self._canvas = None
+        self._scratch = None
+
+    def _extent(self, at: Coordinate, widget: Widget) -> Optional[Box]:
+        extent = widget.extent()
+        return extent.translate(at.x, at.y) if extent is not None else None
+
+    def _draw_all(self, image: Image.Image, extents: List[Optional[Box]]):
+        # only worth keeping the background if damage can be tracked from here on
+        blank = image.copy() if all(e is not None for e in extents) else None
+
+        draw = ImageDraw.Draw(image)
+        for w in self._widgets:
+            w.draw(image, draw)
+
+        if blank is not None:
+            self._blank = blank
+            self._canvas = image.copy()
+            self._scratch = image.copy()
+            self._extents = extents
+        else:
+            self._canvas = None
+
+    def _draw_damaged(self, image: Image.Image, changed: List[bool], extents: List[Box]):
+        size = Dimension(*image.size)
+
+        damage = [
+            previous.union(current).clip(size)
+            for c, previous, current in zip(changed, self._extents, extents) if c
+        ]
+        damage = [box for box in damage if not box.empty()]
+
+        if damage:
+            scratch = self._scratch
+            for box in damage:
+                scratch.paste(self._blank.crop(box.tuple()), box.tuple())
+
+            draw = ImageDraw.Draw(scratch)
+            for (at, w), extent in zip(self._leaves, extents):
+                if any(extent.intersects(box) for box in damage):
+                    if at == Coordinate(0, 0):
+                        w.draw(scratch, draw)
+                    else:
+                        w.draw(ImageTranslate(at, scratch), DrawTranslate(at, draw))
+
+            for box in damage:
+                self._canvas.paste(scratch.crop(box.tuple()), box.tuple())
+
+        self._extents = extents
+        image.paste(self._canvas)
+
+    def draw(self, image: Image.Image) -> Image.Image:
+        changed = [w.changed() for _, w in self._leaves]
+        extents = [self._extent(at, w) for at, w in self._leaves]
+
+        if self._canvas is None or self._canvas.size != image.size or any(e is None for e in extents):
+            self._draw_all(image, extents)
+        else:
+            self._draw_damaged(image, changed, extents)
+
+        return image
@@ -1,5 +1,8 @@
+import functools
+
 from PIL import Image, ImageDraw
 
+from gopro_overlay.dimensions import Box
 from gopro_overlay.gpmf import GPSFix
 from .widgets import Widget
 
@@ -14,6 +17,20 @@ class GPSLock(Widget):
             GPSFix.LOCK_3D.value: lock_3d,
         }
         self.fix = fix
+        self.last = None
+
+    def changed(self) -> bool:
+        fix = self.fix()
+        changed = fix != self.last
+        self.last = fix
+        return changed
+
+    def extent(self):
+        # whichever icon is drawn, it is somewhere in here
+        extents = [w.extent() for w in self.w.values()]
+        if any(e is None for e in extents):
+            return None
+        return functools.reduce(Box.union, extents)
 
     def draw(self, image: Image, draw: ImageDraw):
         self.w[self.fix()].draw(image, draw)
@@ -2,6 +2,7 @@ from functools import cached_property
 
 from PIL import ImageDraw, Image
 
+from gopro_overlay.dimensions import Box
 from .widgets import Widget
 
 
@@ -73,6 +74,9 @@ class GradientBar(Widget):
         else:
             return self.z3_col
 
+    def extent(self):
+        return Box(0, 0, self.size.x, self.size.y)
+
     def draw(self, image: Image, draw: ImageDraw):
         current = self.reading()
         draw.rounded_rectangle(
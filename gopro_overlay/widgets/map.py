@@ -4,7 +4,7 @@ from typing import Callable
 import geotiler
 from PIL import ImageDraw, Image
 
-from gopro_overlay.dimensions import Dimension
+from gopro_overlay.dimensions import Dimension, Box
 from gopro_overlay.framemeta import FrameMeta
 from gopro_overlay.journey import Journey
 from gopro_overlay.log import log
@@ -122,6 +122,9 @@ class JourneyMap(Widget):
 
             self.image = self.border.rounded(image)
 
+    def extent(self):
+        return Box(0, 0, self.size, self.size).translate(self.at.x, self.at.y)
+
     def draw(self, image: Image, draw: ImageDraw):
         self._init_maybe()
 
@@ -182,6 +185,9 @@ class MovingMap(Widget):
 
         return self.border.rounded(crop)
 
+    def extent(self):
+        return Box(0, 0, self.size, self.size).translate(self.at.x, self.at.y)
+
     def draw(self, image: Image, draw: ImageDraw):
         location = self.location()
         if location.lon is not None and location.lat is not None:
@@ -250,6 +256,9 @@ class MovingJourneyMap(Widget):
 
         return map, map_image
 
+    def extent(self):
+        return Box(0, 0, self.size, self.size)
+
     def draw(self, image: Image, draw: ImageDraw):
         if self.cached_map is None:
             self.cached_map, self.cached_map_image = self._redraw()
@@ -301,6 +310,9 @@ class Circuit(Widget):
         y = int((((point.lon - self.bbox.min.lon) / self.size.y) * self.dimensions.y) + self.dimensions.y / 20)
         return x, y
 
+    def extent(self):
+        return Box(0, 0, *self.dimensions.tuple())
+
     def draw(self, image: Image, draw: ImageDraw):
         if self.image is None:
             journey = Journey()
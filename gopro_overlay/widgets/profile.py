@@ -15,6 +15,12 @@ class ProfiledWidget(Widget):
         with self.timer.timing(doprint=False):
             self.widget.draw(image, draw)
 
+    def changed(self):
+        return self.widget.changed()
+
+    def extent(self):
+        return self.widget.extent()
+
 
 class WidgetProfiler:
 
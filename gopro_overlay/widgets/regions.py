@@ -0,0 +1,102 @@
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from gopro_overlay.dimensions import Box, Dimension
+from gopro_overlay.log import log
+from gopro_overlay.point import Coordinate
+from gopro_overlay.timeunits import Timeunit
+from gopro_overlay.widgets.text import CachingText, Text
+from gopro_overlay.widgets.widgets import Widget, Composite, Translate
+
+
+def placed_widgets_of(widgets, at: Coordinate = Coordinate(0, 0)):
+    """
+    Each widget that draws something itself, with where it is drawn, looking through Composites, Translates, and
+    widgets that just wrap another one, like profiling or scheduling
+    """
+    for w in widgets:
+        if isinstance(w, Composite):
+            yield from placed_widgets_of(w.widgets, at)
+        elif isinstance(w, Translate):
+            yield from placed_widgets_of([w.widget], at + w.at)
+        elif isinstance(getattr(w, "widget", None), Widget):
+            yield from placed_widgets_of([w.widget], at)
+        else:
+            yield at, w
+
+
+def merge_boxes(boxes: List[Box], gap: int = 0) -> List[Box]:
+    """Merge boxes that overlap, or are within gap pixels of each other, until none do"""
+    merged = list(boxes)
+    changed = True
+    while changed:
+        changed = False
+        for i in range(len(merged)):
+            grown = Box(merged[i].x0 - gap, merged[i].y0 - gap, merged[i].x1 + gap, merged[i].y1 + gap)
+            for j in range(i + 1, len(merged)):
+                if grown.intersects(merged[j]):
+                    merged[i] = merged[i].union(merged.pop(j))
+                    changed = True
+                    break
+            if changed:
+                break
+    return sorted(merged, key=lambda b: (b.y0, b.x0))
+
+
+def _union(boxes: Iterable[Box]) -> Optional[Box]:
+    union = None
+    for box in boxes:
+        union = box if union is None else union.union(box)
+    return union
+
+
+def measure_regions(widgets: List[Widget], size: Dimension, times: Iterable[Tuple[Timeunit, object]],
+                    set_time: Callable, gap: int = 32) -> Optional[List[Box]]:
+    """
+    Works out which areas of the frame the widgets will draw into, at any of the given (time, entry), from the
+    widgets' own extent(). Text is measured for every value it will show, as that is what changes its size.
+
+    Returns a small number of non-overlapping boxes, or None if any widget doesn't know where it draws, in which case
+    the whole frame is needed.
+    """
+    placed = list(placed_widgets_of(widgets))
+    texts = [(at, w) for at, w in placed if isinstance(w, (CachingText, Text))]
+    others = [(at, w) for at, w in placed if not isinstance(w, (CachingText, Text))]
+
+    boxes = []
+    values = [set() for _ in texts]
+    first = True
+
+    for time, entry in times:
+        set_time(time, entry)
+        if first:
+            # everything apart from text is drawn the same size whatever the time
+            for at, w in others:
+                extent = w.extent()
+                if extent is None:
+                    log(f"Can't tell where {w.__class__.__name__} draws")
+                    return None
+                boxes.append(extent.translate(at.x, at.y))
+            first = False
+
+        for (_, text), seen in zip(texts, values):
+            value = text.value()
+            if not isinstance(value, str):
+                log(f"Text at {text.at} has value {value!r} at {time}")
+                return None
+            seen.add(value)
+
+    if first:
+        return None
+
+    for (at, text), seen in zip(texts, values):
+        try:
+            extent = _union(text.extent_of(value) for value in seen)
+        except (OSError, KeyError, ValueError) as e:
+            # the font can't lay out the text, which will fail when drawn anyway
+            log(f"Can't measure text at {text.at}: {e}")
+            return None
+        if extent is not None:
+            boxes.append(extent.translate(at.x, at.y))
+
+    clipped = [b.clip(size) for b in boxes]
+    return merge_boxes([b for b in clipped if not b.empty()], gap=gap)
@@ -0,0 +1,92 @@
+import functools
+import math
+from typing import Callable, Optional, Tuple
+
+from PIL import Image, ImageChops, ImageDraw
+
+from gopro_overlay.dimensions import Box
+from gopro_overlay.point import Coordinate
+from gopro_overlay.timeunits import Timeunit
+from gopro_overlay.widgets.widgets import Widget
+
+
+class Scheduled(Widget):
+    """
+    Only redraw the child widget a given number of times a second of video, replaying what it last drew in between.
+
+    When it is due, the child is drawn straight onto the frame, as it would be without a schedule, and the pixels it
+    changed are kept. In between, those pixels are put back exactly as they were, so the result is the same as drawing
+    the child, as long as whatever is underneath it hasn't changed.
+
+    The child needs to know where it draws, via extent(), or draw at positive coordinates, in which case the whole
+    image is checked for changes.
+    """
+
+    def __init__(self, widget: Widget, hz: float, clock: Callable[[], Timeunit]):
+        if hz <= 0:
+            raise ValueError("Update rate needs to be positive")
+        self.widget = widget
+        self.hz = hz
+        self.clock = clock
+
+        self.drawn = None
+        self.asked = None
+        self.sprite = None
+        self.mask = None
+        self.at = None
+
+    def _period(self) -> int:
+        return math.floor(self.clock().us * self.hz / 1000000)
+
+    def _ask(self, period: int):
+        # the child is only asked once for each time it is drawn
+        if self.asked != period:
+            self.asked = period
+            self.widget.changed()
+
+    def _box(self, size: Tuple[int, int]) -> Tuple[int, int, int, int]:
+        box = self.widget.extent()
+        if box is None:
+            box = Box(0, 0, *size)
+        x0, y0 = math.floor(box.x0), math.floor(box.y0)
+        return x0, y0, math.ceil(box.x1), math.ceil(box.y1)
+
+    def _refresh(self, image: Image, draw: ImageDraw, period: int):
+        self._ask(period)
+        box = self._box(image.size)
+
+        before = image.crop(box)
+        self.widget.draw(image, draw)
+        after = image.crop(box)
+
+        self.drawn = period
+        self.sprite = None
+
+        difference = functools.reduce(ImageChops.lighter, ImageChops.difference(before, after).split())
+        changed = difference.point(lambda v: 255 if v else 0)
+        bbox = changed.getbbox()
+        if bbox is not None:
+            self.sprite = after.crop(bbox)
+            self.mask = changed.crop(bbox)
+            self.at = Coordinate(box[0] + bbox[0], box[1] + bbox[1])
+
+    def changed(self) -> bool:
+        period = self._period()
+        if period == self.drawn:
+            return False
+        self._ask(period)
+        return True
+
+    def extent(self) -> Optional[Box]:
+        if self.drawn != self._period():
+            return self.widget.extent()
+        if self.sprite is None:
+            return Box(0, 0, 0, 0)
+        return Box(0, 0, *self.sprite.size).translate(self.at.x, self.at.y)
+
+    def draw(self, image: Image, draw: ImageDraw):
+        period = self._period()
+        if period != self.drawn:
+            self._refresh(image, draw, period)
+        elif self.sprite is not None:
+            image.paste(self.sprite, self.at.tuple(), self.mask)
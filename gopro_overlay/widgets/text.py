@@ -1,11 +1,33 @@
-from typing import Callable, Any, Tuple
+from typing import Callable, Any, Tuple, Optional
 
 from PIL import Image, ImageDraw
 
+from gopro_overlay.dimensions import Box
 from gopro_overlay.point import Coordinate
 from gopro_overlay.widgets.widgets import Widget
 
 
+class ChangeTracking:
+    """Remembers a value evaluated in changed(), so draw() doesn't need to evaluate it again"""
+
+    def __init__(self, value: Callable):
+        self.value = value
+        self.pending = None
+        self.last = None
+
+    def changed(self) -> bool:
+        self.pending = self.value()
+        changed = self.pending != self.last
+        self.last = self.pending
+        return changed
+
+    def current(self):
+        if self.pending is not None:
+            current, self.pending = self.pending, None
+            return current
+        return self.value()
+
+
 class CachingText(Widget):
     def __init__(self, at: Coordinate, value: Callable, font,
                  align="left", direction="ltr",
@@ -22,14 +44,34 @@ class CachingText(Widget):
         self.stroke = stroke
         self.stroke_width = stroke_width
         self.cache = {}
+        self.tracking = ChangeTracking(value)
+
+    def changed(self) -> bool:
+        return self.tracking.changed()
+
+    def extent(self) -> Optional[Box]:
+        text = self.tracking.last
+        if text is None:
+            return None
+        return self.extent_of(text)
+
+    def extent_of(self, text: str) -> Box:
+        """The area this widget would draw into, showing the given text"""
+        cached = self._cached(text)
+        return Box(0, 0, *cached["image"].size).translate(*(self.at + cached["at"]).tuple())
 
     def draw(self, image: Image, draw: ImageDraw):
 
-        text = self.value()
+        text = self.tracking.current()
 
         if text is None:
             raise ValueError("Refusing to draw text with value of 'None'")
 
+        cached = self._cached(text)
+
+        image.alpha_composite(cached["image"], (self.at + cached["at"]).tuple())
+
+    def _cached(self, text):
         cached = self.cache.get(text, None)
 
         if cached is None:
@@ -64,7 +106,7 @@ class CachingText(Widget):
             }
             self.cache[text] = cached
 
-        image.alpha_composite(cached["image"], (self.at + cached["at"]).tuple())
+        return cached
 
 
 class Text(Widget):
@@ -85,11 +127,30 @@ class Text(Widget):
         self.fill = fill if fill else (255, 255, 255)
         self.stroke = stroke if stroke else (0, 0, 0)
         self.stroke_width = stroke_width
+        self.tracking = ChangeTracking(value)
+
+    def changed(self) -> bool:
+        return self.tracking.changed()
+
+    def extent(self) -> Optional[Box]:
+        text = self.tracking.last
+        if text is None:
+            return None
+        return self.extent_of(text)
+
+    def extent_of(self, text: str) -> Box:
+        """The area this widget would draw into, showing the given text"""
+        return Box(*self.font.getbbox(
+            text=text,
+            stroke_width=self.stroke_width,
+            anchor=self.anchor,
+            direction=None if self.direction == "ltr" else self.direction
+        )).translate(self.at.x, self.at.y)
 
     def draw(self, image: Image, draw: ImageDraw):
         draw.text(
             self.at.tuple(),
-            self.value(),
+            self.tracking.current(),
             anchor=self.anchor,
             direction=None if self.direction == "ltr" else self.direction,
             font=self.font,
@@ -2,12 +2,12 @@ import functools
 import math
 import os
 from importlib.resources import files, as_file
-from typing import Tuple, List
+from typing import Tuple, List, Optional
 
 from PIL import Image, ImageDraw
 
 from gopro_overlay import icons
-from gopro_overlay.dimensions import Dimension
+from gopro_overlay.dimensions import Dimension, Box
 from gopro_overlay.functional import compose
 from gopro_overlay.point import Coordinate
 
@@ -16,11 +16,35 @@ class Widget:
     def draw(self, image: Image, draw: ImageDraw):
         raise NotImplemented("not implemented")
 
+    def changed(self) -> bool:
+        """Would this widget draw something different to the previous frame? Called at most once per frame, before draw"""
+        return True
+
+    def extent(self) -> Optional[Box]:
+        """The area this widget will draw into, relative to where it is drawn, or None if not known"""
+        return None
+
 
 class EmptyDrawable(Widget):
     def draw(self, image: Image, draw: ImageDraw):
         pass
 
+    def changed(self) -> bool:
+        return False
+
+    def extent(self) -> Optional[Box]:
+        return Box(0, 0, 0, 0)
+
+
+def union_of_extents(widgets) -> Optional[Box]:
+    extent = Box(0, 0, 0, 0)
+    for w in widgets:
+        e = w.extent()
+        if e is None:
+            return None
+        extent = e if extent.empty() else extent.union(e)
+    return extent
+
 
 class Composite(Widget):
 
@@ -31,6 +55,13 @@ class Composite(Widget):
         for w in self.widgets:
             w.draw(image, draw)
 
+    def changed(self) -> bool:
+        # ask every widget, so they all get a chance to see the new frame
+        return any([w.changed() for w in self.widgets])
+
+    def extent(self) -> Optional[Box]:
+        return union_of_extents(self.widgets)
+
 
 class Drawable(Widget):
     def __init__(self, at, drawable):
@@ -40,6 +71,12 @@ class Drawable(Widget):
     def draw(self, image: Image, draw: ImageDraw):
         image.alpha_composite(self.drawable, self.at.tuple())
 
+    def changed(self) -> bool:
+        return False
+
+    def extent(self) -> Optional[Box]:
+        return Box(0, 0, *self.drawable.size).translate(self.at.x, self.at.y)
+
 
 def icon(file, at, transform=lambda x: x) -> Widget:
     if os.path.exists(file):
@@ -89,11 +126,18 @@ class ImageTranslate:
     def _txy(self, xy):
         return xy[0] + self.at.x, xy[1] + self.at.y
 
+    @property
+    def size(self):
+        return self.image.size
+
     def alpha_composite(self, im, dest=(0, 0), source=(0, 0)):
         self.image.alpha_composite(im, dest=self._txy(dest), source=source)
 
-    def paste(self, img, box):
-        self.image.paste(img, box=self._txy(box))
+    def paste(self, img, box, mask=None):
+        self.image.paste(img, box=self._txy(box), mask=mask)
+
+    def crop(self, box):
+        return self.image.crop((*self._txy(box[0:2]), *self._txy(box[2:4])))
 
 
 class DrawTranslate:
@@ -150,6 +194,13 @@ class Translate(Widget):
 
         self.widget.draw(ivp, dvp)
 
+    def changed(self) -> bool:
+        return self.widget.changed()
+
+    def extent(self) -> Optional[Box]:
+        extent = self.widget.extent()
+        return extent.translate(self.at.x, self.at.y) if extent is not None else None
+
 
 class Frame(Widget):
     """
@@ -224,6 +275,12 @@ class Frame(Widget):
 
         image.alpha_composite(rect, (0, 0))
 
+    def changed(self) -> bool:
+        return self.child.changed()
+
+    def extent(self) -> Optional[Box]:
+        return Box(0, 0, self.dimensions.x, self.dimensions.y)
+
 
 class FrameSupplier:
     def drawing_frame(self) -> Image:
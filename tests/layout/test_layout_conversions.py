@@ -145,3 +145,33 @@ def test_spm_conversions_defaults():
     converters = Converters()
     assert converters.converter("spm")(units.Quantity('5 rpm')) == units.Quantity(10, "spm")
     assert converters.converter("spm")(units.Quantity('5.5 rpm')) == units.Quantity(11, "spm")
+
+
+def test_converted_magnitudes_are_same_as_pint():
+    converters = Converters()
+    for name, target, q in [
+        ("speed", "mph", units.Quantity(12.345, units.mps)),
+        ("kph", "KPH", units.Quantity(7, units.mps)),
+        ("distance", "mile", units.Quantity(1234.5, units.m)),
+        ("temp", "degC", units.Quantity(300.5, units.kelvin)),
+        ("G", "gravity", units.Quantity(12.1, "m/s**2")),
+        ("alt", "m", units.Quantity(17, units.m)),
+    ]:
+        converter = converters.converter(name)
+        expected = q.to(target)
+        for _ in range(2):
+            assert converter.magnitude(q) == expected.m
+            assert converter(q) == expected
+            assert converter(q).units == expected.units
+
+
+def test_pace_magnitudes_are_same_as_pint():
+    speed = units.Quantity(13.7, units.kph)
+    assert Converters().converter("pace").magnitude(speed) == (1 / speed).to("pace_mile").m
+    assert Converters().converter("pace_km")(speed) == (1 / speed).to("pace_km")
+    assert Converters().converter("pace").magnitude(units.Quantity(0, units.kph)) is None
+
+
+def test_same_unit_is_not_converted():
+    assert Converters().converter("alt").magnitude(units.Quantity(3, units.m)) == 3
+    assert type(Converters().converter("alt").magnitude(units.Quantity(3, units.m))) == int
@@ -1,7 +1,8 @@
 import datetime
 
-from gopro_overlay.layout_components import metric_value
-from gopro_overlay.layout_xml import metric_accessor_from, date_formatter_from, Converters, quantity_formatter_for
+from gopro_overlay.layout_components import metric_value, magnitude_value
+from gopro_overlay.layout_xml import metric_accessor_from, date_formatter_from, Converters, quantity_formatter_for, \
+    magnitude_formatter_for
 from gopro_overlay.timeseries import Entry
 from gopro_overlay.units import units
 from tests.test_timeseries import datetime_of
@@ -58,3 +59,30 @@ def test_date_formatter():
     # Will just have to accept that calling with tz=None will do local tz, as its cached in datetime.py
     assert date_formatter_from(entry, "%Y/%m/%d %H:%M:%S.%f", tz=utc)() == "2022/02/11 19:12:22.000000"
     assert date_formatter_from(entry, "%Y/%m/%d %H:%M:%S.%f", tz=sort_of_pst)() == "2022/02/11 11:12:22.000000"
+
+
+def test_compiled_metric_formats_same_as_quantity_metric():
+    converters = Converters(speed_unit="kph")
+
+    for unit in [None, "speed", "mph", "knots", "pace", "pace_km"]:
+        for format_string, dp in [(None, None), (None, 1), (".3f", None), ("pace", None)]:
+            if format_string == "pace" and unit is not None and not unit.startswith("pace"):
+                continue
+            for speed in [0, 0.5, 1.005, 3.3333, 12.5, 27.77777]:
+                entry = Entry(datetime_of(1), speed=units.Quantity(speed, units.mps))
+
+                expected = metric_value(
+                    lambda: entry,
+                    accessor=metric_accessor_from("speed"),
+                    converter=converters.converter(unit),
+                    formatter=quantity_formatter_for(format_string, dp),
+                )
+
+                actual = magnitude_value(
+                    lambda: entry,
+                    accessor=metric_accessor_from("speed"),
+                    conversion=converters.converter(unit),
+                    formatter=magnitude_formatter_for(format_string, dp),
+                )
+
+                assert actual() == expected()
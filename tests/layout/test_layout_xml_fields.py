@@ -0,0 +1,53 @@
+from pathlib import Path
+
+import pytest
+
+from gopro_overlay.layout_xml import load_xml_layout, metric_accessor_from
+from gopro_overlay.layout_xml_fields import fields_from_xml, fields_read_by
+
+
+def test_fields_read_by_accessors():
+    assert fields_read_by(metric_accessor_from("hr")) == {"hr"}
+    assert fields_read_by(metric_accessor_from("speed")) == {"speed", "cspeed"}
+    assert fields_read_by(metric_accessor_from("lat")) == {"point"}
+    assert fields_read_by(metric_accessor_from("accl.x")) == {"accl"}
+
+
+def test_fields_from_metrics_and_components():
+    xml = """<layout>
+        <composite x="100" y="200">
+            <component type="metric" metric="gradient" dp="1"/>
+            <frame width="100" height="100">
+                <component type="moving_map"/>
+            </frame>
+        </composite>
+        <component type="chart"/>
+        <component type="cairo-gauge-arc-annotated" metric="hr" arc-metric-upper="cadence"/>
+    </layout>"""
+
+    assert fields_from_xml(xml) == {"grad", "cgrad", "point", "azi", "timestamp", "alt", "hr", "cad"}
+
+
+def test_excluded_components_arent_needed():
+    xml = """<layout>
+        <composite name="big">
+            <component type="metric" metric="accel"/>
+        </composite>
+        <component type="metric" metric="odo" name="odo"/>
+    </layout>"""
+
+    assert fields_from_xml(xml, include=lambda n: n != "big") == {"odo", "codo"}
+
+
+def test_unknown_components_could_need_anything():
+    assert fields_from_xml("""<layout><component type="something-new"/></layout>""") is None
+
+
+def test_unknown_metrics_are_errors():
+    with pytest.raises(IOError):
+        fields_from_xml("""<layout><component type="metric" metric="wibble"/></layout>""")
+
+
+def test_bundled_layouts_are_all_known():
+    assert "azi" in fields_from_xml(load_xml_layout(Path("default-1920x1080")))
+    assert "codo" in fields_from_xml(load_xml_layout(Path("example")))
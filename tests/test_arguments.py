@@ -9,6 +9,7 @@ from gopro_overlay.framemeta_gpmd import LoadFlag
 from gopro_overlay.framemeta_gpx import MergeMode
 from gopro_overlay.geo import ArgsKeyFinder
 from gopro_overlay.point import Point, BoundingBox
+from gopro_overlay.timeunits import timeunits
 
 
 def test_only_output():
@@ -144,6 +145,19 @@ def test_buffers():
     assert do_args("--double-buffer").double_buffer
 
 
+def test_start_end():
+    assert do_args().start is None
+    assert do_args().end is None
+    assert do_args("--start", "90").start == timeunits(seconds=90)
+    assert do_args("--start", "1:30.5").start == timeunits(seconds=90.5)
+    assert do_args("--end", "1:02:03").end == timeunits(seconds=3723)
+
+
+def test_end_before_start():
+    with pytest.raises(SystemExit):
+        do_args("--start", "10", "--end", "5")
+
+
 def test_ffmpeg():
     assert do_args().ffmpeg_dir is None
     assert do_args("--ffmpeg-dir", "c:/blah/blah").ffmpeg_dir == Path("c:/blah/blah")
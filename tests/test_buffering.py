@@ -1,11 +1,12 @@
 import ctypes
+import io
 import multiprocessing
 from multiprocessing.shared_memory import SharedMemory
 
 import pytest
 from PIL import Image, ImageDraw
 
-from gopro_overlay.buffering import Frame
+from gopro_overlay.buffering import Frame, RingBuffer, InPlaceBuffer, ThreadedBuffer
 from gopro_overlay.dimensions import Dimension
 from tests.approval import approve_image
 
@@ -52,3 +53,78 @@ def test_drawing_frame_custom_background(shm, quit_flag):
 
         frame.draw(doit)
         return frame.copy()
+
+
+@pytest.mark.parametrize("slots", [1, 2, 5])
+def test_ring_buffer_writes_frames_in_order(tmp_path, slots):
+    output = tmp_path / "frames.raw"
+    with open(output, "wb") as f:
+        with RingBuffer(size, (0, 0, 0, 0), f, slots=slots) as buffer:
+            for i in range(12):
+                buffer.draw(lambda image: ImageDraw.Draw(image).point((0, 0), fill=(i, 1, 2, 255)))
+
+    data = output.read_bytes()
+    assert len(data) == buffer_size * 12
+    assert [data[i * buffer_size] for i in range(12)] == list(range(12))
+    assert data[4:buffer_size] == bytes(buffer_size - 4)
+
+
+def test_ring_buffer_clears_to_background(tmp_path):
+    output = tmp_path / "frames.raw"
+    with open(output, "wb") as f:
+        with RingBuffer(size, (10, 20, 30, 40), f, slots=2) as buffer:
+            for i in range(3):
+                buffer.draw(lambda image: ImageDraw.Draw(image).point((0, 0), fill=(255, 255, 255, 255)))
+
+    data = output.read_bytes()
+    assert data[buffer_size * 2 + 4:buffer_size * 2 + 8] == bytes([10, 20, 30, 40])
+
+
+def test_in_place_buffer_writes_each_frame_and_clears():
+    writer = io.BytesIO()
+    with InPlaceBuffer(size, (10, 20, 30, 40), writer) as buffer:
+        buffer.draw(lambda image: ImageDraw.Draw(image).point((0, 0), fill=(255, 255, 255, 255)))
+        buffer.draw(lambda image: None)
+
+    data = writer.getvalue()
+    assert len(data) == buffer_size * 2
+    assert data[0:4] == bytes([255, 255, 255, 255])
+    assert data[4:8] == bytes([10, 20, 30, 40])
+    assert data[buffer_size:buffer_size + 4] == bytes([10, 20, 30, 40])
+
+
+def test_in_place_buffer_survives_unsettable_pipe_size():
+    with InPlaceBuffer(size, (0, 0, 0, 0), io.BytesIO(), pipe_size=1024 * 1024) as buffer:
+        buffer.draw(lambda image: None)
+
+
+@pytest.mark.parametrize("slots", [1, 2, 5])
+def test_threaded_buffer_writes_frames_in_order(slots):
+    writer = io.BytesIO()
+    with ThreadedBuffer(size, (10, 20, 30, 40), writer, slots=slots) as buffer:
+        for i in range(12):
+            buffer.draw(lambda image: ImageDraw.Draw(image).point((0, 0), fill=(i, 1, 2, 255)))
+
+    data = writer.getvalue()
+    assert len(data) == buffer_size * 12
+    assert [data[i * buffer_size] for i in range(12)] == list(range(12))
+    assert data[buffer_size * 11 + 4:buffer_size * 11 + 8] == bytes([10, 20, 30, 40])
+
+    assert buffer.depth.count == 12
+    assert buffer.depth.max <= slots
+    assert buffer.write_blocked.count == 13
+
+
+class FailingWriter:
+    def write(self, b):
+        raise BrokenPipeError("ffmpeg went away")
+
+    def flush(self):
+        pass
+
+
+def test_threaded_buffer_reports_writer_failure():
+    with pytest.raises(IOError):
+        with ThreadedBuffer(size, (0, 0, 0, 0), FailingWriter(), slots=2) as buffer:
+            for i in range(10):
+                buffer.draw(lambda image: None)
@@ -0,0 +1,91 @@
+from PIL import Image
+
+from gopro_overlay.dimensions import Box
+from gopro_overlay.point import Coordinate
+from gopro_overlay.widgets.damage import DamageTrackingScene, leaves_of
+from gopro_overlay.widgets.widgets import Scene, Composite, Translate, Drawable, EmptyDrawable, Widget
+
+size = (64, 32)
+background = (10, 20, 30, 128)
+
+
+class MovingBlock(Widget):
+
+    def __init__(self, position, known_extent=True):
+        self.position = position
+        self.known_extent = known_extent
+        self.last = None
+        self.draws = 0
+
+    def changed(self) -> bool:
+        position = self.position()
+        changed = position != self.last
+        self.last = position
+        return changed
+
+    def extent(self):
+        if not self.known_extent:
+            return None
+        return Box(self.last, 0, self.last + 8, 8)
+
+    def draw(self, image, draw):
+        self.draws += 1
+        x = self.position()
+        draw.rectangle(((x, 0), (x + 7, 7)), fill=(255, 0, 0, 128))
+
+
+def translucent(colour, w=16, h=16):
+    return Image.new("RGBA", (w, h), colour)
+
+
+def scene_of(position, known_extent=True):
+    return [
+        Drawable(Coordinate(0, 0), translucent((0, 255, 0, 100), w=40)),
+        Translate(
+            Coordinate(4, 4),
+            Composite(
+                EmptyDrawable(),
+                MovingBlock(position, known_extent),
+                Drawable(Coordinate(20, 2), translucent((0, 0, 255, 100))),
+            )
+        ),
+    ]
+
+
+def render_both(positions, known_extent=True):
+    current = [0]
+
+    def position():
+        return positions[current[0]]
+
+    plain = Scene(scene_of(position, known_extent))
+    tracked = DamageTrackingScene(scene_of(position, known_extent))
+
+    for i in range(len(positions)):
+        current[0] = i
+        expected = plain.draw(Image.new("RGBA", size, background))
+        actual = tracked.draw(Image.new("RGBA", size, background))
+        assert actual.tobytes() == expected.tobytes(), f"frame {i} differs"
+
+    return tracked
+
+
+def test_leaves_are_flattened_with_offsets():
+    leaves = list(leaves_of(scene_of(lambda: 0)))
+    assert [at for at, _ in leaves] == [Coordinate(0, 0), Coordinate(4, 4), Coordinate(4, 4), Coordinate(4, 4)]
+
+
+def test_damage_tracked_frames_are_same_as_full_frames():
+    render_both([0, 0, 3, 3, 10, 20, 22, 22, 50, 0])
+
+
+def test_unchanged_widgets_are_not_redrawn():
+    tracked = render_both([0, 0, 0, 0, 30])
+    block = tracked._leaves[2][1]
+    assert block.draws == 2
+
+
+def test_unknown_extent_draws_full_frame():
+    tracked = render_both([0, 0, 5, 5], known_extent=False)
+    block = tracked._leaves[2][1]
+    assert block.draws == 4
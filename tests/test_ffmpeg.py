@@ -9,10 +9,10 @@ import pytest
 from PIL import Image
 
 from gopro_overlay import functional
-from gopro_overlay.dimensions import Dimension
+from gopro_overlay.dimensions import Dimension, Box
 from gopro_overlay.ffmpeg import FFMPEG
 from gopro_overlay.ffmpeg_gopro import FFMPEGGoPro
-from gopro_overlay.ffmpeg_overlay import FFMPEGOverlay, FFMPEGOptions, FFMPEGOverlayVideo
+from gopro_overlay.ffmpeg_overlay import FFMPEGOverlay, FFMPEGOptions, FFMPEGOverlayVideo, OverlayRegions
 from gopro_overlay.timeunits import timeunits
 from tests.test_timeseries import datetime_of
 
@@ -196,6 +196,29 @@ def test_ffmpeg_generate_execute():
     ]
 
 
+def test_ffmpeg_overlay_video_part_of_input():
+    fake = FakeExecution()
+    ffmpeg = FFMPEGOverlayVideo(
+        ffmpeg=FFMPEG(),
+        input=Path("input"),
+        output=Path("output"),
+        overlay_size=Dimension(3, 4),
+        execution=fake,
+        creation_time=datetime_of(1231233223.12344),
+        start=timeunits(seconds=10.5),
+        duration=timeunits(seconds=20)
+    )
+
+    with ffmpeg.generate():
+        pass
+
+    assert fake.args[5:11] == [
+        "-ss", "10.5",
+        "-t", "20.0",
+        "-i", "input",  # seek in input 0, before it is opened
+    ]
+
+
 def test_ffmpeg_overlay_execute_default():
     fake = FakeExecution()
 
@@ -265,6 +288,71 @@ def test_ffmpeg_overlay_execute_options():
     ]
 
 
+def test_ffmpeg_overlay_execute_regions():
+    fake = FakeExecution()
+
+    ffmpeg = FFMPEGOverlayVideo(
+        ffmpeg=FFMPEG(),
+        input=Path("input"),
+        output=Path("output"),
+        overlay_size=Dimension(100, 100),
+        execution=fake,
+        creation_time=datetime_of(1231233223.12344),
+        regions=OverlayRegions(Dimension(100, 100), [Box(10, 0, 30, 5), Box(0, 50, 10, 60)])
+    )
+
+    with ffmpeg.generate():
+        pass
+
+    assert fake.args[fake.args.index("-s") + 1] == "20x15"
+    assert fake.args[fake.args.index("-filter_complex") + 1] == ";".join([
+        "[1:v]split=2[s0][s1]",
+        "[s0]crop=20:5:0:0[r0]",
+        "[s1]crop=10:10:0:5[r1]",
+        "[0:v][r0]overlay=x=10:y=0[o0]",
+        "[o0][r1]overlay=x=0:y=50",
+    ])
+
+
+def test_ffmpeg_overlay_execute_skip_duplicates():
+    fake = FakeExecution()
+
+    ffmpeg = FFMPEGOverlayVideo(
+        ffmpeg=FFMPEG(),
+        input=Path("input"),
+        output=Path("output"),
+        overlay_size=Dimension(3, 4),
+        execution=fake,
+        creation_time=datetime_of(1231233223.12344),
+        skip_duplicates=True
+    )
+
+    with ffmpeg.generate() as writer:
+        writer.write(bytes(3 * 4 * 4))
+
+    assert fake.args[5:13] == [
+        "-i", "input",
+        "-f", "nut",  # timestamped frames, so duplicates can be skipped
+        "-i", "-",
+        "-filter_complex", "[0:v][1:v]overlay",
+    ]
+
+
+def test_ffmpeg_overlay_single_region_filter():
+    regions = OverlayRegions(Dimension(100, 100), [Box(10, 20, 30, 40)])
+    assert regions.filter_spec() == "[1:v]crop=20:20:0:0[r0];[0:v][r0]overlay=x=10:y=20"
+
+
+def test_overlay_regions_pack_frame():
+    size = Dimension(4, 3)
+    frame = bytes(range(4 * 3 * 4))
+
+    regions = OverlayRegions(size, [Box(1, 0, 3, 1), Box(0, 2, 1, 3)])
+
+    assert regions.packed_size == Dimension(2, 2)
+    assert regions.pack(frame) == frame[4:12] + frame[32:36] + bytes(4)
+
+
 mydir = Path(os.path.dirname(__file__))
 top = mydir.parent
 clip = top / "render" / "clip.MP4"
@@ -2,9 +2,11 @@ import collections
 import datetime
 from datetime import timedelta
 
+import pytest
+
 from gopro_overlay import fake
 from gopro_overlay.entry import Entry
-from gopro_overlay.framemeta import FrameMeta, Window
+from gopro_overlay.framemeta import ChartData, FrameMeta, Window
 from gopro_overlay.point import Point
 from gopro_overlay.timeunits import timeunits
 from gopro_overlay.units import units
@@ -145,6 +147,57 @@ def test_stepping_through_time():
     assert steps[1] == timeunits(minutes=1)
     assert steps[10] == timeunits(minutes=10)
 
+
+def test_stepping_through_part_of_time():
+    ts = fake.fake_framemeta(timedelta(minutes=10), step=timedelta(seconds=1))
+    stepper = ts.stepper(timeunits(minutes=1), start=timeunits(minutes=3), end=timeunits(minutes=6))
+
+    assert len(stepper) == 3
+    assert list(stepper.steps()) == [timeunits(minutes=3), timeunits(minutes=4), timeunits(minutes=5)]
+
+
+def test_stepping_from_start_to_last_frame():
+    ts = fake.fake_framemeta(timedelta(minutes=10), step=timedelta(seconds=1))
+    stepper = ts.stepper(timeunits(minutes=1), start=timeunits(minutes=8), end=timeunits(minutes=20))
+
+    assert list(stepper.steps()) == [timeunits(minutes=8), timeunits(minutes=9), timeunits(minutes=10)]
+
+
+@pytest.mark.parametrize("workers", [1, 2, 3, 4])
+def test_shards_of_stepper_cover_every_step_once(workers):
+    ts = fake.fake_framemeta(timedelta(minutes=10), step=timedelta(seconds=1))
+    stepper = ts.stepper(timeunits(minutes=1), start=timeunits(minutes=1), end=timeunits(minutes=9))
+
+    shards = [list(stepper.shard(index, workers).steps()) for index in range(workers)]
+
+    for index, shard in enumerate(shards):
+        assert shard == list(stepper.steps())[index::workers]
+        assert len(stepper.shard(index, workers)) == len(shard)
+
+
+def test_processing_only_within_limit():
+    fm = FrameMeta()
+    for i in range(10):
+        fm.add(timeunits(seconds=i), Entry(datetime_of(i), lat=float(i)))
+
+    seen = []
+    pairs = []
+    with fm.processing_within(timeunits(seconds=3), timeunits(seconds=5)):
+        fm.process(lambda e: seen.append(e.lat))
+        fm.process_deltas(lambda a, b, skip: pairs.append((a.lat, b.lat)))
+
+        # stepping is unaffected
+        assert len(fm.stepper(timeunits(seconds=1))) == 10
+
+    assert seen == [3.0, 4.0, 5.0]
+    assert pairs == [(3.0, 4.0), (4.0, 5.0)]
+
+    # afterwards, everything is processed again, for example by maps
+    seen.clear()
+    fm.process(lambda e: seen.append(e.lat))
+    assert len(seen) == 10
+
+
 def test_skipping_items():
     fm = FrameMeta()
     fm.add(timeunits(seconds=0), Entry(datetime_of(0), lat=1.0))
@@ -169,3 +222,77 @@ def test_bugfix_timedelta_too_small_infinite():
     # 30s / 512 < 100ms which was causing hang
     window = Window(fm, timeunits(seconds=30), samples=512, key=lambda e: e.lat, missing=0)
     view = window.view(fm.min)
+
+
+def test_cursor_finds_same_entries_as_get():
+    fm = fake.fake_framemeta(timedelta(seconds=30), step=timedelta(seconds=0.3))
+    cursor = fm.cursor()
+
+    times = [timeunits(seconds=s / 10) for s in range(-10, 320, 7)]
+    times += [timeunits(seconds=5), timeunits(seconds=1), fm.max, fm.min]
+
+    for t in times:
+        assert cursor.get(t) is fm.get(t)
+
+
+def test_cursor_sees_added_entries():
+    fm = FrameMeta()
+    fm.add(timeunits(seconds=0), Entry(datetime_of(0), lat=1.0))
+    fm.add(timeunits(seconds=2), Entry(datetime_of(2), lat=3.0))
+
+    cursor = fm.cursor()
+    assert cursor.get(timeunits(seconds=1)).lat == 1.0
+
+    fm.add(timeunits(seconds=1), Entry(datetime_of(1), lat=2.0))
+    assert len(fm) == 3
+    assert cursor.get(timeunits(seconds=1.5)).lat == 2.0
+
+
+def test_stepping_with_entries():
+    fm = fake.fake_framemeta(timedelta(minutes=1), step=timedelta(seconds=1))
+
+    stepped = list(fm.stepper(timeunits(seconds=10)).with_entries())
+
+    assert len(stepped) == 7
+    for step, entry in stepped:
+        assert entry is fm.get(step)
+
+
+def test_window_values_are_those_at_each_tick():
+    fm = fake.fake_framemeta(timedelta(minutes=2), step=timedelta(seconds=0.3))
+
+    window = Window(fm, timeunits(seconds=30), samples=64, key=lambda e: e.alt.magnitude)
+    at = timeunits(seconds=5)
+    data = window.view(at).data
+
+    start = at - timeunits(seconds=15)
+    expected = [
+        fm.get(start + window.tick * i).alt.magnitude if start + window.tick * i >= fm.min else None
+        for i in range(len(data))
+    ]
+    assert len(data) == 75
+    assert data[0] is None
+    assert list(data) == expected
+    assert [data[i] for i in range(len(data))] == expected
+    assert data[-1] == expected[-1]
+
+
+def test_windows_share_chart_series():
+    fm = fake.fake_framemeta(timedelta(minutes=2), step=timedelta(seconds=1))
+    chart_data = ChartData(fm)
+
+    a = Window(fm, timeunits(seconds=60), samples=100, key=lambda e: e.alt, chart_data=chart_data, name="alt")
+    b = Window(fm, timeunits(seconds=60), samples=100, key=lambda e: e.alt, chart_data=chart_data, name="alt")
+    c = Window(fm, timeunits(seconds=60), samples=100, key=lambda e: e.cad, chart_data=chart_data, name="cad")
+
+    assert a.series is b.series
+    assert a.series is not c.series
+    assert list(a.view(fm.mid).data) == list(b.view(fm.mid).data)
+
+
+def test_window_past_the_end_is_missing():
+    fm = fake.fake_framemeta(timedelta(seconds=10), step=timedelta(seconds=1))
+
+    window = Window(fm, timeunits(seconds=10), samples=10, key=lambda e: e.alt, missing=0)
+
+    assert list(window.view(timeunits(minutes=5)).data) == [0] * 10
@@ -0,0 +1,131 @@
+import datetime
+import random
+
+from gopro_overlay import fake
+from gopro_overlay.entry import Entry
+from gopro_overlay.framemeta_columnar import ColumnarFrameMeta, ObjectColumn
+from gopro_overlay.point import Quaternion, Point3
+from gopro_overlay.timeunits import timeunits
+from gopro_overlay.units import units
+from tests.test_timeseries import datetime_of
+
+
+def columnar_copy_of(fm) -> ColumnarFrameMeta:
+    columnar = ColumnarFrameMeta()
+    for t in fm.framelist:
+        entry = fm.frames[t]
+        columnar.add(t, Entry(entry.dt, **entry.items))
+    return columnar
+
+
+def test_same_values_as_framemeta():
+    fm = fake.fake_framemeta(length=datetime.timedelta(seconds=10), rng=random.Random(12))
+    columnar = columnar_copy_of(fm)
+
+    assert len(columnar) == len(fm)
+    assert columnar.min == fm.min
+    assert columnar.max == fm.max
+
+    for t in [fm.min, fm.mid, fm.max, timeunits(seconds=3.33)]:
+        expected = fm.get(t)
+        actual = columnar.get(t)
+        assert actual.dt == expected.dt
+        assert actual.items.keys() == expected.items.keys()
+        assert actual.speed == expected.speed
+        assert actual.point == expected.point
+        assert actual.accl == expected.accl
+        assert actual.accl.x.units == expected.accl.x.units
+        assert actual.gpsfix == expected.gpsfix
+        assert type(actual.gpsfix) == int
+        assert actual.nothing is None
+
+
+def test_unit_tags():
+    fm = ColumnarFrameMeta()
+    fm.add(timeunits(seconds=0), Entry(datetime_of(0), speed=units.Quantity(1, units.mps), alt=units.Quantity(3, units.m)))
+    fm.add(timeunits(seconds=1), Entry(datetime_of(1), speed=units.Quantity(3.6, units.kph)))
+
+    assert fm.units_of("speed") == units.mps
+    assert fm.units_of("alt") == units.m
+    assert fm.get(timeunits(seconds=1)).speed == units.Quantity(1, units.mps)
+    assert fm.get(timeunits(seconds=1)).alt is None
+
+
+def test_adding_out_of_order_and_replacing():
+    fm = ColumnarFrameMeta()
+    fm.add(timeunits(seconds=2), Entry(datetime_of(2), lat=3.0))
+    fm.add(timeunits(seconds=0), Entry(datetime_of(0), lat=1.0))
+    assert len(fm) == 2
+
+    fm.add(timeunits(seconds=1), Entry(datetime_of(1), lat=2.0))
+    fm.add(timeunits(seconds=2), Entry(datetime_of(2), lon=4.0))
+
+    assert [e.lat for e in fm.items()] == [1.0, 2.0, None]
+    assert fm.get(timeunits(seconds=2)).lon == 4.0
+    assert fm.get(timeunits(seconds=1.5)).lat == 2.0
+    assert fm.duration() == timeunits(seconds=2)
+
+
+def test_updating_through_entries():
+    fm = ColumnarFrameMeta()
+    for i in range(5):
+        fm.add(timeunits(seconds=i), Entry(datetime_of(i), alt=units.Quantity(i, units.m)))
+
+    fm.process(lambda e: {"odo": e.alt * 2})
+    fm.process_deltas(lambda a, b, skip: {"dist": b.alt - a.alt})
+    fm.process(lambda e: {"alt": None} if e.alt.magnitude > 2 else None)
+
+    assert fm.get(timeunits(seconds=4)).odo == units.Quantity(8, units.m)
+    assert fm.get(timeunits(seconds=0)).dist == units.Quantity(1, units.m)
+    assert fm.get(timeunits(seconds=4)).dist is None
+    assert fm.get(timeunits(seconds=4)).alt is None
+    assert fm.get(timeunits(seconds=2)).alt == units.Quantity(2, units.m)
+
+
+def test_values_that_dont_fit_are_kept_as_objects():
+    quaternion = Quaternion(w=1.0, v=Point3(0.0, 0.0, 0.0))
+
+    fm = ColumnarFrameMeta()
+    fm.add(timeunits(seconds=0), Entry(datetime_of(0), gpsfix=3, cori=quaternion))
+    fm.add(timeunits(seconds=1), Entry(datetime_of(1), gpsfix="unknown"))
+
+    assert fm.get(timeunits(seconds=0)).cori is quaternion
+    assert isinstance(fm.columns["cori"], ObjectColumn)
+    assert fm.get(timeunits(seconds=0)).gpsfix == 3
+    assert fm.get(timeunits(seconds=1)).gpsfix == "unknown"
+
+
+def test_processing_within():
+    fm = ColumnarFrameMeta()
+    for i in range(10):
+        fm.add(timeunits(seconds=i), Entry(datetime_of(i), lat=float(i)))
+
+    seen = []
+    with fm.processing_within(timeunits(seconds=3), timeunits(seconds=5)):
+        fm.process(lambda e: seen.append(e.lat))
+
+    assert seen == [3.0, 4.0, 5.0]
+
+
+def test_stepping():
+    fm = columnar_copy_of(fake.fake_framemeta(datetime.timedelta(minutes=10), step=datetime.timedelta(seconds=1)))
+    assert len(fm.stepper(timeunits(minutes=1))) == 11
+
+
+def test_smaller_than_entries():
+    fm = fake.fake_framemeta(length=datetime.timedelta(seconds=60))
+    columnar = columnar_copy_of(fm)
+
+    # each row is a handful of doubles per metric
+    assert columnar.nbytes() / len(columnar) < 300
+    assert columnar[-1].dt == fm[-1].dt
+    assert columnar[0].point == fm[0].point
+
+
+def test_cursor():
+    fm = columnar_copy_of(fake.fake_framemeta(length=datetime.timedelta(seconds=10), rng=random.Random(3)))
+    cursor = fm.cursor()
+
+    for s in [0, 0.05, 0.1, 3.33, 3.33, 2.0, 9.99, 20]:
+        t = timeunits(seconds=s)
+        assert cursor.get(t).dt == fm.get(t).dt
@@ -0,0 +1,95 @@
+import datetime
+import random
+
+import pytest
+from geographiclib.geodesic import Geodesic
+
+from gopro_overlay import fake
+from gopro_overlay.framemeta_columnar import ColumnarFrameMeta
+from gopro_overlay.geodesy import ellipsoidal, haversine, geodesy_for
+from gopro_overlay.point import Point
+from gopro_overlay.privacy import PrivacyZone
+from gopro_overlay.timeseries_process import calculate_speeds, calculate_gradient, calculate_speeds_batch, \
+    calculate_gradient_batch
+from gopro_overlay.units import units
+from tests.test_framemeta_columnar import columnar_copy_of
+
+lat1, lon1 = [51.50186, -33.8688, 0.0, 78.2232], [-0.14056, 151.2093, 179.9, 15.6267]
+lat2, lon2 = [51.50665, -33.8688, 0.0, 78.2240], [-0.12895, 151.2093, -179.9, 15.7000]
+
+
+def test_ellipsoidal_is_same_as_geographiclib():
+    dists, azis = ellipsoidal.inverse(lat1, lon1, lat2, lon2)
+    for i in range(len(lat1)):
+        expected = Geodesic.WGS84.Inverse(lat1[i], lon1[i], lat2[i], lon2[i])
+        assert dists[i] == expected["s12"]
+        assert azis[i] == expected["azi1"]
+
+
+def test_haversine_is_close_to_ellipsoidal():
+    exact_dists, exact_azis = ellipsoidal.inverse(lat1, lon1, lat2, lon2)
+    dists, azis = haversine.inverse(lat1, lon1, lat2, lon2)
+
+    for exact, rough in zip(exact_dists, dists):
+        assert rough == pytest.approx(exact, rel=0.006, abs=0.001)
+    assert azis[0] == pytest.approx(exact_azis[0], abs=0.5)
+
+
+def test_geodesy_by_name():
+    assert geodesy_for("haversine") is haversine
+    with pytest.raises(ValueError):
+        geodesy_for("flat")
+
+
+quantity_fields = ["cspeed", "cspeed.k", "cspeed.raw", "dist", "time", "azi", "cog",
+                   "cgrad", "bad_grad", "grad_gain", "grad_dist"]
+
+
+def assert_same_processing(one, other):
+    for a, b in zip(one.items(), other.items()):
+        for field in quantity_fields:
+            expected, actual = a.items.get(field), b.items.get(field)
+            if expected is None:
+                assert actual is None
+            else:
+                assert actual.m == expected.m
+                assert actual.units == expected.units
+
+
+def framemeta():
+    return fake.fake_framemeta(length=datetime.timedelta(seconds=30), rng=random.Random(4))
+
+
+def test_batch_processing_is_same_as_pairwise():
+    pairwise = framemeta()
+    pairwise.process_deltas(calculate_speeds(), skip=54)
+    pairwise.process_deltas(calculate_gradient(), skip=54)
+
+    batch = framemeta()
+    batch.process_deltas_batch(calculate_speeds_batch(), skip=54)
+    batch.process_deltas_batch(calculate_gradient_batch(), skip=54)
+
+    assert batch[0].cspeed is not None
+    assert_same_processing(pairwise, batch)
+
+
+def test_batch_processing_columnar():
+    pairwise = framemeta()
+    pairwise.process_deltas(calculate_speeds(), skip=18, filter_fn=lambda e: e.packet.m % 3 != 0)
+
+    batch = columnar_copy_of(framemeta())
+    batch.process_deltas_batch(calculate_speeds_batch(), skip=18, filter_fn=lambda e: e.packet.m % 3 != 0)
+
+    assert isinstance(batch, ColumnarFrameMeta)
+    assert_same_processing(pairwise, batch)
+
+
+def test_privacy_zone():
+    centre = Point(51.50186, -0.14056)
+    near = Point(51.50665, -0.12895)  # 966.36m away
+
+    assert PrivacyZone(centre, units.Quantity(1, units.km)).encloses(near)
+    assert PrivacyZone(centre, units.Quantity(966.37, units.m)).encloses(near)
+    assert not PrivacyZone(centre, units.Quantity(966.35, units.m)).encloses(near)
+    assert not PrivacyZone(centre, units.Quantity(0.5, units.km)).encloses(near)
+    assert PrivacyZone(centre, units.Quantity(1, units.km), geodesy=haversine).encloses(near)
@@ -8,13 +8,14 @@ from typing import Tuple
 import pytest
 
 from gopro_overlay.ffmpeg import FFMPEG
-from gopro_overlay.ffmpeg_gopro import GoproRecording, FFMPEGGoPro
-from gopro_overlay.gpmf import GPSFix, GPS5, XYZ, GPMDItem, interpret_item
+from gopro_overlay.ffmpeg_gopro import DataStream, GoproRecording, FFMPEGGoPro
+from gopro_overlay.gpmf import GPSFix, GPS5, XYZ, GPMDItem, interpret_item, rows_of
 from gopro_overlay.gpmf.calc import CorrectionFactors, CoriTimestampPacketTimeCalculator, CorrectionFactorsPacketTimeCalculator, CalculateCorrectionFactorsVisitor
-from gopro_overlay.gpmf.gpmf import GPMD, GPS9, QUATERNION
+from gopro_overlay.gpmf.gpmf import GPMD, GPMDStreamParser, GPS9, QUATERNION
 from gopro_overlay.gpmf.visitors.debug import DebuggingVisitor
-from gopro_overlay.gpmf.visitors.find import DetermineTimestampOfFirstSHUTVisitor
+from gopro_overlay.gpmf.visitors.find import DetermineTimestampOfFirstSHUTVisitor, StreamFindingVisitor
 from gopro_overlay.gpmf.visitors.gps import GPS5EntryConverter, GPS5Visitor, DetermineFirstLockedGPSUVisitor
+from gopro_overlay.gpmf.visitors.index import GPMDStreamIndex
 from gopro_overlay.gpmf.visitors.xyz import XYZComponentConverter, XYZVisitor
 from gopro_overlay.point import Point, Point3, Quaternion
 from gopro_overlay.timeunits import timeunits
@@ -468,3 +469,98 @@ class CountingVisitor:
 
 def test_interpreting_strings():
     assert interpret_item(GPMDItem("SIUN", 143, 4, 1, 12, bytes([0x6d, 0x2f, 0x73, 0xb2]))) == "m/s²"
+
+
+def test_parsing_in_chunks_is_the_same_as_parsing_all_at_once():
+    data = load_meta("accel/rotation-example.gpmd").tobytes()
+    whole = GPMD.parse(data)
+
+    for size in [1, 13, 4096, len(data)]:
+        chunked = GPMD.parse_chunks(data[i:i + size] for i in range(0, len(data), size))
+        assert len(chunked) == len(whole)
+        assert chunked.accept(CountingVisitor()).count == whole.accept(CountingVisitor()).count
+        assert [i.bytecount for i in chunked] == [i.bytecount for i in whole]
+
+
+def test_stream_parser_gives_items_once_complete():
+    data = load_meta("hero6.raw").tobytes()
+    first_size = GPMD.parse(data)[0].bytecount
+
+    parser = GPMDStreamParser()
+    assert parser.feed(data[:first_size - 1]) == []
+    assert [i.fourcc for i in parser.feed(data[first_size - 1:first_size])] == ["DEVC"]
+    assert parser.close() == []
+
+
+def test_lazy_parsing_gives_the_same_items():
+    data = load_meta("accel/rotation-example.gpmd").tobytes()
+    whole = GPMD.parse(data)
+    lazy = GPMD.parse_lazy(data)
+
+    assert len(lazy) == len(whole)
+    assert lazy.accept(CountingVisitor()).count == whole.accept(CountingVisitor()).count
+    assert [i.bytecount for i in lazy] == [i.bytecount for i in whole]
+
+    whole_gps = whole[10].with_type("STRM")
+    lazy_gps = lazy[10].with_type("STRM")
+    assert [s.itemset for s in lazy_gps] == [s.itemset for s in whole_gps]
+    for w, l in zip(whole_gps[0].items, lazy_gps[0].items):
+        assert (l.fourcc, l.type_char, l.size, l.repeat, bytes(l.rawdata)) == \
+               (w.fourcc, w.type_char, w.size, w.repeat, w.rawdata)
+
+
+def test_lazy_parsing_leaves_out_unwanted_streams():
+    data = load_meta("accel/rotation-example.gpmd").tobytes()
+
+    lazy = GPMD.parse_lazy(data, streams={"GPS5"})
+
+    assert len(lazy) == len(GPMD.parse(data))
+    assert all(["GPS5" in s.itemset for d in lazy for s in d.with_type("STRM")])
+    assert lazy.accept(StreamFindingVisitor("GPS5")).found()
+    assert not lazy.accept(StreamFindingVisitor("ACCL")).found()
+
+
+def test_interpreting_samples_gives_rows_and_types():
+    item = GPMDItem("ACCL", ord("s"), 6, 2, 12, bytes([0, 10, 0, 20, 255, 246, 0, 1, 0, 2, 0, 3]))
+
+    samples = item.interpret(scale=[10])
+
+    assert len(samples) == 2
+    assert samples.rows == [[1.0, 2.0, -1.0], [0.1, 0.2, 0.3]]
+    assert samples[0] == XYZ(x=1.0, y=2.0, z=-1.0)
+    assert list(samples) == [XYZ(x=1.0, y=2.0, z=-1.0), XYZ(x=0.1, y=0.2, z=0.3)]
+    assert rows_of(list(samples)) == samples.rows
+
+
+def test_interpreting_samples_with_a_scale_for_each_value():
+    item = GPMDItem("GPS5", ord("l"), 20, 1, 20, bytes([0, 0, 0, 10] * 5))
+
+    samples = item.interpret(scale=[1, 2, 4, 5, 10])
+
+    assert samples[0] == GPS5(lat=10.0, lon=5.0, alt=2.5, speed=2.0, speed3d=1.0)
+
+
+def test_stream_index_finds_the_same_as_visiting():
+    meta = load("accel/rotation-example.gpmd")
+    index = GPMDStreamIndex.of(meta)
+
+    assert index.first_shut_timestamp == meta.accept(DetermineTimestampOfFirstSHUTVisitor()).timestamp
+    for fourcc in ["GPS5", "GPS9", "ACCL", "GRAV", "CORI", "XXXX"]:
+        assert index.found(fourcc) == meta.accept(StreamFindingVisitor(fourcc)).found()
+
+    assert len(index.devcs) == len(meta)
+    datastream = DataStream(stream=3, frame_count=707, timebase=1000, frame_duration=1001)
+    assert sum(index.repeats("ACCL")) == meta.accept(CalculateCorrectionFactorsVisitor("ACCL", datastream)).samples
+
+
+def test_stream_index_visits_only_wanted_streams():
+    meta = load("accel/rotation-example.gpmd")
+    index = GPMDStreamIndex.of(meta)
+
+    def seen(visit):
+        items = []
+        visit(XYZVisitor("ACCL", on_item=lambda counter, c: items.append((counter, c.timestamp, len(c.points)))))
+        return items
+
+    assert seen(lambda v: index.accept(v, "ACCL")) == seen(lambda v: meta.accept(v))
+    assert GPMDStreamIndex.of(index) is index
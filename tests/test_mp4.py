@@ -0,0 +1,151 @@
+import struct
+
+import pytest
+
+from gopro_overlay import mp4
+from gopro_overlay.common import temporary_file
+from gopro_overlay.ffmpeg_gopro import GoproRecording, DataStream
+
+
+def box(kind: str, *contents: bytes) -> bytes:
+    payload = b"".join(contents)
+    return struct.pack(">I4s", 8 + len(payload), kind.encode()) + payload
+
+
+def full_box(kind: str, *contents: bytes, version=0) -> bytes:
+    return box(kind, struct.pack(">B3s", version, b"\0\0\0"), *contents)
+
+
+def trak(handler: str, sample_format: str, timescale: int, durations, sizes, chunks, offsets, co64=False) -> bytes:
+    stts = full_box("stts", struct.pack(">I", len(durations)), *[struct.pack(">II", c, d) for c, d in durations])
+    stsz = full_box("stsz", struct.pack(">II", 0, len(sizes)), *[struct.pack(">I", s) for s in sizes])
+    stsc = full_box("stsc", struct.pack(">I", len(chunks)), *[struct.pack(">III", f, n, 1) for f, n in chunks])
+    if co64:
+        stco = full_box("co64", struct.pack(">I", len(offsets)), *[struct.pack(">Q", o) for o in offsets])
+    else:
+        stco = full_box("stco", struct.pack(">I", len(offsets)), *[struct.pack(">I", o) for o in offsets])
+    stsd = full_box("stsd", struct.pack(">I", 1), box(sample_format, bytes(8)))
+
+    return box(
+        "trak",
+        box(
+            "mdia",
+            full_box("mdhd", struct.pack(">IIII", 0, 0, timescale, sum(c * d for c, d in durations)), bytes(4)),
+            full_box("hdlr", struct.pack(">I4s", 0, handler.encode()), bytes(12)),
+            box("minf", box("stbl", stsd, stts, stsz, stsc, stco))
+        )
+    )
+
+
+samples = [b"aaaa", b"bbbbbb", b"cc", b"ddddddddd"]
+
+
+def mp4_file(co64=False) -> bytes:
+    ftyp = box("ftyp", b"mp41", bytes(4))
+
+    # samples 0,1 in one chunk, then some other data, then 2,3 in another
+    first = len(ftyp) + 8
+    mdat = box("mdat", samples[0], samples[1], b"video", samples[2], samples[3])
+    second = first + len(samples[0]) + len(samples[1]) + len(b"video")
+
+    moov = box(
+        "moov",
+        full_box("mvhd", bytes(96)),
+        trak("vide", "avc1", 90000, [(1, 3003)], [5], [(1, 1)], [first + 10]),
+        trak("meta", "gpmd", 1000, [(3, 1001), (1, 500)], [len(s) for s in samples], [(1, 2)], [first, second],
+             co64=co64),
+    )
+    return ftyp + mdat + moov
+
+
+@pytest.mark.parametrize("co64", [False, True])
+def test_finding_gpmd_track(co64):
+    with temporary_file(suffix=".mp4") as path:
+        with open(path, "wb") as f:
+            f.write(mp4_file(co64=co64))
+
+        track = mp4.find_track(path, "gpmd")
+
+        assert track.index == 1
+        assert track.handler == "meta"
+        assert track.timescale == 1000
+        assert track.duration == 3503
+        assert len(track) == 4
+        assert list(track.sizes) == [4, 6, 2, 9]
+        assert list(track.durations) == [1001, 1001, 1001, 500]
+        assert track.timestamps() == [0, 1001, 2002, 3003]
+
+        assert b"".join(mp4.read_samples(path, track)) == b"".join(samples)
+        assert list(mp4.read_samples(path, track, chunk=1)) == samples
+
+
+def test_no_such_track():
+    with temporary_file(suffix=".mp4") as path:
+        with open(path, "wb") as f:
+            f.write(mp4_file())
+
+        assert mp4.find_track(path, "fdsc") is None
+
+
+def test_not_an_mp4():
+    with temporary_file(suffix=".mp4") as path:
+        with open(path, "wb") as f:
+            f.write(b"this is not an mp4")
+
+        with pytest.raises(IOError):
+            mp4.find_track(path, "gpmd")
+
+
+def test_recording_loads_data_track_without_ffmpeg():
+    with temporary_file(suffix=".mp4") as path:
+        with open(path, "wb") as f:
+            f.write(mp4_file())
+
+        track = mp4.find_track(path, "gpmd")
+        recording = GoproRecording(
+            ffmpeg=None,
+            location=path,
+            file=None,
+            audio=None,
+            video=None,
+            data=DataStream(stream=1, frame_count=len(track), timebase=track.timescale, frame_duration=1001),
+            data_track=track
+        )
+
+        assert recording.load_data() == b"".join(samples)
+
+
+class StreamingFFMPEG:
+    """Streams the given bytes, a few at a time, as ffmpeg would for the data track"""
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    def stream(self, args, cb, timeout=None):
+        for i in range(0, len(self.data), 3):
+            cb(self.data[i:i + 3])
+        return 0
+
+
+def test_recording_falls_back_to_ffmpeg_when_file_is_truncated():
+    with temporary_file(suffix=".mp4") as path:
+        with open(path, "wb") as f:
+            f.write(mp4_file())
+
+        track = mp4.find_track(path, "gpmd")
+
+        # cut off part way through the second chunk, after the first has been read
+        with open(path, "r+b") as f:
+            f.truncate(track.offsets[1] + 1)
+
+        recording = GoproRecording(
+            ffmpeg=StreamingFFMPEG(b"".join(samples)),
+            location=path,
+            file=None,
+            audio=None,
+            video=None,
+            data=DataStream(stream=1, frame_count=len(track), timebase=track.timescale, frame_duration=1001),
+            data_track=track
+        )
+
+        assert recording.load_data() == b"".join(samples)
@@ -0,0 +1,142 @@
+import io
+import struct
+
+import pytest
+
+from gopro_overlay.dimensions import Dimension
+from gopro_overlay.nut import v, s, crc32, NUTMuxer, DeduplicatingWriter, ID_STRING, MAIN_STARTCODE, \
+    STREAM_STARTCODE, SYNCPOINT_STARTCODE, MSB_PTS_SHIFT, FLAG_CODED
+
+
+def test_v():
+    assert v(0) == b"\x00"
+    assert v(127) == b"\x7f"
+    assert v(128) == b"\x81\x00"
+    assert v(16384) == b"\x81\x80\x00"
+    with pytest.raises(ValueError):
+        v(-1)
+
+
+def test_s():
+    assert s(0) == v(0)
+    assert s(1) == v(1)
+    assert s(-1) == v(2)
+    assert s(2) == v(3)
+
+
+def test_crc_of_data_with_its_crc_appended_is_zero():
+    data = b"nut/multimedia container"
+    assert crc32(data) != 0
+    assert crc32(data + struct.pack(">I", crc32(data))) == 0
+
+
+class Reader:
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+
+    def read(self, n) -> bytes:
+        b = self.data[self.pos:self.pos + n]
+        self.pos += n
+        return b
+
+    def v(self) -> int:
+        n = 0
+        while True:
+            b = self.read(1)[0]
+            n = (n << 7) | (b & 0x7F)
+            if not b & 0x80:
+                return n
+
+    def packet(self) -> bytes:
+        forward_ptr = self.v()
+        data = self.read(forward_ptr)
+        assert crc32(data) == 0
+        return data[:-4]
+
+    def frame(self):
+        start = self.pos
+        assert self.read(1) == b"\x00"
+        flags = self.v() ^ FLAG_CODED
+        pts = self.v() - (1 << MSB_PTS_SHIFT)
+        size = self.v()
+        self.read(4)
+        assert crc32(self.data[start:self.pos]) == 0
+        return flags, pts, self.read(size)
+
+
+def frames_in(data: bytes):
+    reader = Reader(data)
+    assert reader.read(len(ID_STRING)) == ID_STRING
+
+    startcodes = []
+    frames = []
+    while reader.pos < len(data):
+        startcode = struct.unpack(">Q", reader.read(8))[0]
+        startcodes.append(startcode)
+        reader.packet()
+        if startcode == SYNCPOINT_STARTCODE:
+            frames.append(reader.frame())
+    return startcodes, frames
+
+
+def test_muxer_writes_headers_then_syncpoint_and_frame():
+    out = io.BytesIO()
+    muxer = NUTMuxer(out, Dimension(2, 1))
+
+    muxer.write_frame(0, bytes(8))
+    muxer.write_frame(300, bytes(range(8)))
+
+    startcodes, frames = frames_in(out.getvalue())
+
+    assert startcodes == [MAIN_STARTCODE, STREAM_STARTCODE, SYNCPOINT_STARTCODE, SYNCPOINT_STARTCODE]
+    assert [(pts, data) for _, pts, data in frames] == [(0, bytes(8)), (300, bytes(range(8)))]
+
+
+class RecordingMuxer:
+    def __init__(self):
+        self.writer = io.BytesIO()
+        self.frames = []
+
+    def write_frame(self, pts, data):
+        self.frames.append((pts, bytes(data)))
+
+
+def test_duplicate_frames_skipped():
+    muxer = RecordingMuxer()
+    writer = DeduplicatingWriter(muxer, frame_duration=100)
+
+    for frame in [b"a", b"a", b"b", b"b", b"b", b"a", b"a"]:
+        writer.write(memoryview(frame))
+
+    assert muxer.frames == [(0, b"a"), (200, b"b"), (500, b"a")]
+    assert writer.skipped == 4
+
+    writer.flush()
+    assert muxer.frames[-1] == (600, b"a")
+
+
+def test_flush_without_pending_frame_writes_nothing():
+    muxer = RecordingMuxer()
+    writer = DeduplicatingWriter(muxer, frame_duration=100)
+
+    writer.write(b"a")
+    writer.write(b"b")
+    writer.flush()
+
+    assert muxer.frames == [(0, b"a"), (100, b"b")]
+
+
+def test_frames_in_reused_buffer_compared_by_content():
+    muxer = RecordingMuxer()
+    writer = DeduplicatingWriter(muxer, frame_duration=100)
+
+    slot = bytearray(b"aa")
+    writer.write(memoryview(slot))
+    slot[1:] = b"b"
+    writer.write(memoryview(slot))
+    writer.write(memoryview(slot))
+
+    assert muxer.frames == [(0, b"aa"), (100, b"ab")]
+    assert writer.skipped == 1
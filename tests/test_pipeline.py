@@ -0,0 +1,132 @@
+import datetime
+import random
+
+import pytest
+
+from gopro_overlay import fake, timeseries_process
+from gopro_overlay.entry import Entry
+from gopro_overlay.framemeta import FrameMeta
+from gopro_overlay.gpmf import GPSFix, GPS_FIXED_VALUES
+from gopro_overlay.pipeline import Pipeline
+from gopro_overlay.timeunits import timeunits
+from tests.test_framemeta_columnar import columnar_copy_of
+from tests.test_timeseries import datetime_of
+
+locked_2d = lambda e: e.gpsfix in GPS_FIXED_VALUES
+locked_3d = lambda e: e.gpsfix == GPSFix.LOCK_3D.value
+
+
+def framemeta():
+    fm = fake.fake_framemeta(length=datetime.timedelta(seconds=20), rng=random.Random(6))
+    rng = random.Random(2)
+    fixes = [GPSFix.NO.value, GPSFix.LOCK_2D.value, GPSFix.LOCK_3D.value, GPSFix.LOCK_3D.value]
+    fm.process(lambda e: {"gpsfix": rng.choice(fixes)})
+    return fm
+
+
+def dashboard_stages(target):
+    target.process_batch(timeseries_process.process_ses_batch("point", lambda i: i.point, alpha=0.45),
+                         filter_fn=locked_2d)
+    target.process_deltas_batch(timeseries_process.calculate_speeds_batch(), skip=54, filter_fn=locked_2d)
+    target.process(timeseries_process.calculate_odo(), filter_fn=locked_2d)
+    target.process_accel(timeseries_process.calculate_accel(), skip=54)
+    target.process_deltas_batch(timeseries_process.calculate_gradient_batch(), skip=54, filter_fn=locked_3d)
+    target.process_batch(timeseries_process.process_kalman_batch("speed", lambda e: e.speed))
+    target.process(timeseries_process.filter_locked())
+
+
+def assert_same(one, other, same=lambda a, b: repr(a) == repr(b)):
+    for a, b in zip(one.items(), other.items()):
+        for k in a.items.keys() | b.items.keys():
+            assert same(getattr(b, k), getattr(a, k)), k
+
+
+def test_delays_are_after_earlier_lookbacks():
+    pipeline = Pipeline()
+    dashboard_stages(pipeline)
+
+    assert pipeline.delays() == [0, 0, 54, 54, 108, 162, 162]
+    assert pipeline.lag() == 162
+
+
+@pytest.mark.parametrize("chunk", [1, 7, 100, 1024])
+def test_same_as_separate_passes(chunk):
+    expected = framemeta()
+    dashboard_stages(expected)
+
+    actual = framemeta()
+    pipeline = Pipeline()
+    dashboard_stages(pipeline)
+    pipeline.run(actual.items(), chunk=chunk)
+
+    assert_same(expected, actual)
+
+
+def test_columnar():
+    expected = framemeta()
+    dashboard_stages(expected)
+
+    actual = columnar_copy_of(framemeta())
+    pipeline = Pipeline()
+    dashboard_stages(pipeline)
+    actual.process_pipeline(pipeline)
+
+    # columns hold numbers as floats
+    assert_same(expected, actual, same=lambda a, b: a == b)
+
+
+def test_later_stages_see_earlier_ones_finished():
+    fm = FrameMeta()
+    for i in range(10):
+        fm.add(timeunits(seconds=i), Entry(datetime_of(i), n=float(i)))
+
+    pipeline = Pipeline()
+    pipeline.process_deltas(lambda a, b, skip: {"d": b.n - a.n}, skip=3)
+    pipeline.process_accel(lambda a, b, skip: {"dd": (b.d or 0) + (a.d or 0)}, skip=2)
+    pipeline.process(lambda e: {"n": None})
+
+    fm.process_pipeline(pipeline)
+
+    assert [e.d for e in fm.items()] == [3.0] * 7 + [None] * 3
+    assert [e.dd for e in fm.items()] == [None, None, 6.0, 6.0, 6.0, 6.0, 6.0, 3.0, 3.0, 0.0]
+    assert [e.n for e in fm.items()] == [None] * 10
+
+
+def declared_stages(target):
+    target.process(lambda e: {"b": e.a * 2}, produces={"b"}, needs={"a"})
+    target.process_deltas(lambda a, b, skip: {"c": b.b - a.b}, skip=2, produces={"c"}, needs={"b"})
+    target.process(lambda e: {"d": e.a + 1}, produces={"d"}, needs={"a"})
+    target.process(lambda e: {"e": (e.c or 0) + 1}, produces={"e"}, needs={"c"})
+    target.process(lambda e: {"checked": True})
+
+
+def test_only_needed_stages():
+    pipeline = Pipeline()
+    declared_stages(pipeline)
+
+    assert len(pipeline.needed_for(None).stages) == 5
+    assert [s.produces for s in pipeline.needed_for({"d"}).stages] == [{"d"}, None]
+    assert [s.produces for s in pipeline.needed_for({"e"}).stages] == [{"b"}, {"c"}, {"e"}, None]
+    assert [s.produces for s in pipeline.needed_for(set()).stages] == [None]
+
+
+def test_needed_stages_give_same_values():
+    def fm():
+        f = FrameMeta()
+        for i in range(10):
+            f.add(timeunits(seconds=i), Entry(datetime_of(i), a=float(i * i)))
+        return f
+
+    everything = Pipeline()
+    declared_stages(everything)
+    expected = fm()
+    expected.process_pipeline(everything)
+
+    some = Pipeline()
+    declared_stages(some)
+    actual = fm()
+    actual.process_pipeline(some.needed_for({"e"}))
+
+    assert [e.e for e in actual.items()] == [e.e for e in expected.items()]
+    assert [e.checked for e in actual.items()] == [True] * 10
+    assert [e.d for e in actual.items()] == [None] * 10
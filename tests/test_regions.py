@@ -0,0 +1,116 @@
+import datetime
+
+from PIL import Image
+
+from gopro_overlay.dimensions import Box, Dimension
+from gopro_overlay.gpmf import GPSFix
+from gopro_overlay.point import Coordinate
+from gopro_overlay.widgets.gps import GPSLock
+from gopro_overlay.widgets.regions import measure_regions, merge_boxes
+from gopro_overlay.widgets.schedule import Scheduled
+from gopro_overlay.widgets.text import Text
+from gopro_overlay.widgets.widgets import Composite, Translate, Drawable, Frame, Widget
+
+size = Dimension(1920, 1080)
+
+
+def test_merge_boxes_overlapping():
+    assert merge_boxes([Box(0, 0, 10, 10), Box(5, 5, 20, 20), Box(100, 100, 110, 110)]) == [
+        Box(0, 0, 20, 20), Box(100, 100, 110, 110)
+    ]
+
+
+def test_merge_boxes_within_gap():
+    assert merge_boxes([Box(0, 0, 10, 10), Box(15, 0, 20, 10)], gap=6) == [Box(0, 0, 20, 10)]
+    assert merge_boxes([Box(0, 0, 10, 10), Box(15, 0, 20, 10)], gap=5) == [Box(0, 0, 10, 10), Box(15, 0, 20, 10)]
+
+
+class FixedWidthFont:
+    """Each character is 10 wide, and 20 high"""
+
+    def getbbox(self, text, stroke_width=0, anchor=None, direction=None):
+        width = len(text) * 10
+        x0 = -width if anchor[0] == "r" else 0
+        return x0, 0, x0 + width, 20
+
+
+class Clock:
+    def __init__(self):
+        self.time = None
+        self.entry = None
+
+    def set_time(self, time, entry):
+        self.time, self.entry = time, entry
+
+
+def icon(at, width=64, height=64):
+    return Drawable(at, Image.new("RGBA", (width, height)))
+
+
+def measure(widgets, times=((0, "a"),), set_time=lambda t, e: None):
+    return measure_regions(widgets, size, times, set_time, gap=0)
+
+
+def test_regions_follow_translates():
+    widgets = [
+        Translate(Coordinate(100, 200), Composite(icon(Coordinate(10, 20)))),
+        icon(Coordinate(1000, 10), 256, 256),
+    ]
+
+    assert measure(widgets) == [Box(1000, 10, 1256, 266), Box(110, 220, 174, 284)]
+
+
+def test_regions_of_frame_ignore_children():
+    widgets = [Translate(Coordinate(10, 10), Frame(Dimension(100, 50), child=icon(Coordinate(0, 0), 512, 512)))]
+
+    assert measure(widgets) == [Box(10, 10, 110, 60)]
+
+
+def test_regions_clipped_to_frame():
+    assert measure([icon(Coordinate(1800, 1000), 256, 256)]) == [Box(1800, 1000, 1920, 1080)]
+
+
+def test_regions_cover_every_value_of_text():
+    clock = Clock()
+    text = Text(Coordinate(500, 100), lambda: clock.entry, FixedWidthFont(), align="right")
+
+    regions = measure([text], times=[(0, "A"), (1, "AAAAA"), (2, "AA")], set_time=clock.set_time)
+
+    assert regions == [Box(450, 100, 500, 120)]
+
+
+def test_regions_look_through_scheduled_widgets():
+    clock = Clock()
+    text = Text(Coordinate(0, 0), lambda: clock.entry, FixedWidthFont())
+    scheduled = Scheduled(text, 1, clock=lambda: datetime.datetime.now())
+
+    regions = measure([Translate(Coordinate(10, 10), scheduled)], times=[(0, "AAA")], set_time=clock.set_time)
+
+    assert regions == [Box(10, 10, 40, 30)]
+
+
+class Unsized(Widget):
+    def draw(self, image, draw):
+        pass
+
+
+def test_regions_unknown_for_widgets_without_extent():
+    assert measure([icon(Coordinate(0, 0)), Unsized()]) is None
+
+
+def test_regions_unknown_when_text_cant_be_worked_out():
+    text = Text(Coordinate(0, 0), lambda: None, FixedWidthFont())
+
+    assert measure([text]) is None
+
+
+def test_regions_of_gps_lock_cover_every_icon():
+    lock = GPSLock(
+        fix=lambda: GPSFix.LOCK_3D.value,
+        lock_no=icon(Coordinate(0, 0)),
+        lock_unknown=icon(Coordinate(0, 0)),
+        lock_2d=icon(Coordinate(0, 0), 32, 32),
+        lock_3d=icon(Coordinate(0, 0), 80, 64),
+    )
+
+    assert measure([Translate(Coordinate(10, 10), lock)]) == [Box(10, 10, 90, 74)]
@@ -0,0 +1,68 @@
+import datetime
+
+from gopro_overlay.entry import Entry
+from gopro_overlay.point import Point
+from gopro_overlay.resample import Resampler
+from gopro_overlay.timeseries import Timeseries
+from gopro_overlay.timeunits import timeunits
+from gopro_overlay.units import units
+from tests.test_timeseries import datetime_of
+
+
+def timeseries(names=("start", "middle", "end")):
+    return Timeseries([
+        Entry(datetime_of(0), point=Point(51.5, -0.1), alt=units.Quantity(10, units.m), hr=units.Quantity(100, units.bpm),
+              cad=3.0, mixed=units.Quantity(1, units.m), name=names[0]),
+        Entry(datetime_of(1.7), point=Point(51.6, -0.2), alt=units.Quantity(17.3, units.m), hr=None, cad=5.0,
+              mixed=units.Quantity(1, units.km), name=names[1], extra=units.Quantity(4, units.m)),
+        Entry(datetime_of(3), point=Point(51.7, -0.4), alt=units.Quantity(11, units.m), cad=2.0,
+              mixed=units.Quantity(2, units.m), name=names[2]),
+    ])
+
+
+def assert_same_items(actual, expected):
+    assert actual.keys() == expected.keys()
+    for k in expected:
+        assert repr(actual[k]) == repr(expected[k]), k
+
+
+def test_same_as_timeseries_get():
+    # timeseries can't interpolate text
+    ts = timeseries(names=(None, None, None))
+    resampler = Resampler(ts)
+
+    for s in [0, 0.1, 0.85, 1.7, 1.71, 2.5, 3]:
+        assert_same_items(resampler.items_at(datetime_of(s)), ts.get(datetime_of(s)).items)
+
+
+def test_outside_is_none():
+    resampler = Resampler(timeseries())
+    assert resampler.items_at(datetime_of(-0.1)) is None
+    assert resampler.items_at(datetime_of(3.1)) is None
+
+
+def test_text_is_nearest():
+    resampler = Resampler(timeseries())
+    assert resampler.items_at(datetime_of(0.8))["name"] == "start"
+    assert resampler.items_at(datetime_of(0.9))["name"] == "middle"
+    assert resampler.items_at(datetime_of(2.9))["name"] == "end"
+
+
+def test_grid_is_same_as_stepping():
+    ts = timeseries(names=(None, None, None))
+    resampler = Resampler(ts)
+
+    grid = list(resampler.grid(datetime.timedelta(seconds=0.1)))
+    assert [dt for dt, _ in grid] == list(ts.stepper(timeunits(seconds=0.1)).steps())
+    for dt, items in grid:
+        assert_same_items(items, ts.get(dt).items)
+
+
+def test_grid_from_start_to_end():
+    resampler = Resampler(timeseries())
+
+    dts = [dt for dt, _ in resampler.grid(datetime.timedelta(seconds=0.1), start=datetime_of(1.05), end=datetime_of(1.5))]
+
+    assert dts[0] == datetime_of(1.1)
+    assert dts[-1] == datetime_of(1.5)
+    assert len(dts) == 5
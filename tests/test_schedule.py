@@ -0,0 +1,167 @@
+import pytest
+from PIL import Image, ImageDraw
+
+from gopro_overlay.dimensions import Box
+from gopro_overlay.layout_xml import layout_from_xml, update_rate_in
+from gopro_overlay.point import Coordinate
+from gopro_overlay.timeunits import timeunits, Timeunit
+from gopro_overlay.widgets.schedule import Scheduled
+from gopro_overlay.widgets.widgets import Widget, Scene, Translate, Composite
+
+size = (32, 16)
+
+
+class Counter(Widget):
+    """Draws a pixel whose colour shows how many times it has been drawn"""
+
+    def __init__(self, extent=None):
+        self.draws = 0
+        self._extent = extent
+
+    def extent(self):
+        return self._extent
+
+    def draw(self, image, draw):
+        self.draws += 1
+        draw.point((3, 2), fill=(self.draws, 0, 0, 255))
+
+
+class Clock:
+    def __init__(self):
+        self.seconds = 0.0
+
+    def __call__(self) -> Timeunit:
+        return timeunits(seconds=self.seconds)
+
+
+def run(widget, clock, times, background=(0, 0, 0, 0)):
+    pixels = []
+    for t in times:
+        clock.seconds = t
+        image = Image.new("RGBA", size, background)
+        widget.draw(image, ImageDraw.Draw(image))
+        pixels.append(image.getpixel((3, 2))[0])
+    return pixels
+
+
+@pytest.mark.parametrize("extent", [None, Box(2, 1, 5, 5)])
+def test_widget_only_redrawn_at_its_rate(extent):
+    clock = Clock()
+    counter = Counter(extent)
+    scheduled = Scheduled(counter, hz=2, clock=clock)
+
+    pixels = run(scheduled, clock, [0.0, 0.1, 0.2, 0.4, 0.5, 0.6, 0.9, 1.0])
+
+    assert counter.draws == 3
+    assert pixels == [1, 1, 1, 1, 2, 2, 2, 3]
+
+
+def test_scheduled_widget_inside_translate():
+    clock = Clock()
+    counter = Counter()
+    scene = Scene([Translate(Coordinate(10, 5), Composite(Scheduled(counter, hz=1, clock=clock)))])
+
+    image = scene.draw(Image.new("RGBA", size, (0, 0, 0, 0)))
+    assert image.getpixel((13, 7)) == (1, 0, 0, 255)
+
+    image = scene.draw(Image.new("RGBA", size, (0, 0, 0, 0)))
+    assert image.getpixel((13, 7)) == (1, 0, 0, 255)
+    assert counter.draws == 1
+
+
+def test_changed_only_when_due():
+    clock = Clock()
+    scheduled = Scheduled(Counter(), hz=1, clock=clock)
+
+    assert scheduled.changed()
+    run(scheduled, clock, [0.0])
+    assert not scheduled.changed()
+    assert scheduled.extent() == Box(3, 2, 4, 3)
+    clock.seconds = 1.0
+    assert scheduled.changed()
+    assert scheduled.extent() is None
+
+
+class Overwriting(Widget):
+    """Draws partially transparent pixels, which replace what is underneath, and then blends one on top"""
+
+    def extent(self):
+        return Box(0, 0, 8, 8)
+
+    def draw(self, image, draw):
+        draw.rectangle((1, 1, 4, 4), fill=(200, 100, 50, 128))
+        image.alpha_composite(Image.new("RGBA", (2, 2), (0, 0, 255, 64)), (4, 4))
+
+
+@pytest.mark.parametrize("background", [(0, 0, 0, 0), (10, 20, 30, 170)])
+def test_scheduled_widget_looks_the_same_as_drawing_it(background):
+    clock = Clock()
+    scheduled = Scheduled(Overwriting(), hz=1, clock=clock)
+
+    expected = Image.new("RGBA", size, background)
+    Overwriting().draw(expected, ImageDraw.Draw(expected))
+
+    for t in [0.0, 0.5]:
+        clock.seconds = t
+        image = Image.new("RGBA", size, background)
+        scheduled.draw(image, ImageDraw.Draw(image))
+        assert image.tobytes() == expected.tobytes()
+
+
+def test_update_rate_must_be_positive():
+    with pytest.raises(ValueError):
+        Scheduled(Counter(), hz=0, clock=Clock())
+
+
+def test_layout_update_rate_attribute():
+    xml = """<layout>
+        <composite x="10" y="10" update-rate="2">
+            <component type="icon" x="0" y="0" file="gauge.png" size="16" update-rate="1"/>
+        </composite>
+    </layout>"""
+
+    [root] = layout_from_xml(xml, renderer=None, framemeta=None, font=None, privacy=None)(lambda: None, pts=Clock())
+
+    [scheduled] = root.widgets
+    assert isinstance(scheduled, Scheduled)
+    assert scheduled.hz == 2
+    assert isinstance(scheduled.widget.widget.widgets[0], Scheduled)
+
+
+def test_layout_update_rate_follows_frame_time_of_video():
+    xml = """<layout>
+        <component type="icon" x="0" y="0" file="gauge.png" size="16" update-rate="1"/>
+    </layout>"""
+
+    clock = Clock()
+    [root] = layout_from_xml(xml, renderer=None, framemeta=None, font=None, privacy=None, timelapse=10)(
+        lambda: None, pts=clock
+    )
+    [scheduled] = root.widgets
+    scheduled.draw(Image.new("RGBA", size), None)
+
+    clock.seconds = 9.9
+    assert not scheduled.changed()
+    clock.seconds = 10
+    assert scheduled.changed()
+
+
+def test_layout_update_rate_needs_frame_time():
+    xml = """<layout>
+        <component type="icon" x="0" y="0" file="gauge.png" size="16" update-rate="1"/>
+    </layout>"""
+
+    with pytest.raises(IOError):
+        layout_from_xml(xml, renderer=None, framemeta=None, font=None, privacy=None)(lambda: None)
+
+
+def test_finding_update_rate_in_layout():
+    xml = """<layout>
+        <component type="icon" x="0" y="0" file="gauge.png" size="16"/>
+        <composite name="slow">
+            <component type="icon" x="0" y="0" file="gauge.png" size="16" update-rate="1"/>
+        </composite>
+    </layout>"""
+
+    assert update_rate_in(xml)
+    assert not update_rate_in(xml, include=lambda name: name != "slow")
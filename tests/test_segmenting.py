@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+from gopro_overlay.segmenting import segment_ranges, segment_path, SegmentedRender
+from gopro_overlay.timeunits import timeunits
+from pathlib import Path
+
+
+def seconds(*s):
+    return [timeunits(seconds=x) for x in s]
+
+
+def test_single_segment_is_whole_video():
+    assert segment_ranges(timeunits(seconds=60), seconds(0, 10, 20), 1) == [
+        (timeunits(seconds=0), timeunits(seconds=60))
+    ]
+
+
+def test_segments_start_on_nearest_keyframes():
+    keyframes = seconds(0, 1, 9, 14, 21, 29, 41, 50)
+    assert segment_ranges(timeunits(seconds=60), keyframes, 3) == [
+        (timeunits(seconds=0), timeunits(seconds=21)),
+        (timeunits(seconds=21), timeunits(seconds=41)),
+        (timeunits(seconds=41), timeunits(seconds=60)),
+    ]
+
+
+def test_fewer_segments_when_not_enough_keyframes():
+    assert segment_ranges(timeunits(seconds=60), seconds(0, 30), 4) == [
+        (timeunits(seconds=0), timeunits(seconds=30)),
+        (timeunits(seconds=30), timeunits(seconds=60)),
+    ]
+
+
+def test_no_keyframes_means_one_segment():
+    assert segment_ranges(timeunits(seconds=60), [], 4) == [(timeunits(seconds=0), timeunits(seconds=60))]
+
+
+def test_needs_a_segment():
+    with pytest.raises(ValueError):
+        segment_ranges(timeunits(seconds=60), [], 0)
+
+
+def test_segment_path():
+    assert segment_path(Path("/tmp/out.mp4"), 3) == Path("/tmp/out.part003.mp4")
+
+
+def test_segmented_render_runs_each_range(tmp_path):
+    ranges = segment_ranges(timeunits(seconds=60), seconds(20, 40), 3)
+
+    def render(index, start, end):
+        (tmp_path / f"{index}").write_text(f"{start.us}-{end.us}")
+
+    SegmentedRender(ranges, render).run()
+
+    assert sorted(os.listdir(tmp_path)) == ["0", "1", "2"]
+    assert (tmp_path / "1").read_text() == f"{timeunits(seconds=20).us}-{timeunits(seconds=40).us}"
+
+
+def test_segmented_render_fails_if_a_segment_fails():
+    def render(index, start, end):
+        if index == 1:
+            raise ValueError("boom")
+
+    with pytest.raises(IOError):
+        SegmentedRender(segment_ranges(timeunits(seconds=60), seconds(30), 2), render).run()
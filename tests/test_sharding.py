@@ -0,0 +1,83 @@
+import contextlib
+import io
+
+import pytest
+from PIL import Image, ImageDraw
+
+from gopro_overlay.dimensions import Dimension
+from gopro_overlay.entry import Entry
+from gopro_overlay.framemeta import FrameMeta
+from gopro_overlay.sharding import ShardedRenderer
+from gopro_overlay.timeunits import timeunits
+from tests.test_timeseries import datetime_of
+
+size = Dimension(16, 8)
+
+
+class NumberingOverlay:
+    """Draws the frame time into the first pixel, so can check frame ordering"""
+
+    def draw(self, pts, image: Image.Image):
+        ImageDraw.Draw(image).point((0, 0), fill=(int(pts.millis() / 100), 1, 2, 255))
+        return image
+
+
+@contextlib.contextmanager
+def numbering_overlay():
+    yield NumberingOverlay()
+
+
+class FailingOverlay:
+    def draw(self, pts, image: Image.Image):
+        if pts > timeunits(seconds=1):
+            raise ValueError("Oops")
+
+
+@contextlib.contextmanager
+def failing_overlay():
+    yield FailingOverlay()
+
+
+def framemeta_of(seconds):
+    fm = FrameMeta()
+    fm.add(timeunits(seconds=0), Entry(datetime_of(0)))
+    fm.add(timeunits(seconds=seconds), Entry(datetime_of(seconds)))
+    return fm
+
+
+def frames_in(data: bytes):
+    frame_size = size.x * size.y * 4
+    return [data[i:i + frame_size] for i in range(0, len(data), frame_size)]
+
+
+@pytest.mark.parametrize("workers", [1, 2, 3])
+def test_frames_are_written_in_order(workers):
+    stepper = framemeta_of(2).stepper(timeunits(seconds=0.1))
+
+    writer = io.BytesIO()
+    with ShardedRenderer(size, (0, 0, 0, 0), writer, workers=workers) as renderer:
+        renderer.render(stepper, numbering_overlay)
+
+    frames = frames_in(writer.getvalue())
+    assert len(frames) == len(stepper)
+    assert [f[0] for f in frames] == list(range(0, len(stepper)))
+    assert frames[5][4:] == bytes(len(frames[5]) - 4)
+
+
+def test_background_is_applied_to_every_frame():
+    stepper = framemeta_of(1).stepper(timeunits(seconds=0.1))
+
+    writer = io.BytesIO()
+    with ShardedRenderer(size, (10, 20, 30, 40), writer, workers=2) as renderer:
+        renderer.render(stepper, numbering_overlay)
+
+    for frame in frames_in(writer.getvalue()):
+        assert frame[-4:] == bytes([10, 20, 30, 40])
+
+
+def test_worker_failure_is_reported():
+    stepper = framemeta_of(2).stepper(timeunits(seconds=0.1))
+
+    with pytest.raises(IOError):
+        with ShardedRenderer(size, (0, 0, 0, 0), io.BytesIO(), workers=2) as renderer:
+            renderer.render(stepper, failing_overlay)
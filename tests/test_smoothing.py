@@ -32,3 +32,21 @@ def test_kalman_units_and_nones():
     assert k.update(units.Quantity(1, "mps")).m == pytest.approx(0.2366, abs=0.001)
     assert k.update(None).m == pytest.approx(0.1878, abs=0.001)
     assert k.update(units.Quantity(1, "mps")).m == pytest.approx(0.3783, abs=0.001)
+
+
+def test_kalman_all_same_as_one_at_a_time():
+    values = [1.0, 2.0, None, 3.0, -1.0, 0.0, 7.5]
+    one = Kalman()
+    expected = [one.update(v) for v in values]
+
+    batch = Kalman()
+    assert batch.update_all(values[:3]) + batch.update_all(values[3:]) == expected
+    assert batch.update(4.0) == one.update(4.0)
+
+
+def test_ses_all_same_as_one_at_a_time():
+    values = [3.0, 5.0, 9.0, 20.0, 0.0, None, 4.0]
+    one = SimpleExponential(alpha=0.4)
+    expected = [one.update(v) for v in values]
+
+    assert SimpleExponential(alpha=0.4).update_all(values) == expected
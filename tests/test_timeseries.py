@@ -1,11 +1,15 @@
 import datetime
+import random
 
 import pytest
 
+from gopro_overlay import fake
 from gopro_overlay.entry import Entry
+from gopro_overlay.framemeta import FrameMeta
 from gopro_overlay.point import Point
 from gopro_overlay.timeseries import Timeseries
-from gopro_overlay.timeseries_process import process_ses, calculate_speeds, calculate_gradient, calculate_odo
+from gopro_overlay.timeseries_process import process_ses, calculate_speeds, calculate_gradient, calculate_odo, \
+    process_kalman, process_kalman_pp3, process_ses_batch, process_kalman_batch, process_kalman_pp3_batch
 from gopro_overlay.timeunits import timeunits
 from gopro_overlay.units import units
 
@@ -108,3 +112,38 @@ def test_process_odo():
     )
     assert r["codo"].magnitude == 25
 
+
+
+def test_batch_smoothing_same_as_one_at_a_time():
+    def framemeta():
+        return fake.fake_framemeta(length=datetime.timedelta(seconds=10), rng=random.Random(9))
+
+    one, batch = framemeta(), framemeta()
+
+    one.process(process_ses("point", lambda i: i.point, alpha=0.45))
+    one.process(process_kalman("speed", lambda e: e.speed))
+    one.process(process_kalman_pp3("accl", lambda e: e.accl))
+
+    batch.process_batch(process_ses_batch("point", lambda i: i.point, alpha=0.45))
+    batch.process_batch(process_kalman_batch("speed", lambda e: e.speed))
+    batch.process_batch(process_kalman_pp3_batch("accl", lambda e: e.accl))
+
+    for a, b in zip(one.items(), batch.items()):
+        assert b.point == a.point
+        assert b.speed.m == a.speed.m
+        assert b.speed.units == a.speed.units
+        assert (b.accl.x.m, b.accl.y.m, b.accl.z.m) == (a.accl.x.m, a.accl.y.m, a.accl.z.m)
+        assert b.accl.x.units == a.accl.x.units
+
+
+def test_batch_kalman_skips_missing():
+    ts = FrameMeta()
+    for i, speed in enumerate([1.0, None, 2.0]):
+        ts.add(timeunits(seconds=i), Entry(datetime_of(i), speed=units.Quantity(speed, units.mps) if speed else None))
+
+    ts.process_batch(process_kalman_batch("ks", lambda e: e.speed))
+
+    entries = list(ts.items())
+    assert entries[0].ks == units.Quantity(1.0, units.mps)
+    assert entries[1].ks is None
+    assert entries[2].ks.m == pytest.approx(1.0909, abs=0.0001)
@@ -63,7 +63,7 @@ def test_rendering_moving_map_journey():
         a_real_journey(
             name="rendering_moving_map_journey",
             dimension=Dimension(256, 256),
-            f_scene=lambda entry: [moving_map(
+            f_scene=lambda entry, pts=None: [moving_map(
                 at=Coordinate(0, 0),
                 entry=entry,
                 size=256,